@@ -0,0 +1,89 @@
+from typing import List, Optional
+
+# Élő szolgálati állapot (!jelen)
+#
+# person_key → az illető legutolsó felvette / leadta eseménye. A DutyLog
+# listenereként minden beolvasott rekorddal frissül, induláskor a betöltött
+# naplóból épül fel, így a !jelen nem olvas history-t és nem rendez.
+# Ha a legutolsó esemény módosul vagy törlődik, a személy állapotát a DutyLog
+# személyenkénti indexéből számoljuk újra.
+
+
+def person_of(rec) -> Optional[str]:
+    return rec.person_key or rec.name_norm
+
+
+def _when(rec) -> int:
+    ts = rec.ts_min
+    return ts if ts is not None else -1
+
+
+class ActiveDuty:
+    """Last felvette/leadta event per person; `active()` lists who is on duty."""
+
+    def __init__(self):
+        self._last = {}  # person → legutolsó felvette/leadta rekord
+        self.latest_min = None  # a legfrissebb esemény ideje (falióra-perc)
+        self._log = None
+
+    # ---------------- DutyLog listener ----------------
+
+    def on_upsert(self, rec, old):
+        if old is not None and self._last.get(person_of(old)) is old:
+            self._recompute(person_of(old))
+        self._apply(rec)
+
+    def on_remove(self, rec):
+        person = person_of(rec)
+        if self._last.get(person) is rec:
+            self._recompute(person)
+
+    def on_clear(self):
+        self._last.clear()
+        self.latest_min = None
+
+    def _apply(self, rec):
+        if rec.type not in ("felvette", "leadta"):
+            return
+        person = person_of(rec)
+        if not person:
+            return
+        when = _when(rec)
+        current = self._last.get(person)
+        if current is None or when >= _when(current):
+            self._last[person] = rec
+        if rec.ts_min is not None and (self.latest_min is None or rec.ts_min > self.latest_min):
+            self.latest_min = rec.ts_min
+
+    def _recompute(self, person):
+        self._last.pop(person, None)
+        if self._log is None or not person:
+            return
+        recs = self._log.for_person(person_key=person) or self._log.for_person(name_norm=person)
+        for rec in recs:
+            if person_of(rec) == person:
+                self._apply(rec)
+
+    # ---------------- lekérdezés ----------------
+
+    def attach(self, log):
+        """Felépítés a betöltött naplóból, majd feliratkozás a változásokra."""
+        self._log = log
+        if self in log.listeners:
+            return
+        self.on_clear()
+        for rec in log:
+            self._apply(rec)
+        log.listeners.append(self)
+
+    def active(self, since_min: Optional[int] = None) -> List:
+        """Szolgálatban lévők (legutolsó eseményük felvette), felvétel szerint időrendben."""
+        out = [
+            rec for rec in self._last.values()
+            if rec.type == "felvette" and (since_min is None or _when(rec) >= since_min)
+        ]
+        out.sort(key=_when)
+        return out
+
+    def __len__(self) -> int:
+        return sum(1 for rec in self._last.values() if rec.type == "felvette")
@@ -0,0 +1,118 @@
+import os, json, logging
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger("EMS_DUTY_CORE")
+
+# Beolvasási checkpoint (duty_checkpoint.json)
+#
+# Csatornánként az utolsó feldolgozott duty-log üzenet azonosítója (snowflake).
+# Az on_message élőben tölti a duty_log-ot; újraindulás / újracsatlakozás után
+# és minden frissítésnél csak az ennél újabb üzeneteket kell a history-ból
+# pótolni. Az üzenet-ID-k időrendben nőnek, így a checkpoint csak előre léphet.
+#
+# Két szint: az advance() csak a "látott" jelet lépteti; a tartós (mentett)
+# jel a commit()-tal lép előre, miután az addig látott üzenetek rekordjai
+# lemezre kerültek (a write-behind persister flush-a után). Összeomláskor így
+# legfeljebb újraolvasunk, de nem ugrunk át ki nem írt üzenetet.
+#
+# A fájl a duty-kártya értelmező verzióját (dutyparse.PARSER_VERSION) is
+# tárolja, amellyel a napló utoljára teljesen fel lett dolgozva.
+
+
+class IngestCheckpoint:
+    """Per-channel message-id high-water mark, persisted atomically to JSON.
+
+    `advance()` records what has been seen; `commit()` promotes it to the
+    durable mark that `last_seen()` returns and `save()` writes.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self._last = {}  # channel_id → utolsó tartósan mentett üzenet-ID
+        self._seen = {}  # channel_id → utolsó látott, még nem commitolt üzenet-ID
+        self.parser_version = None  # az utolsó teljes feldolgozás értelmező-verziója
+        self.dirty = False
+        if self.path is not None:
+            self.load()
+
+    def load(self):
+        self._last.clear()
+        self._seen.clear()
+        self.parser_version = None
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self._last = {int(ch): int(mid) for ch, mid in data.get("channels", {}).items()}
+            self.parser_version = data.get("parser")
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Checkpoint fájl nem olvasható ({self.path}): {e} – üres checkpoint")
+            self._last = {}
+        self.dirty = False
+
+    def last_seen(self, channel_id) -> Optional[int]:
+        """A tartós jel: az ennél nem újabb üzenetek rekordjai már lemezen vannak."""
+        return self._last.get(int(channel_id))
+
+    def advance(self, channel_id, message_id) -> bool:
+        """Feldolgozott üzenet jelzése; régebbi azonosító nem írja felül. True, ha változott."""
+        channel_id, message_id = int(channel_id), int(message_id)
+        current = self._seen.get(channel_id, self._last.get(channel_id))
+        if current is not None and message_id <= current:
+            return False
+        self._seen[channel_id] = message_id
+        return True
+
+    def pending(self) -> Dict[int, int]:
+        """A még nem commitolt jelek pillanatképe (a flush kezdetén kell elkérni)."""
+        return dict(self._seen)
+
+    def commit(self, marks: Optional[Dict[int, int]] = None) -> bool:
+        """A jelek (alapból az összes látott) tartóssá tétele, miután a rekordjaik lemezre kerültek."""
+        marks = self.pending() if marks is None else marks
+        changed = False
+        for channel_id, message_id in marks.items():
+            current = self._last.get(channel_id)
+            if current is None or message_id > current:
+                self._last[channel_id] = message_id
+                changed = True
+            if self._seen.get(channel_id, message_id) <= message_id:
+                self._seen.pop(channel_id, None)
+        self.dirty = self.dirty or changed
+        return changed
+
+    def rewind(self, message_id) -> bool:
+        """Minden jel visszaállítása legfeljebb message_id-ra (pl. offline újraépítés után, ha a napló rövidebb lett)."""
+        changed = False
+        for channel_id, current in list(self._last.items()):
+            if current > message_id:
+                self._last[channel_id] = message_id
+                changed = True
+        self._seen = {ch: mid for ch, mid in self._seen.items() if mid <= message_id}
+        self.dirty = self.dirty or changed
+        return changed
+
+    def set_parser_version(self, version):
+        """A teljes újraolvasás után: a napló rekordjai ezzel az értelmező-verzióval készültek."""
+        if version != self.parser_version:
+            self.parser_version = version
+            self.dirty = True
+
+    def save(self, path=None):
+        path = Path(path) if path else self.path
+        if path is None or not self.dirty:
+            return
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            data = {"channels": {str(ch): mid for ch, mid in self._last.items()}}
+            if self.parser_version is not None:
+                data["parser"] = self.parser_version
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self.dirty = False
+
+    def __repr__(self) -> str:
+        return f"<IngestCheckpoint {self._last}>"
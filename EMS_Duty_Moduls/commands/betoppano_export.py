@@ -1,13 +1,16 @@
-import os, json
+import os
 import pytz
 import asyncio
 import datetime as dtmod
 from discord.ext import commands
 from ..helpers import help_meta, require_admin_channel
+from ..processing import get_pacer
+from ..progress import ProgressReporter
 
 class BetoppanoExportCog(commands.Cog):
-    def __init__(self, bot):
+    def __init__(self, bot, state, helpers):
         self.bot = bot
+        self.state = state
 
     @commands.command(name="betoppano_export", aliases=["betoppano export", "betoppano"])
     @require_admin_channel()
@@ -70,7 +73,9 @@ class BetoppanoExportCog(commands.Cog):
         if before_dt_utc:
             history_kwargs["before"] = before_dt_utc
 
-        async for msg in ch.history(**history_kwargs):
+        progress = ProgressReporter(ctx, "Betoppanó export", start=after_dt_utc or ch, end=before_dt_utc, interval=float(os.getenv("PROGRESS_INTERVAL", "10")))
+        async for msg in get_pacer().pace(ch.history(**history_kwargs)):
+            await progress.update(len(entries) + 1, msg.id)
             entries.append({
                 "id": msg.id,
                 "author": str(msg.author),
@@ -80,15 +85,13 @@ class BetoppanoExportCog(commands.Cog):
                 "created_at": msg.created_at.astimezone(pytz.timezone("Europe/Budapest")).strftime("%Y-%m-%d %H:%M:%S"),
                 "mentions": [m.id for m in msg.mentions],
             })
-            # small sleep to avoid hitting rate limits for long histories
-            if len(entries) % 50 == 0:
-                await asyncio.sleep(0.2)
 
-        with open(export_file, "w", encoding="utf-8") as f:
-            json.dump(entries, f, ensure_ascii=False, indent=2)
+        await progress.finish("letöltés kész", only_if_shown=True)
+
+        await self.state.FILES.write(export_file, entries, cache=False)
 
         await ctx.send(f"```diff\n+ [OK] {len(entries)} üzenet mentve → {export_file}```")
 
 
 def setup(bot=None, state=None, helpers=None):
-    bot.add_cog(BetoppanoExportCog(bot))
+    bot.add_cog(BetoppanoExportCog(bot, state, helpers))
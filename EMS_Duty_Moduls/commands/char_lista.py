@@ -1,12 +1,13 @@
-import os, json
 from discord.ext import commands
 from ..helpers import help_meta, require_admin_channel
 
 CHAR_TO_DISCORD_NAME_FILE = "char_to_discord_name.json"
 
 class CharListCog(commands.Cog):
-    def __init__(self, bot):
+    def __init__(self, bot, state, helpers):
         self.bot = bot
+        self.state = state
+        self.helpers = helpers
 
     @commands.command(name="char_lista", aliases=["charlist", "karakter_lista", "lista_char"])
     @require_admin_channel()
@@ -16,15 +17,14 @@ class CharListCog(commands.Cog):
         short="Listázza a FiveM ↔ Discord névpárosításokat.",
     )
     async def char_lista(self, ctx):
-        if not os.path.exists(CHAR_TO_DISCORD_NAME_FILE):
-            await ctx.send("```diff\n- A char_to_discord_name.json fájl még nem létezik.\n```")
-            return
         try:
-            with open(CHAR_TO_DISCORD_NAME_FILE, "r", encoding="utf-8") as f:
-                mapping = json.load(f)
+            mapping = await self.state.FILES.read(CHAR_TO_DISCORD_NAME_FILE)
         except Exception as e:
             await ctx.send(f"```diff\n- Hiba a fájl beolvasásakor: {e}\n```")
             return
+        if mapping is None:
+            await ctx.send("```diff\n- A char_to_discord_name.json fájl még nem létezik.\n```")
+            return
 
         if not mapping:
             await ctx.send("```diff\n- A fájl üres, még nincsenek párosítások.\n```")
@@ -41,4 +41,4 @@ class CharListCog(commands.Cog):
 
 
 def setup(bot=None, state=None, helpers=None):
-    bot.add_cog(CharListCog(bot))
+    bot.add_cog(CharListCog(bot, state, helpers))
@@ -1,10 +1,11 @@
-import os, json
 from discord.ext import commands
 from ..helpers import help_meta, require_admin_channel
 
 class DiagnosztikaCog(commands.Cog):
-    def __init__(self, bot):
+    def __init__(self, bot, state, helpers):
         self.bot = bot
+        self.state = state
+        self.helpers = helpers
 
     @commands.command(name="diagnosztika", aliases=["diag"])
     @require_admin_channel()
@@ -19,38 +20,33 @@ class DiagnosztikaCog(commands.Cog):
             "discord_user_ids.json": None,
             "char_to_discord_name.json": None,
         }
+        loaded = {}
         for fname in files:
-            if not os.path.exists(fname):
-                files[fname] = "❌ Nem található"
-                continue
             try:
-                with open(fname, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        files[fname] = f"✅ {len(data)} elem"
-                    elif isinstance(data, dict):
-                        files[fname] = f"✅ {len(data)} kulcs"
-                    else:
-                        files[fname] = f"⚠️ Ismeretlen formátum"
+                data = await self.state.FILES.read(fname)
             except Exception as e:
                 files[fname] = f"❌ Hiba beolvasáskor: {e}"
+                continue
+            if data is None:
+                files[fname] = "❌ Nem található"
+            elif isinstance(data, list):
+                files[fname] = f"✅ {len(data)} elem"
+            elif isinstance(data, dict):
+                files[fname] = f"✅ {len(data)} kulcs"
+            else:
+                files[fname] = f"⚠️ Ismeretlen formátum"
+            loaded[fname] = data
 
         # Count pairs
         found_pairs = 0
         missing_in_ids = 0
-        if os.path.exists("char_to_discord_name.json") and os.path.exists("discord_user_ids.json"):
-            try:
-                with open("char_to_discord_name.json", "r", encoding="utf-8") as f:
-                    char_map = json.load(f)
-                with open("discord_user_ids.json", "r", encoding="utf-8") as f:
-                    id_map = json.load(f)
-                for char_name, discord_name in char_map.items():
-                    if discord_name.lower().strip() in id_map:
-                        found_pairs += 1
-                    else:
-                        missing_in_ids += 1
-            except Exception:
-                pass
+        char_map, id_map = loaded.get("char_to_discord_name.json"), loaded.get("discord_user_ids.json")
+        if isinstance(char_map, dict) and isinstance(id_map, dict):
+            for char_name, discord_name in char_map.items():
+                if str(discord_name).lower().strip() in id_map:
+                    found_pairs += 1
+                else:
+                    missing_in_ids += 1
 
         summary = (
             "```diff\n"
@@ -66,4 +62,4 @@ class DiagnosztikaCog(commands.Cog):
 
 
 def setup(bot=None, state=None, helpers=None):
-    bot.add_cog(DiagnosztikaCog(bot))
+    bot.add_cog(DiagnosztikaCog(bot, state, helpers))
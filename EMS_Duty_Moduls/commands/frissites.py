@@ -4,7 +4,11 @@ from datetime import timedelta
 import datetime as dtmod
 
 from ..helpers import help_meta, require_admin_channel
-from ..processing import process_duty_message, deduplicate_log, save_log
+from ..processing import process_duty_batch, save_log, resume_point, commit_checkpoint, needs_reparse
+from ..dutyparse import PARSER_VERSION
+from ..ingest import BatchStats, pages
+from ..history import fetch_history_concurrent
+from ..progress import ProgressReporter
 
 class FrissitesCog(commands.Cog):
     def __init__(self, bot, state, helpers):
@@ -20,30 +24,49 @@ class FrissitesCog(commands.Cog):
             return False
 
         after = None
+        # értelmező-váltás után a teljes frissítés az ismert üzeneteket is újraolvassa
+        reparse = full_mode and needs_reparse()
         if not full_mode:
-            after = dtmod.datetime.now(dtmod.timezone.utc) - timedelta(days=40)
-            if self.state.duty_log:
-                try:
-                    latest_ts = max(dtmod.datetime.strptime(l["timestamp"], "%Y-%m-%d %H:%M") for l in self.state.duty_log if "timestamp" in l)
-                    after = latest_ts - timedelta(minutes=120)
-                except Exception:
-                    pass
-
-        new_processed = 0
-        processed_loop = 0
-        async for msg in channel.history(limit=None, after=after):
-            before_len = len(self.state.duty_log)
-            process_duty_message(msg)
-            if len(self.state.duty_log) > before_len:
-                new_processed += 1
-            processed_loop += 1
-            # Throttle to avoid Discord API rate limits
-            if processed_loop % 50 == 0:
-                await asyncio.sleep(0.5)
-        self.state.duty_log[:] = deduplicate_log(self.state.duty_log)
+            # a checkpoint (utolsó tartósan mentett üzenet) utáni üzenetek, egyébként a legutolsó rekordtól
+            after = resume_point(channel.id, fallback_days=40)
+
+        stats = BatchStats()
+        # egyetlen állapotüzenet, legfeljebb PROGRESS_INTERVAL mp-enként szerkesztve
+        progress = ProgressReporter(
+            ctx, "Duty-log frissítés", start=channel if full_mode else after,
+            interval=float(os.getenv("PROGRESS_INTERVAL", "10")),
+        )
+
+        async def handle(page):
+            # egy history-oldal (≤100 üzenet): értelmezés, beillesztés és mentésre sorba állítás egy lépésben
+            stats.add(process_duty_batch(page, reparse=reparse))
+            self.state.CHECKPOINT.advance(channel.id, stats.last_id)
+            await progress.update(stats.seen, stats.last_id)
+
+        if full_mode:
+            # teljes újraépítés: a csatorna élettartama snowflake-ablakokra bontva, párhuzamosan olvasva, ID-sorrendben feldolgozva
+            await fetch_history_concurrent(
+                channel,
+                handle,
+                windows=int(os.getenv("DUTY_REBUILD_WINDOWS", "16")),
+                concurrency=int(os.getenv("DUTY_REBUILD_CONCURRENCY", "4")),
+                pacer=self.state.PACER,
+                per_page=True,
+            )
+        else:
+            # ütemezés history-oldalanként (közös token bucket), nem üzenetenként
+            async for page in pages(self.state.PACER.pace(channel.history(limit=None, after=after))):
+                await handle(page)
+        if full_mode:
+            self.state.CHECKPOINT.set_parser_version(PARSER_VERSION)
+        await commit_checkpoint()
         save_log()
+        await progress.finish("beolvasás kész", only_if_shown=True)
         if ctx:
-            await ctx.send(f"```diff\n+ [OK] Frissítés befejezve. Új: {new_processed} rekord\n```")
+            await ctx.send(
+                f"```diff\n+ [OK] Frissítés befejezve. Új: {stats.new} rekord\n"
+                f"+ Felülírt: {stats.replaced} | kihagyott: {stats.skipped} | hibás: {stats.unparseable}\n```"
+            )
         return True
 
     @commands.command(name="frissites", aliases=["frissítés", "frissités", "Frissítés", "frissites_full", "frissítés_full"])
@@ -52,6 +75,7 @@ class FrissitesCog(commands.Cog):
         category="Diagnosztika és karbantartás",
         usage="!frissites [teljes|full]",
         short="Duty-log frissítése a Discord duty-log csatornából.",
+        slow_ms=600000,  # a teljes újraolvasás percekig tart
     )
     async def frissites(self, ctx, mod: str = None):
         full_mode = (mod or "").lower() in ("teljes", "full")
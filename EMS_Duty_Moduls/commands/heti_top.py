@@ -3,6 +3,8 @@ import datetime as dtmod
 from discord.ext import commands
 from ..helpers import help_meta, require_admin_channel
 from ..helpers import normalize_person_name
+from ..processing import fresh_store, get_store
+from ..timeutil import MINUTES_PER_DAY, minutes_of
 
 DEDIKALT_RANGOK = [x.strip() for x in os.getenv("DEDIKALT_RANGOK", "").split(",") if x.strip()]
 VEZETOSSEG = [x.strip() for x in os.getenv("VEZETOSSEG", "").split(",") if x.strip()]
@@ -21,21 +23,27 @@ class HetiTopCog(commands.Cog):
         h, m = divmod(minutes, 60)
         return f"{h} óra {m} perc"
 
-    def build_weekly_report(self, het_kezdete, het_vege, data):
+    def build_weekly_report(self, het_kezdete, het_vege, data=None):
         ossz_idoperc = {}
         utolso_rang = {}
+        lo, hi = minutes_of(het_kezdete), minutes_of(het_vege)
+        if data is None and lo % MINUTES_PER_DAY == 0 and hi % MINUTES_PER_DAY == 0:
+            # egész napos határok: a napi rollup celláiból (≤ 7 × létszám cella)
+            for name, (perc, pos) in self.state.ROLLUP.totals_by_name(lo // MINUTES_PER_DAY, hi // MINUTES_PER_DAY).items():
+                ossz_idoperc[name] = perc
+                utolso_rang[name] = pos
+            data = ()
+        elif data is None:
+            data = get_store().between(lo, hi)
         for entry in data:
             if "duration" not in entry:
                 continue
-            try:
-                ts = dtmod.datetime.strptime(entry["timestamp"], "%Y-%m-%d %H:%M")
-            except Exception:
+            ts = entry.ts_min
+            if ts is None or not (lo <= ts < hi):
                 continue
-            if not (het_kezdete <= ts < het_vege):
-                continue
-            name = entry.get("name_norm")
-            pos = entry.get("position", "")
-            dur = int(entry.get("duration", 0))
+            name = entry.name_norm
+            pos = entry.position or ""
+            dur = int(entry.duration or 0)
             if not name:
                 continue
             ossz_idoperc[name] = ossz_idoperc.get(name, 0) + dur
@@ -103,12 +111,6 @@ class HetiTopCog(commands.Cog):
         short="Heti toplista előnézetet készít az admin csatornára.",
     )
     async def heti_top(self, ctx, offset: int = 0):
-        JSON_FILE = "duty_log.json"
-        if not os.path.exists(JSON_FILE):
-            await ctx.send(f"```diff\n- [HIBA] A {JSON_FILE} nem található.\n```")
-            return
-        with open(JSON_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
         ma = dtmod.datetime.now()
         napok_vasarnapig = (ma.weekday() + 1) % 7
         het_vege = (ma - dtmod.timedelta(days=napok_vasarnapig)).replace(hour=0, minute=0, second=0, microsecond=0)
@@ -116,7 +118,10 @@ class HetiTopCog(commands.Cog):
         if offset != 0:
             het_kezdete += dtmod.timedelta(days=7*offset)
             het_vege += dtmod.timedelta(days=7*offset)
-        szoveg = self.build_weekly_report(het_kezdete, het_vege, data)
+        with self.state.METRICS.phase(ctx, "load"):
+            await fresh_store()  # a rollup-ág nem a store-on át olvas
+        with self.state.METRICS.phase(ctx, "compute"):
+            szoveg = self.build_weekly_report(het_kezdete, het_vege)
         self.last_weekly_report_text = szoveg
         self.last_weekly_report_author = ctx.author.id
         self.last_weekly_report_timestamp = dtmod.datetime.now()
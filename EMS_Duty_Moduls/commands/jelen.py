@@ -1,8 +1,10 @@
 import os, json, asyncio
-from discord.ext import commands
-from datetime import datetime, timedelta
 import datetime as dtmod
-from ..helpers import help_meta, require_admin_channel
+from discord.ext import commands
+from ..helpers import help_meta, require_admin_channel, budapest_tz
+from ..processing import backfill_duty_messages, get_active
+from ..progress import ProgressReporter
+from ..timeutil import MINUTES_PER_DAY, now_minutes
 
 class JelenCog(commands.Cog):
     def __init__(self, bot, state, helpers):
@@ -17,62 +19,45 @@ class JelenCog(commands.Cog):
     @require_admin_channel()
     @help_meta(
         category="Szolgálati riportok",
-        usage="!jelen",
+        usage="!jelen [frissit]",
         short="Megmutatja, hogy kik vannak jelenleg szolgálatban a legfrissebb adatok alapján.",
+        details="Az élő szolgálati állapotból azonnal válaszol; `!jelen frissit` előbb újraolvassa az utolsó 2 nap duty-log üzeneteit.",
     )
-    async def jelen(self, ctx):
-        DUTY_JSON = "duty_log.json"
-        await ctx.send("🔄 Adatbázis frissítése folyamatban a pontos eredmény elérése végett...")
-
-        # For simplicity: read duty_log.json (assumes it's up-to-date)
-        if not os.path.exists(DUTY_JSON):
-            await ctx.send(f"```diff\n- [HIBA] {DUTY_JSON} fájl nem található.\n```")
-            return
-        with open(DUTY_JSON, "r", encoding="utf-8") as f:
-            entries = json.load(f)
-
-        cutoff = dtmod.datetime.now(dtmod.timezone.utc) - timedelta(days=2)
-        recent_entries = []
-        for e in entries:
-            try:
-                ts = dtmod.datetime.strptime(e.get("timestamp"), "%Y-%m-%d %H:%M")
-                ts = ts.replace(tzinfo=dtmod.timezone.utc)
-                if ts >= cutoff:
-                    recent_entries.append(e)
-            except Exception:
-                continue
+    async def jelen(self, ctx, mod: str = None):
+        if mod and mod.lower() in ("frissit", "frissít", "force"):
+            # kényszerített frissítés: az utolsó 2 nap history-jának újraolvasása
+            await ctx.send("🔄 Adatbázis frissítése folyamatban a pontos eredmény elérése végett...")
+            channel = self.bot.get_channel(int(os.getenv("DUTY_LOG_CHANNEL_ID", "0")))
+            if channel:
+                after = dtmod.datetime.now(dtmod.timezone.utc) - dtmod.timedelta(days=2)
+                progress = ProgressReporter(ctx, "📥 Duty-log frissítés", start=after, interval=float(os.getenv("PROGRESS_INTERVAL", "10")))
+                with self.state.METRICS.phase(ctx, "load"):
+                    processed = await backfill_duty_messages(channel, after=after, progress=progress)
+                await ctx.send(f"✅ Frissítés kész ({processed} üzenet).")
+            else:
+                await ctx.send("⚠️ Duty-log csatorna nem található, frissítés kihagyva.")
 
-        if not recent_entries:
-            await ctx.send("```diff\n- Jelenleg senki sincs szolgálatban!\n```")
-            return
-
-        state_map = {}
-        for e in sorted(recent_entries, key=lambda x: x.get("timestamp", "")):
-            key = e.get("person_key") or e.get("name_norm")
-            if key:
-                state_map[key] = e.get("type")
-
-        active = [e for e in recent_entries if ((e.get("person_key") or e.get("name_norm")) in state_map and state_map[e.get("person_key") or e.get("name_norm")] == "felvette" and e.get("type") == "felvette")]
+        # élő állapot: az utolsó 2 nap (ha azóta nem volt esemény, 5 nap) nyitott felvételei
+        with self.state.METRICS.phase(ctx, "compute"):
+            tracker = get_active()
+            now_min = now_minutes(budapest_tz)
+            cutoff = now_min - 2 * MINUTES_PER_DAY
+            if tracker.latest_min is None or tracker.latest_min < cutoff:
+                cutoff = now_min - 5 * MINUTES_PER_DAY
+            active = tracker.active(since_min=cutoff)
 
         if not active:
             await ctx.send("```diff\n- Jelenleg senki sincs szolgálatban!\n```")
             return
 
-        # Remove duplicates by person_key
-        seen = {}
-        for e in sorted(active, key=lambda x: x.get("timestamp", "")):
-            key = e.get("person_key") or e.get("name_norm")
-            seen[key] = e
-        active = list(seen.values())
-
         lines = [f"Szolgálatban van {len(active)} fő az elmúlt 48 órát figyelembe véve:"]
-        max_name_len = max(len(e.get("name", "")) for e in active)
-        max_rank_len = max(len(e.get("position", "").replace("Mentő - ", "").strip()) for e in active)
+        max_name_len = max(len(e.name or "") for e in active)
+        max_rank_len = max(len((e.position or "").replace("Mentő - ", "").strip()) for e in active)
 
         for e in active:
-            name = e.get("name", "")
-            position = e.get("position", "").replace("Mentő - ", "").strip()
-            start_time = e.get("start_time", e.get("timestamp", ""))
+            name = e.name or ""
+            position = (e.position or "").replace("Mentő - ", "").strip()
+            start_time = e.get("start_time", e.timestamp or "")
             lines.append(f"✅ {name.ljust(max_name_len)} | {position.ljust(max_rank_len)} | {start_time}")
 
         msg = "```\n" + "\n".join(lines) + "\n```"
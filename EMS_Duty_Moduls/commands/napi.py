@@ -2,6 +2,7 @@ import os
 import json
 from discord.ext import commands
 from ..helpers import help_meta, require_admin_channel
+from ..processing import fresh_store
 import datetime as dtmod
 
 class NapiCog(commands.Cog):
@@ -21,16 +22,13 @@ class NapiCog(commands.Cog):
             await ctx.send("Hibás dátumformátum! Használat: `!napi YYYY-MM-DD`")
             return
 
+        with self.state.METRICS.phase(ctx, "load"):
+            records = list((await fresh_store()).between(day_start, day_end, field="end_time"))
         entries = []
-        for r in self.state.duty_log:
-            try:
-                et = dtmod.datetime.strptime(r["end_time"], "%Y-%m-%d %H:%M")
-            except Exception:
-                continue
-            if day_start <= et < day_end:
-                dur = int(r.get("duration", 0))
-                h, m = divmod(dur, 60)
-                entries.append(f"{r.get('name','Ismeretlen')} {r.get('position','')}: {h} óra {m} perc.")
+        with self.state.METRICS.phase(ctx, "compute"):
+            for r in records:
+                h, m = divmod(int(r.duration or 0), 60)
+                entries.append(f"{r.name or 'Ismeretlen'} {r.position or ''}: {h} óra {m} perc.")
 
         if not entries:
             await ctx.send(f"Nincs adat {datum} napra.")
@@ -1,12 +1,14 @@
-import os, json, re
+import re
 from discord.ext import commands
 from ..helpers import help_meta, require_admin_channel
 
 CHAR_TO_DISCORD_NAME_FILE = "char_to_discord_name.json"
 
 class PairCharCog(commands.Cog):
-    def __init__(self, bot):
+    def __init__(self, bot, state, helpers):
         self.bot = bot
+        self.state = state
+        self.helpers = helpers
 
     @commands.command(name="pair_char", aliases=["pair", "charpair", "karakter_osszekotes"])
     @require_admin_channel()
@@ -26,17 +28,13 @@ class PairCharCog(commands.Cog):
         fivem_norm = _norm(fivem_nev)
         discord_norm = _norm(discord_nev)
 
-        if os.path.exists(CHAR_TO_DISCORD_NAME_FILE):
-            with open(CHAR_TO_DISCORD_NAME_FILE, "r", encoding="utf-8") as f:
-                mapping = json.load(f)
-        else:
-            mapping = {}
-
-        previous = mapping.get(fivem_norm)
-        mapping[fivem_norm] = discord_norm
+        def _pair(mapping):
+            previous = mapping.get(fivem_norm)
+            mapping[fivem_norm] = discord_norm
+            return previous
 
-        with open(CHAR_TO_DISCORD_NAME_FILE, "w", encoding="utf-8") as f:
-            json.dump(mapping, f, ensure_ascii=False, indent=2)
+        # olvasás + atomikus mentés a fájl-szálkészletben
+        previous = await self.state.FILES.update(CHAR_TO_DISCORD_NAME_FILE, _pair)
 
         if previous is None:
             msg = f"+ Hozzáadva: {fivem_norm} → {discord_norm}"
@@ -49,4 +47,4 @@ class PairCharCog(commands.Cog):
 
 
 def setup(bot=None, state=None, helpers=None):
-    bot.add_cog(PairCharCog(bot))
+    bot.add_cog(PairCharCog(bot, state, helpers))
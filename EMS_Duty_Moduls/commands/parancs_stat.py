@@ -0,0 +1,74 @@
+from typing import List, Optional
+from discord.ext import commands
+from ..helpers import help_meta, require_admin_channel
+
+class ParancsStatCog(commands.Cog):
+    def __init__(self, bot, state, helpers):
+        self.bot = bot
+        self.state = state
+        self.helpers = helpers
+
+    def _category(self, name: str) -> str:
+        cmd = self.bot.get_command(name) if self.bot is not None else None
+        return getattr(cmd.callback, "help_category", "Egyéb") if cmd is not None else "Egyéb"
+
+    def render(self, parancs: Optional[str] = None) -> List[str]:
+        """A ```diff blokk sorai (összes parancs kategóriánként, vagy egy parancs fázisbontása)."""
+        metrics = self.state.METRICS
+        rows = metrics.summary()
+        window_h = metrics.window * metrics.slice_seconds / 3600
+        if parancs:
+            target = parancs.lstrip("!").lower()
+            rows = [r for r in rows if r["command"].lower() == target]
+            if not rows:
+                return [f"- [INFO] Nincs mérés a(z) !{target} parancsról (utolsó {window_h:g} óra)."]
+            r = rows[0]
+            lines = [f"+ !{r['command']}: {r['runs']} futás, {r['errors']} hiba, {r['calls'] / max(1, r['runs']):.1f} Discord-hívás / futás",
+                     f"  összesen  p50 {r['p50']:>8.0f} ms  p95 {r['p95']:>8.0f} ms  max {r['max']:>8.0f} ms"]
+            for name, p in sorted(r["phases"].items(), key=lambda kv: kv[1]["mean"], reverse=True):
+                lines.append(f"  {name:<9} p50 {p['p50']:>8.0f} ms  p95 {p['p95']:>8.0f} ms  átlag {p['mean']:>8.0f} ms")
+            return lines
+
+        if not rows:
+            return [f"- [INFO] Még nincs parancs-mérés (utolsó {window_h:g} óra)."]
+        by_category = {}
+        for r in rows:
+            by_category.setdefault(self._category(r["command"]), []).append(r)
+        width = max(len(r["command"]) for r in rows) + 1
+        lines = [f"  Parancs-késleltetés, utolsó {window_h:g} óra (lassú: {metrics.slow_ms:.0f} ms felett)",
+                 f"  {'parancs':<{width}} {'db':>5} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'hívás':>6}"]
+        for category, items in by_category.items():
+            lines.append(f"  [{category}]")
+            for r in items:
+                mark = "-" if r["p95"] >= metrics.slow_ms or r["errors"] else "+"
+                lines.append(f"{mark} {'!' + r['command']:<{width}} {r['runs']:>5} {r['p50']:>8.0f} {r['p95']:>8.0f} {r['max']:>8.0f} {r['calls'] / max(1, r['runs']):>6.1f}")
+        loopmon = getattr(self.state, "LOOPMON", None)
+        if loopmon is not None and loopmon.lag.n:
+            lines.append(f"{'-' if loopmon.stalls else '+'} Event loop: {loopmon.stats()}")
+            for spot, count in loopmon.hotspots.most_common(3):
+                lines.append(f"-   {count}× {spot}")
+        return lines
+
+    @commands.command(name="parancs_stat", aliases=["parancsstat", "cmdstat"])
+    @require_admin_channel()
+    @help_meta(
+        category="Diagnosztika és karbantartás",
+        usage="!parancs_stat [parancs]",
+        short="Parancsonkénti válaszidők (p50 / p95 / max) az elmúlt időszakból.",
+        details="Paraméter nélkül az összes parancs táblázata kategóriánként; egy parancsnévvel annak fázisbontása (load / compute / send / egyéb).",
+        examples=["!parancs_stat", "!parancs_stat heti_top"],
+    )
+    async def parancs_stat(self, ctx, parancs: Optional[str] = None):
+        # soronként, 2000 karakter alatti ```diff blokkokban
+        lines = self.render(parancs)
+        chunk = []
+        for line in lines:
+            if chunk and sum(len(x) + 1 for x in chunk) + len(line) > 1900:
+                await ctx.send("```diff\n" + "\n".join(chunk) + "\n```")
+                chunk = []
+            chunk.append(line)
+        await ctx.send("```diff\n" + "\n".join(chunk) + "\n```")
+
+
+def setup(bot=None, state=None, helpers=None):
+    bot.add_cog(ParancsStatCog(bot, state, helpers))
@@ -1,11 +1,13 @@
-import os, json
-import asyncio
+import os
 from discord.ext import commands
 from ..helpers import help_meta
+from ..ingest import pages
+from ..progress import ProgressReporter
 
 class SniffDutyCog(commands.Cog):
     def __init__(self, bot, state, helpers):
         self.bot = bot
+        self.state = state
 
     @commands.command(name="sniff_duty")
     @commands.has_permissions(administrator=True)
@@ -24,22 +26,25 @@ class SniffDutyCog(commands.Cog):
             return
 
         entries = []
-        async for msg in channel.history(limit=limit):
-            entries.append({
-                "id": msg.id,
-                "author": str(msg.author),
-                "content": msg.content,
-                "embeds": [e.to_dict() for e in msg.embeds],
-                "created_at": msg.created_at.isoformat(),
-            })
-            # small throttle
-            await asyncio.sleep(0.05)
+        progress = ProgressReporter(ctx, "Sniff", total=limit, interval=float(os.getenv("PROGRESS_INTERVAL", "10")))
+        # ütemezés history-oldalanként a közös pacerrel (mint a frissites), nem üzenetenként
+        async for page in pages(self.state.PACER.pace(channel.history(limit=limit))):
+            for msg in page:
+                entries.append({
+                    "id": msg.id,
+                    "author": str(msg.author),
+                    "content": msg.content,
+                    "embeds": [e.to_dict() for e in msg.embeds],
+                    "created_at": msg.created_at.isoformat(),
+                })
+            await progress.update(len(entries))
+
+        await progress.finish("letöltés kész", only_if_shown=True)
 
         # Save to files
         if raw:
             os.makedirs("exports", exist_ok=True)
-            with open("exports/sniff_duty.json", "w", encoding="utf-8") as f:
-                json.dump(entries, f, ensure_ascii=False, indent=2)
+            await self.state.FILES.write("exports/sniff_duty.json", entries, cache=False)
 
         if show:
             for e in entries:
@@ -2,6 +2,8 @@ import json
 import datetime as dtmod
 from discord.ext import commands
 from ..helpers import help_meta, require_admin_channel
+from ..processing import fresh_store
+from ..timeutil import format_minutes
 
 class SzemelyCog(commands.Cog):
     def __init__(self, bot, state, helpers):
@@ -18,20 +20,18 @@ class SzemelyCog(commands.Cog):
     )
     async def szemely(self, ctx, *, nev: str):
         target = self.helpers.normalize_person_name(nev)
-        matches = [r for r in self.state.duty_log if r.get("name_norm") == target]
+        with self.state.METRICS.phase(ctx, "load"):
+            matches = (await fresh_store()).for_person(name_norm=target)
         if not matches:
             await ctx.send(f"```diff\n- [INFO] Nincs adat {nev} nevű személyről.\n```")
             return
         lines = []
-        for r in matches:
-            try:
-                st = dtmod.datetime.strptime(r["start_time"], "%Y-%m-%d %H:%M")
-                et = dtmod.datetime.strptime(r["end_time"], "%Y-%m-%d %H:%M")
-            except Exception:
-                continue
-            dur = int(r.get("duration", 0))
-            h, m = divmod(dur, 60)
-            lines.append(f"{st:%Y-%m-%d %H:%M} - {et:%Y-%m-%d %H:%M}  {h} óra {m} perc")
+        with self.state.METRICS.phase(ctx, "compute"):
+            for r in matches:
+                if r.start_min is None or r.end_min is None:
+                    continue
+                h, m = divmod(int(r.duration or 0), 60)
+                lines.append(f"{format_minutes(r.start_min)} - {format_minutes(r.end_min)}  {h} óra {m} perc")
         intro = f"🧾 Egy pillanat, összegzem {nev} beosztásait..."
         await ctx.send(intro + "\n```diff\n- [INFO] Feldolgozás indítása...\n```")
         await ctx.send("\n".join(lines))
@@ -1,4 +1,4 @@
-import os, json
+import os
 import asyncio
 from discord.ext import commands
 from ..helpers import help_meta, require_admin_channel
@@ -21,16 +21,14 @@ class TesztJelenCog(commands.Cog):
         TEST_FILE = os.getenv("TEST_MODE_FILE", "hamis_duty_log.json")
         LIMIT = int(os.getenv("TEST_MODE_RECORD_LIMIT", "10"))
 
-        if not os.path.exists(TEST_FILE):
-            await ctx.send(f"```diff\n- [TESZT HIBA] Teszt fájl nem található: {TEST_FILE}\n```")
-            return
-
         try:
-            with open(TEST_FILE, "r", encoding="utf-8") as f:
-                entries = json.load(f)
+            entries = await self.state.FILES.read(TEST_FILE)
         except Exception as e:
             await ctx.send(f"```diff\n- [TESZT HIBA] JSON olvasási hiba: {e}\n```")
             return
+        if entries is None:
+            await ctx.send(f"```diff\n- [TESZT HIBA] Teszt fájl nem található: {TEST_FILE}\n```")
+            return
 
         entries = entries[-LIMIT:]
 
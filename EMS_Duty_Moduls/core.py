@@ -7,7 +7,13 @@ from discord.ext import commands
 
 from . import state
 from . import helpers
+from . import processing
+from .processing import load_log
+from .persister import WriteBehindPersister
+from .store import open_store
 from .hotloader import watch_and_reload
+from .pacing import install_rate_limit_tap
+from .metrics import install_command_metrics
 
 ROOT = state.ROOT
 LOG_DIR = state.LOG_DIR
@@ -27,9 +33,28 @@ ADMIN_CHANNEL_ID = int(os.getenv("ADMIN_CHANNEL_ID", "0"))
 DUTY_LOG_CHANNEL_ID = int(os.getenv("DUTY_LOG_CHANNEL_ID", "0"))
 
 # Create bot
+class DutyBot(commands.Bot):
+    async def close(self):
+        # clean shutdown: pending duty_log records are flushed before disconnect
+        state.LOOPMON.stop()
+        if state.PERSISTER is not None:
+            try:
+                await state.PERSISTER.close()
+            except Exception as e:
+                logger.exception(f"duty_log flush leállításkor sikertelen: {e}")
+        try:
+            state.ROLLUP.save()
+            state.CHECKPOINT.save()
+            state.METRICS.save()
+        except Exception as e:
+            logger.exception(f"Rollup / checkpoint mentése leállításkor sikertelen: {e}")
+        state.FILES.close()
+        await super().close()
+
+
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = DutyBot(command_prefix="!", intents=intents)
 
 # Setup shared state
 state.BOT = bot
@@ -40,6 +65,32 @@ try:
 except Exception:
     state.EMS_PEOPLE = {}
 
+# Load duty_log (snapshot + journal) into the bot's repository (state.REPO)
+try:
+    logger.info(f"duty_log betöltve: {load_log()} rekord")
+except Exception as e:
+    logger.exception(f"duty_log betöltése sikertelen: {e}")
+
+# Query backend behind state.REPO: DUTY_STORE=sqlite → indexed sqlite3 mirror, default: in-memory duty_log
+state.STORE = open_store(os.getenv("DUTY_STORE"), lambda: state.duty_log, ROOT / "duty_log.sqlite3", stamp=processing.JOURNAL.stamp)
+
+state.PERSISTER = WriteBehindPersister(
+    processing.JOURNAL,
+    lambda: state.duty_log,
+    interval=float(os.getenv("DUTY_FLUSH_INTERVAL", "5")),
+    batch_size=int(os.getenv("DUTY_FLUSH_BATCH", "500")),
+    sinks=[state.STORE],
+    checkpoint=state.CHECKPOINT,
+)
+
+# discord.py 429 warnings (retry_after) slow down the shared history pacer
+install_rate_limit_tap(state.PACER)
+
+# parancsonkénti késleltetés (!parancs_stat), command_metrics.json
+state.METRICS.path = Path("command_metrics.json")
+state.METRICS.load()
+install_command_metrics(bot, state.METRICS)
+
 # Dynamic command loader
 
 def load_command_modules():
@@ -79,6 +130,10 @@ async def hotloader_task(interval: int = 5):
 @bot.event
 async def setup_hook():
     logger.info("Setting up modular bot...")
+    # Start write-behind duty_log persister
+    state.PERSISTER.start()
+    # event loop késés-figyelő (blokkoló hívások helye a logban)
+    state.LOOPMON.start()
     # Start hotloader
     asyncio.create_task(hotloader_task())
 
@@ -87,6 +142,28 @@ async def setup_hook():
 @bot.event
 async def on_ready():
     logger.info(f"Bot ready — user: {bot.user}")
+    if processing.needs_reparse():
+        logger.warning("A duty-kártya értelmező verziója változott – a meglévő rekordokat a `!frissites teljes` dolgozza fel újra")
+    # a leállás / újracsatlakozás alatt kimaradt duty-log üzenetek pótlása a checkpointtól
+    channel = bot.get_channel(DUTY_LOG_CHANNEL_ID)
+    if channel is None:
+        return
+    try:
+        caught_up = await processing.backfill_duty_messages(channel, after=processing.resume_point(channel.id))
+        logger.info(f"Duty-log pótlás kész: {caught_up} üzenet")
+    except discord.DiscordException as e:
+        logger.warning(f"Duty-log pótlás sikertelen: {e}")
+
+
+# Live ingestion: duty-log embeds are stored as they arrive from the gateway
+@bot.event
+async def on_message(message):
+    if message.channel.id == DUTY_LOG_CHANNEL_ID:
+        try:
+            processing.ingest_message(message)
+        except Exception as e:
+            logger.exception(f"[LIVE] Duty-log üzenet feldolgozása sikertelen ({message.id}): {e}")
+    await bot.process_commands(message)
 
 
 def run():
@@ -0,0 +1,185 @@
+from bisect import bisect_left, insort
+from typing import Iterable, Iterator, List, Optional
+
+from .records import DutyRecord, as_record
+from .store import record_key
+
+_NO_TIME = float("-inf")  # időpont nélküli (régi) rekordok a sor elejére kerülnek
+_SEQ_MAX = float("inf")
+
+
+def _insert(index: list, sortkey):
+    # időrendben érkező rekordok (history scan) a végére kerülnek, keresés nélkül
+    if not index or sortkey > index[-1]:
+        index.append(sortkey)
+    else:
+        insort(index, sortkey)
+
+
+def _discard(index: list, sortkey):
+    idx = bisect_left(index, sortkey)
+    if idx < len(index) and index[idx] == sortkey:
+        del index[idx]
+
+
+class DutyLog:
+    """Deduplicated, time-ordered duty_log container.
+
+    Keeps a message_id → record hash index (O(1) membership / lookup) and a
+    sorted (timestamp, seq) order list maintained with bisect, so
+    insert-or-replace costs one hash lookup plus O(log n) search; records that
+    arrive in time order (the usual case for history scans) are appended at the
+    tail. Iteration is always in timestamp order, like the old sorted list.
+    Incoming dicts are stored as compact DutyRecord objects.
+
+    A second sorted index over end_time lets `range()` answer [start, end)
+    windows on either field with two binary searches, touching only the
+    records inside the window. Per-person indexes (name_norm, person_key →
+    that person's sort keys, time-ordered) back `for_person()`.
+
+    Derived views (rollups, active-duty state, …) subscribe via `listeners`:
+    objects with on_upsert(rec, old), on_remove(rec) and on_clear().
+    """
+
+    def __init__(self, records: Iterable[dict] = ()):
+        self._by_key = {}   # record_key → (seq, rec)
+        self._order = []    # (ts_min, seq, key), időrendben – ez egyben a bejárási sorrend
+        self._by_end = []   # (end_min, seq, key) a leadta rekordokra
+        self._by_name = {}  # name_norm → [(ts_min, seq, key), ...]
+        self._by_pkey = {}  # person_key → [(ts_min, seq, key), ...]
+        self._seq = 0
+        self.listeners = []
+        self.extend(records)
+
+    # ---------------- írás ----------------
+
+    def upsert(self, rec) -> Optional[DutyRecord]:
+        """Insert or replace by message_id; returns the replaced record (or None)."""
+        rec = as_record(rec)
+        key = record_key(rec)
+        old = self._by_key.get(key)
+        if old is not None:
+            self._unindex(key, *old)
+        self._seq += 1
+        seq = self._seq
+        ts = rec.ts_min
+        sortkey = (ts if ts is not None else _NO_TIME, seq, key)
+        _insert(self._order, sortkey)
+        if rec.end_min is not None:
+            _insert(self._by_end, (rec.end_min, seq, key))
+        if rec.name_norm is not None:
+            _insert(self._by_name.setdefault(rec.name_norm, []), sortkey)
+        if rec.person_key is not None:
+            _insert(self._by_pkey.setdefault(rec.person_key, []), sortkey)
+        self._by_key[key] = (seq, rec)
+        old_rec = old[1] if old is not None else None
+        for listener in self.listeners:
+            listener.on_upsert(rec, old_rec)
+        return old_rec
+
+    # régi list-API kompatibilitás
+    append = upsert
+
+    def extend(self, records: Iterable[dict]):
+        for rec in records:
+            self.upsert(rec)
+
+    def upsert_many(self, records: Iterable[dict]) -> int:
+        """Egy köteg (pl. egy history-oldal) beillesztése; visszaadja a felülírt rekordok számát."""
+        upsert = self.upsert
+        return sum(1 for rec in records if upsert(rec) is not None)
+
+    def remove(self, message_id) -> Optional[DutyRecord]:
+        old = self._by_key.pop(message_id, None)
+        if old is None:
+            return None
+        self._unindex(message_id, *old)
+        for listener in self.listeners:
+            listener.on_remove(old[1])
+        return old[1]
+
+    def _unindex(self, key, seq, rec):
+        ts = rec.ts_min
+        sortkey = (ts if ts is not None else _NO_TIME, seq, key)
+        _discard(self._order, sortkey)
+        if rec.end_min is not None:
+            _discard(self._by_end, (rec.end_min, seq, key))
+        for index, value in ((self._by_name, rec.name_norm), (self._by_pkey, rec.person_key)):
+            bucket = index.get(value)
+            if bucket is not None:
+                _discard(bucket, sortkey)
+                if not bucket:
+                    del index[value]
+
+    def clear(self):
+        self._by_key.clear()
+        self._order.clear()
+        self._by_end.clear()
+        self._by_name.clear()
+        self._by_pkey.clear()
+        for listener in self.listeners:
+            listener.on_clear()
+
+    def replace_all(self, records: Iterable[dict]):
+        self.clear()
+        self.extend(records)
+
+    # ---------------- olvasás ----------------
+
+    def __contains__(self, message_id) -> bool:
+        return message_id in self._by_key
+
+    def get(self, message_id, default=None):
+        hit = self._by_key.get(message_id)
+        return hit[1] if hit is not None else default
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __bool__(self) -> bool:
+        return bool(self._order)
+
+    def __iter__(self) -> Iterator[DutyRecord]:
+        by_key = self._by_key
+        for sortkey in self._order:
+            yield by_key[sortkey[2]][1]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._by_key[sk[2]][1] for sk in self._order[idx]]
+        return self._by_key[self._order[idx][2]][1]
+
+    def __setitem__(self, idx, records):
+        # `duty_log[:] = ...` – a régi kód teljes cseréje
+        if not isinstance(idx, slice) or idx != slice(None):
+            raise TypeError("DutyLog only supports full-slice assignment (duty_log[:] = records)")
+        self.replace_all(list(records))
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None, field: str = "timestamp", include_end: bool = False) -> List[DutyRecord]:
+        """Records with `field` (timestamp / end_time) in [start, end) – or [start, end] – as wall-clock minutes, time-ordered."""
+        if field == "timestamp":
+            index = self._order
+        elif field == "end_time":
+            index = self._by_end
+        else:
+            raise ValueError(f"Nincs időindex ehhez a mezőhöz: {field}")
+        # az időpont nélküli rekordok (_NO_TIME) sosem esnek ablakba
+        lo = bisect_left(index, (start,)) if start is not None else bisect_left(index, (_NO_TIME, _SEQ_MAX))
+        if end is None:
+            hi = len(index)
+        else:
+            hi = bisect_left(index, (end + 1,) if include_end else (end,))
+        by_key = self._by_key
+        return [by_key[sk[2]][1] for sk in index[lo:hi]]
+
+    def for_person(self, name_norm: Optional[str] = None, person_key: Optional[str] = None) -> List[DutyRecord]:
+        """One person's records, time-ordered (person_key takes precedence over name_norm)."""
+        if person_key is not None:
+            bucket = self._by_pkey.get(person_key, ())
+        else:
+            bucket = self._by_name.get(name_norm, ())
+        by_key = self._by_key
+        return [by_key[sk[2]][1] for sk in bucket]
+
+    def __repr__(self) -> str:
+        return f"<DutyLog {len(self)} records>"
@@ -0,0 +1,129 @@
+import re
+import datetime as dtmod
+from typing import Optional
+
+import pytz
+
+# Duty-log embed értelmező (közös: monolit + moduláris bot)
+#
+# A két bot eddig külön-külön, soronként bontotta a kártyákat: több
+# title.split("("), soronkénti ciklus, és minden leírás-sorra egy le nem
+# fordított re.search. Itt egy sablontábla van előre fordított mintákkal: a cím
+# egy kereséssel adja a nevet, a FiveM-nevet és a típust, a leírásból a
+# beosztás és a szolgálati idő egy-egy keresés. A nem duty-kártyák már az első
+# olcsó részstring-ellenőrzésen kiesnek.
+#
+# PARSER_VERSION: ha a sablon vagy a rekord előállítása változik, növelni kell;
+# a checkpointban tárolt verziótól eltérve a teljes frissítés újraolvas.
+
+PARSER_VERSION = 3  # 2: közös értelmező, a created_at mindig Europe/Budapest falióra; 3: zárójeles FiveM-név
+
+budapest_tz = pytz.timezone("Europe/Budapest")
+TIME_FMT = "%Y-%m-%d %H:%M"
+_UTC = dtmod.timezone.utc
+_OFFSETS = {}  # UTC óra (epoch óta) → budapesti eltolás
+DUTY_MARKER = "a szolgálatot"  # gyors elutasítás: minden duty-kártya címében benne van
+
+# típus → cím-minta ("**Név (FiveM) felvette a szolgálatot**"); a FiveM-név az utolsó ")"-ig tart,
+# így maga is tartalmazhat zárójelet ("**Név (Bob (2)) leadta a szolgálatot**")
+TITLE_TEMPLATES = tuple(
+    (kind, re.compile(r"^(?P<name>[^(]*)\((?P<fivem>.*)\).*?" + kind + r" a szolgálatot", re.IGNORECASE | re.DOTALL))
+    for kind in ("felvette", "leadta")
+)
+# a beosztás az utolsó "Mentő…" sor, az idő az utolsó "szolgálatban töltött idő: N perc"
+POSITION_RE = re.compile(r"^[^\S\n]*(Mentő[^\n]*?)[^\S\n]*$", re.MULTILINE)
+DURATION_RE = re.compile(r"szolgálatban töltött idő[^\S\n]*[:\-]?[^\S\n]*(\d+)[^\S\n]*perc", re.IGNORECASE)
+
+
+def normalize_person_name(name: str) -> str:
+    return " ".join((name or "").split()).lower()
+
+
+def make_person_key(name_norm: str, fivem_name: str) -> str:
+    """Stabil személyazonosító létrehozása név + FiveM-név alapján."""
+    nn = (name_norm or "").strip().lower()
+    fv = (fivem_name or "").strip().lower()
+    return f"{nn}|{fv}"
+
+
+def is_duty_title(title: str) -> bool:
+    return DUTY_MARKER in (title or "").lower()
+
+
+def _last(pattern, text: str):
+    match = None
+    for match in pattern.finditer(text):
+        pass
+    return match
+
+
+def _wall_clock(created_at) -> dtmod.datetime:
+    """Discord created_at (tz-aware) → datetime, amelynek mezői a budapesti falióra; a naiv időpontot helyinek vesszük.
+    A pytz-átváltás drága: az eltolás UTC-óránként gyorsítótárazva (a nyári idő váltása egész órakor van)."""
+    if created_at is None:
+        return dtmod.datetime.now(budapest_tz)
+    if created_at.tzinfo is None:
+        return created_at
+    hour = int(created_at.timestamp()) // 3600
+    offset = _OFFSETS.get(hour)
+    if offset is None:
+        offset = _OFFSETS[hour] = created_at.astimezone(budapest_tz).utcoffset()
+    return created_at.astimezone(_UTC) + offset
+
+
+def _format(when) -> str:
+    # = when.strftime(TIME_FMT), strftime nélkül
+    return f"{when.year:04d}-{when.month:02d}-{when.day:02d} {when.hour:02d}:{when.minute:02d}"
+
+
+def parse_duty_embed(title: str, description: str, created_at, message_id) -> Optional[dict]:
+    """Egy duty-log kártya (cím, leírás, létrehozás ideje, ID) → rekord; None, ha nem duty-kártya."""
+    title = (title or "").strip()
+    if DUTY_MARKER not in title.lower():
+        return None
+    for kind, pattern in TITLE_TEMPLATES:
+        match = pattern.search(title)
+        if match is not None:
+            break
+    else:
+        return None
+
+    name_part = match.group("name").replace("**", "").strip()
+    fivem_part = match.group("fivem").strip()
+    description = description or ""
+    found = _last(POSITION_RE, description)
+    position = found.group(1) if found else ""
+    name_norm = normalize_person_name(name_part)
+    person_key = make_person_key(name_norm, fivem_part)
+    when = _wall_clock(created_at)
+
+    if kind == "felvette":
+        start_time = _format(when)
+        return {
+            "message_id": message_id,
+            "name": name_part,
+            "name_norm": name_norm,
+            "fivem_name": fivem_part,
+            "person_key": person_key,
+            "position": position,
+            "start_time": start_time,
+            "timestamp": start_time,
+            "type": "felvette",
+        }
+
+    found = _last(DURATION_RE, description)
+    duration = int(found.group(1)) if found else 0
+    end_time = _format(when)
+    return {
+        "message_id": message_id,
+        "name": name_part,
+        "name_norm": name_norm,
+        "fivem_name": fivem_part,
+        "person_key": person_key,
+        "position": position,
+        "duration": duration,
+        "start_time": _format(when - dtmod.timedelta(minutes=duration)),
+        "end_time": end_time,
+        "timestamp": end_time,
+        "type": "leadta",
+    }
@@ -0,0 +1,194 @@
+import asyncio, bisect, logging, random, time
+import datetime as dtmod
+from typing import Iterable, List, Optional
+
+from .history import DISCORD_EPOCH_MS, snowflake_at
+from .offline import read_dump
+from .synthetic import BUDAPEST, duty_card, generate_duty_log, salary_card
+
+# Helyi Discord-csatorna a beolvasási utak méréséhez (élő guild nélkül)
+#
+# A FakeChannel a discord.py TextChannel.history() viselkedését követi:
+# after / before (datetime vagy .id-s objektum), limit, oldest_first (alapból
+# after megadásakor növekvő, egyébként csökkenő sorrend), 100 üzenetes oldalak.
+# Oldalanként beállítható késleltetés, és minden N. oldalkérésre 429: ilyenkor
+# a discord.py-hoz hasonlóan a "discord.http" loggerre figyelmeztet, majd
+# retry_after ideig vár (a pacing.RateLimitTap így ugyanúgy látja, mint élesben).
+# A korpusz szintetikus (synthetic_messages: a synthetic.py rekordjai kártyaként)
+# vagy felvett dump (messages_from_dumps).
+
+HISTORY_PAGE = 100
+RATE_LIMIT_LOG = "We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds."
+http_log = logging.getLogger("discord.http")
+
+
+def _snowflake(value) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, dtmod.datetime):
+        return snowflake_at(value)
+    return int(getattr(value, "id", value))
+
+
+class FakeAuthor:
+    def __init__(self, id: int, name: str, bot: bool = False):
+        self.id = id
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeEmbed:
+    def __init__(self, title: Optional[str] = None, description: Optional[str] = None):
+        self.title = title
+        self.description = description
+
+    def to_dict(self) -> dict:
+        return {k: v for k, v in (("title", self.title), ("description", self.description)) if v is not None}
+
+
+class FakeMessage:
+    """discord.Message stand-in: id, created_at (from the snowflake), author, content, embeds."""
+
+    __slots__ = ("id", "author", "content", "embeds", "mentions", "channel")
+
+    def __init__(self, id: int, embeds=(), author=None, content: str = "", channel=None):
+        self.id = id
+        self.author = author
+        self.content = content
+        self.embeds = list(embeds)
+        self.mentions = []
+        self.channel = channel
+
+    @property
+    def created_at(self) -> dtmod.datetime:
+        ms = (self.id >> 22) + DISCORD_EPOCH_MS
+        return dtmod.datetime.fromtimestamp(ms / 1000, tz=dtmod.timezone.utc)
+
+    async def edit(self, content=None, **kwargs):
+        self.content = content
+
+
+class FakeChannel:
+    """In-process text channel over a message corpus, with page latency and injected 429s."""
+
+    def __init__(self, messages: Iterable[FakeMessage] = (), id: int = 1, name: str = "duty-log",
+                 page_latency: float = 0.0, jitter: float = 0.0, rate_limit_every: int = 0,
+                 retry_after: float = 1.0, seed: int = 0):
+        self.id = id
+        self.name = name
+        self.page_latency = page_latency
+        self.jitter = jitter
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self.messages: List[FakeMessage] = []
+        self._ids: List[int] = []
+        self.sent: List[FakeMessage] = []
+        # mérés
+        self.page_requests = 0
+        self.served = 0  # kiadott üzenetek
+        self.rate_limits = 0
+        self.page_times: List[float] = []
+        self.extend(messages)
+
+    def extend(self, messages: Iterable[FakeMessage]):
+        for msg in messages:
+            msg.channel = self
+            self.messages.append(msg)
+        self.messages.sort(key=lambda m: m.id)
+        self._ids = [m.id for m in self.messages]
+
+    async def send(self, content=None, **kwargs):
+        # ctx.send / channel.send: a válaszok itt gyűlnek (ProgressReporter szerkeszti őket)
+        msg = FakeMessage(snowflake_at(dtmod.datetime.now(dtmod.timezone.utc)), content=content or "", channel=self)
+        self.sent.append(msg)
+        return msg
+
+    async def _page(self):
+        started = time.perf_counter()
+        self.page_requests += 1
+        if self.rate_limit_every and self.page_requests % self.rate_limit_every == 0:
+            self.rate_limits += 1
+            http_log.warning(RATE_LIMIT_LOG, "GET", f"/channels/{self.id}/messages", self.retry_after)
+            await asyncio.sleep(self.retry_after)
+        delay = self.page_latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        await asyncio.sleep(delay)
+        self.page_times.append(time.perf_counter() - started)
+
+    async def history(self, limit: Optional[int] = 100, before=None, after=None, oldest_first: Optional[bool] = None):
+        lo, hi = _snowflake(after), _snowflake(before)
+        start = bisect.bisect_right(self._ids, lo) if lo is not None else 0
+        end = bisect.bisect_left(self._ids, hi) if hi is not None else len(self._ids)
+        rows = self.messages[start:end]
+        if oldest_first is None:
+            oldest_first = after is not None
+        if not oldest_first:
+            rows = rows[::-1]
+        if limit is not None:
+            rows = rows[:limit]
+        for i in range(0, len(rows), HISTORY_PAGE):
+            await self._page()
+            for msg in rows[i:i + HISTORY_PAGE]:
+                self.served += 1
+                yield msg
+
+    def stats(self) -> dict:
+        times = sorted(self.page_times)
+        pick = (lambda q: times[min(len(times) - 1, int(q * len(times)))] * 1000) if times else (lambda q: 0.0)
+        return {"messages": self.served, "pages": self.page_requests, "rate_limits": self.rate_limits, "page_p50_ms": pick(0.5), "page_p95_ms": pick(0.95)}
+
+
+class FakeContext:
+    """commands.Context stand-in: the command's replies end up in `channel.sent`."""
+
+    def __init__(self, channel: FakeChannel, author=None):
+        self.channel = channel
+        self.author = author or FakeAuthor(1, "admin")
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+class FakeBot:
+    def __init__(self, *channels: FakeChannel):
+        self.channels = {ch.id: ch for ch in channels}
+
+    def get_channel(self, channel_id):
+        return self.channels.get(int(channel_id))
+
+
+# ---------------- korpuszok ----------------
+
+DUTY_BOT = FakeAuthor(1349829505149309010, "NW duty#0000", bot=True)
+
+
+def synthetic_messages(count: int, start: Optional[dtmod.datetime] = None, people: int = 30, seed: int = 0) -> List[FakeMessage]:
+    """`count` üzenet időrendben, `start`-tól: a synthetic.generate_duty_log rekordjai duty-kártyaként, köztük ~10% fizetés-kártya."""
+    rng = random.Random(seed)
+    start = start or dtmod.datetime(2025, 1, 1, tzinfo=dtmod.timezone.utc)
+    local_start = start.astimezone(BUDAPEST).replace(tzinfo=None)
+    records = generate_duty_log(2 * count + 10, people=people, seed=seed, start=local_start)  # bőven: a vége levágva
+    messages = []
+    for rec in records:
+        if rng.random() < 0.1:
+            # fizetés-kártya a műszak elején / végén, ugyanabban a percben (saját alsó-bit tartomány)
+            offset = rng.randint(1, 59_000) << 22
+            messages.append(FakeMessage(((rec["message_id"] >> 22 << 22) + offset) | 0x200000 | len(messages) & 0x1FFFFF,
+                                        [FakeEmbed(*salary_card(rec))], author=DUTY_BOT))
+        messages.append(FakeMessage(rec["message_id"], [FakeEmbed(*duty_card(rec))], author=DUTY_BOT))
+    messages.sort(key=lambda m: m.id)
+    return messages[:count]
+
+
+def messages_from_dumps(paths: Iterable) -> List[FakeMessage]:
+    """Felvett korpusz: sniff-dumpok / raw_sniff.log üzenetei (offline.read_dump), ID szerint egyedi."""
+    seen = {}
+    for path in paths:
+        for mid, title, description, _when in read_dump(path):
+            if mid is not None and mid not in seen:
+                seen[int(mid)] = FakeMessage(int(mid), [FakeEmbed(title, description)], author=DUTY_BOT)
+    return list(seen.values())
@@ -0,0 +1,114 @@
+import os, copy, json, asyncio, logging, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger("EMS_DUTY_CORE")
+
+# JSON fájlok aszinkron elérése (char_to_discord_name.json, discord_user_ids.json, ...)
+#
+# A parancsok eddig közvetlenül a loopon nyitották meg és parse-olták a
+# JSON fájlokat (open + json.load / json.dump); NAS-on ez a gateway
+# heartbeatet is késleltetheti. A JsonFileStore:
+#   - olvasás / írás egy korlátos szálkészletben (FILE_IO_WORKERS, alapból 2),
+#   - írás atomikusan: ideiglenes fájl + fsync + os.replace,
+#   - a parse-olt tartalom (mtime, méret) szerint gyorsítótárazva: amíg a fájl
+#     nem változik, az olvasás csak egy stat() a worker szálon,
+#   - update(): olvasás-módosítás-írás fájlonként sorba állítva (asyncio.Lock).
+# A read() a gyorsítótárazott objektumot adja vissza – csak olvasásra; módosítani
+# az update()-tel kell.
+
+
+class JsonFileStore:
+    """Async JSON reads / atomic writes in a bounded thread pool with an mtime-validated parse cache."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = int(max_workers or os.getenv("FILE_IO_WORKERS", "2"))
+        self._pool = None
+        self._cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}  # abs path → ((mtime_ns, méret), tartalom)
+        self._cache_lock = threading.Lock()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="json-io")
+        return self._pool
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor(), fn, *args)
+
+    # ---------------- worker szálon ----------------
+
+    def _read_sync(self, key: str, default):
+        try:
+            st = os.stat(key)
+        except FileNotFoundError:
+            with self._cache_lock:
+                self._cache.pop(key, None)
+            return default
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == stamp:
+                self.hits += 1
+                return cached[1]
+        with open(key, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with self._cache_lock:
+            self.misses += 1
+            self._cache[key] = (stamp, data)
+        return data
+
+    def _write_sync(self, key: str, data, indent: Optional[int], cache: bool = True):
+        tmp = key + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, key)
+        st = os.stat(key)
+        with self._cache_lock:
+            self.writes += 1
+            if cache:
+                self._cache[key] = ((st.st_mtime_ns, st.st_size), data)
+            else:
+                self._cache.pop(key, None)
+
+    # ---------------- async API ----------------
+
+    async def read(self, path, default=None):
+        """A fájl parse-olt tartalma (csak olvasásra), vagy `default`, ha nem létezik; hibás JSON-ra ValueError."""
+        return await self._run(self._read_sync, os.path.abspath(path), default)
+
+    async def write(self, path, data, indent: Optional[int] = 2, cache: bool = True):
+        """Atomikus mentés (tmp + os.replace); a tárolt objektum a gyorsítótárba kerül, utána ne módosítsuk.
+        `cache=False`: egyszeri exportokhoz, a (nagy) tartalom nem marad a memóriában."""
+        await self._run(self._write_sync, os.path.abspath(path), data, indent, cache)
+
+    async def update(self, path, fn: Callable[[Any], Any], default: Callable[[], Any] = dict, indent: Optional[int] = 2):
+        """Olvasás → fn(másolat) → atomikus írás, fájlonként sorba állítva; fn visszatérési értékét adja."""
+        key = os.path.abspath(path)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            current = await self._run(self._read_sync, key, None)
+            data = copy.deepcopy(current) if current is not None else default()
+            result = fn(data)
+            await self._run(self._write_sync, key, data, indent)
+            return result
+
+    def invalidate(self, path=None):
+        with self._cache_lock:
+            if path is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(os.path.abspath(path), None)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def stats(self) -> str:
+        return f"{self.hits} cache-találat, {self.misses} beolvasás, {self.writes} írás ({self.max_workers} szál)"
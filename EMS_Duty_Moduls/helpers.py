@@ -8,15 +8,20 @@ from . import state
 
 logger = logging.getLogger("EMS_DUTY_CORE")
 
+# a duty_log időpontjai budapesti falióra-idők
+budapest_tz = pytz.timezone("Europe/Budapest")
+
 # Help meta decorator
 
-def help_meta(category: str, usage: Optional[str] = None, short: Optional[str] = None, details: Optional[str] = None, examples: Optional[list] = None):
+def help_meta(category: str, usage: Optional[str] = None, short: Optional[str] = None, details: Optional[str] = None, examples: Optional[list] = None, slow_ms: Optional[float] = None):
+    # slow_ms: parancsonkénti "lassú" küszöb a metrics-nek (alapból SLOW_COMMAND_MS)
     def decorator(func):
         func.help_category = category
         func.help_usage = usage
         func.help_short = short
         func.help_details = details
         func.help_examples = examples or []
+        func.help_slow_ms = slow_ms
         return func
     return decorator
 
@@ -0,0 +1,150 @@
+import asyncio, inspect, logging
+from collections import deque
+import datetime as dtmod
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger("EMS_DUTY_CORE")
+
+# Párhuzamos history-olvasás teljes újraépítéshez (!frissites teljes)
+#
+# A Discord üzenet-ID (snowflake) felső bitjei a létrehozás ideje, így a
+# csatorna élettartama (az első üzenettől máig) ID-tartományokra bontható.
+# Egyszerre legfeljebb `concurrency` ablak aktív: a legrégebbi (fej) ablak
+# oldalai azonnal a feldolgozóhoz mennek, a következő ablakok olvasói pedig
+# ablakonként legfeljebb `prefetch_pages` oldalt töltenek előre, aztán várnak.
+# Az átadás így szigorúan ablak-, azon belül ID-sorrendű (mint egy soros
+# oldest_first olvasásnál), a memóriában pedig legfeljebb
+# concurrency × (prefetch_pages + 1) oldal van – egy lassú fej-ablak mögött sem
+# gyűlik fel a teljes csatorna. Ha a fej ablak elfogy, a következő ablak
+# olvasója indul.
+
+DISCORD_EPOCH_MS = 1420070400000
+_PAGE = 100  # per_page kötegméret (egy history-oldal)
+
+
+class _Snowflake:
+    """Minimal discord.abc.Snowflake for history(after=, before=)."""
+
+    __slots__ = ("id",)
+
+    def __init__(self, id: int):
+        self.id = id
+
+    def __repr__(self) -> str:
+        return f"<Snowflake {self.id}>"
+
+
+def snowflake_at(when: dtmod.datetime) -> int:
+    """A megadott időpont legkisebb snowflake-je (naive érték helyi idő, mint a discord.py-ban)."""
+    return (int(when.timestamp() * 1000) - DISCORD_EPOCH_MS) << 22
+
+
+def split_windows(lo: int, hi: int, count: int) -> List[Tuple[int, int]]:
+    """(after, before) ID-párok: a (lo, hi) nyílt tartomány `count` egymást nem fedő ablakra bontva."""
+    count = max(1, int(count))
+    step = max(1, (hi - lo) // count)
+    bounds = [lo + i * step for i in range(count)] + [hi]
+    # az after/before határok kizárók, ezért a szomszédos ablakok 1-gyel átfednek a határon
+    return [(bounds[i] - (1 if i else 0), bounds[i + 1]) for i in range(count) if bounds[i] < bounds[i + 1]]
+
+
+class _Window:
+    """One ID window being read: its pages (bounded by `slots`) and the reader task."""
+
+    __slots__ = ("pages", "slots", "task")
+
+    def __init__(self, prefetch_pages: int):
+        self.pages = asyncio.Queue()  # oldal-listák, a végén None
+        self.slots = asyncio.Semaphore(max(1, int(prefetch_pages)))
+        self.task = None
+
+
+async def fetch_history_concurrent(
+    channel,
+    handle: Callable,
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+    windows: int = 16,
+    concurrency: int = 4,
+    pacer=None,
+    per_page: bool = False,
+    prefetch_pages: int = 10,
+) -> int:
+    """A (after, before) ID-tartomány üzeneteinek párhuzamos olvasása, `handle(msg)` ID-sorrendben.
+
+    `after` alapértelmezése a csatorna legelső üzenete előtti ID, `before`-é
+    a mostani idő snowflake-je. A `handle` lehet sima függvény
+    vagy coroutine. A `pacer` (pacing.HistoryPacer) közös kérés-keretet ad
+    az összes ablaknak. `per_page` esetén a `handle` legfeljebb 100 üzenetes
+    listákat kap (process_duty_batch). A fej ablak mögötti ablakok legfeljebb
+    `prefetch_pages` oldalt olvasnak előre. Visszaadja az átadott üzenetek számát.
+    """
+    if after is None:
+        # az ablakok a legelső üzenettől indulnak (egy kérés), nem a csatorna létrehozásától
+        lo = None
+        async for first in channel.history(limit=1, oldest_first=True):
+            lo = first.id - 1
+        if lo is None:
+            return 0
+    else:
+        lo = int(after)
+    hi = snowflake_at(dtmod.datetime.now(dtmod.timezone.utc)) + (1 << 22) if before is None else int(before)
+    spans = iter(split_windows(lo, hi, windows))
+    span_count = 0
+
+    async def read(span: Tuple[int, int], window: _Window):
+        try:
+            pages = channel.history(limit=None, after=_Snowflake(span[0]), before=_Snowflake(span[1]), oldest_first=True)
+            if pacer is not None:
+                pages = pacer.pace(pages)
+            page = []
+            async for msg in pages:
+                page.append(msg)
+                if len(page) >= _PAGE:
+                    await window.slots.acquire()  # tele az előolvasás: megvárjuk a feldolgozót
+                    window.pages.put_nowait(page)
+                    page = []
+            if page:
+                await window.slots.acquire()
+                window.pages.put_nowait(page)
+        finally:
+            window.pages.put_nowait(None)
+
+    active = deque()
+
+    def start_next():
+        nonlocal span_count
+        span = next(spans, None)
+        if span is None:
+            return
+        window = _Window(prefetch_pages)
+        window.task = asyncio.create_task(read(span, window))
+        active.append(window)
+        span_count += 1
+
+    for _ in range(max(1, int(concurrency))):
+        start_next()
+    handled = 0
+    try:
+        # sorrendtartó átadás: a fej ablak oldalai azonnal mennek, a következők korlátosan töltődnek
+        while active:
+            window = active[0]
+            while True:
+                page = await window.pages.get()
+                if page is None:
+                    break
+                window.slots.release()
+                for unit in ([page] if per_page else page):
+                    result = handle(unit)
+                    if inspect.isawaitable(result):
+                        await result
+                handled += len(page)
+            await window.task  # az olvasó hibája itt jön elő
+            active.popleft()
+            start_next()
+    finally:
+        for window in active:
+            window.task.cancel()
+        await asyncio.gather(*(window.task for window in active), return_exceptions=True)
+    logger.info(f"Párhuzamos history-olvasás kész: {handled} üzenet, {span_count} ablak, {concurrency} olvasó")
+    return handled
@@ -0,0 +1,117 @@
+from typing import AsyncIterator, Callable, Iterable, List, Optional
+
+from .dutyparse import is_duty_title
+
+# Kötegelt duty-log beolvasás
+#
+# A history oldalanként (100 üzenet) érkezik; a process_duty_batch() egy oldalt
+# egyszerre dolgoz fel: az ismert üzeneteket kihagyja, a többit rekorddá
+# alakítja, egy lépésben beilleszti a DutyLog-ba, és egyszer ment (egy
+# persister-sorba állítás / egy napló-írás oldalanként, nem üzenetenként).
+
+HISTORY_PAGE = 100
+
+
+class BatchStats:
+    """Per-batch (or accumulated) ingest counters."""
+
+    __slots__ = ("new", "replaced", "skipped", "unparseable", "last_id")
+
+    def __init__(self):
+        self.new = 0          # új rekord
+        self.replaced = 0     # meglévő rekord felülírva (újrafeldolgozás / ismétlődés a kötegen belül)
+        self.skipped = 0      # már ismert üzenet, vagy nem duty-kártya
+        self.unparseable = 0  # duty-kártyának látszik, de nem értelmezhető
+        self.last_id = None   # a köteg legnagyobb üzenet-ID-ja
+
+    @property
+    def seen(self) -> int:
+        return self.new + self.replaced + self.skipped + self.unparseable
+
+    def add(self, other: "BatchStats") -> "BatchStats":
+        self.new += other.new
+        self.replaced += other.replaced
+        self.skipped += other.skipped
+        self.unparseable += other.unparseable
+        if other.last_id is not None and (self.last_id is None or other.last_id > self.last_id):
+            self.last_id = other.last_id
+        return self
+
+    def as_dict(self) -> dict:
+        return {"new": self.new, "replaced": self.replaced, "skipped": self.skipped, "unparseable": self.unparseable}
+
+    def __repr__(self) -> str:
+        return f"új {self.new}, felülírt {self.replaced}, kihagyott {self.skipped}, hibás {self.unparseable}"
+
+
+def message_id(msg) -> Optional[int]:
+    mid = getattr(msg, "id", None)
+    if mid is None and isinstance(msg, dict):
+        mid = msg.get("id")
+    return mid
+
+
+def duty_title(msg) -> str:
+    """Az első embed címe kisbetűvel ('' ha nincs) – discord.Message vagy {"embed": {...}} dict."""
+    embeds = getattr(msg, "embeds", None)
+    if embeds:
+        embed = embeds[0]
+    elif isinstance(msg, dict):
+        embed = msg.get("embed")
+    else:
+        return ""
+    if embed is None:
+        return ""
+    title = getattr(embed, "title", None)
+    if title is None and isinstance(embed, dict):
+        title = embed.get("title")
+    return (title or "").strip().lower()
+
+
+def is_duty_card(msg) -> bool:
+    """Duty-kártya címe van-e (ugyanaz a felismerés, mint az értelmezőé: dutyparse.is_duty_title)."""
+    return is_duty_title(duty_title(msg))
+
+
+def ingest_batch(log, messages: Iterable, parse: Callable, persist: Callable, reparse: bool = False) -> BatchStats:
+    """Egy köteg üzenet feldolgozása: parse(msg) → rekord / None, egy beillesztés, egy persist(records)."""
+    stats = BatchStats()
+    records = []
+    for msg in messages:
+        mid = message_id(msg)
+        if mid is not None and (stats.last_id is None or mid > stats.last_id):
+            stats.last_id = mid
+        if not reparse and mid in log:
+            stats.skipped += 1
+            continue
+        try:
+            rec = parse(msg)
+        except Exception:
+            rec = None
+        if rec is None:
+            if is_duty_card(msg):
+                stats.unparseable += 1
+            else:
+                stats.skipped += 1
+            continue
+        records.append(rec)
+    if not records:
+        return stats
+    records.sort(key=lambda r: r["message_id"] or 0)  # időrend: a DutyLog a végére fűz
+    replaced = log.upsert_many(records)
+    stats.replaced += replaced
+    stats.new += len(records) - replaced
+    persist(records)
+    return stats
+
+
+async def pages(messages: AsyncIterator, size: int = HISTORY_PAGE) -> AsyncIterator[List]:
+    """Egy history-iterátor oldalakra (legfeljebb `size` üzenetes listákra) bontva."""
+    page = []
+    async for msg in messages:
+        page.append(msg)
+        if len(page) >= size:
+            yield page
+            page = []
+    if page:
+        yield page
@@ -0,0 +1,156 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Optional, Tuple
+
+from .store import record_key
+
+# Személyenkénti prefix-összeg index tetszőleges időintervallumokra (!szolgalat)
+#
+# Csoportonként (név, rang – ugyanaz a bontás, mint a get_time_for_period
+# kimenetében) a leadta műszakok kezdő- és befejező időpontjai két rendezett
+# tömbben, mellettük a kumulált összegeik. Egy [a, b] intervallumba eső percek:
+#
+#   Σ (b − max(s, a))⁺ a kezdetekre  −  Σ (b − max(e, a))⁺ a befejezésekre
+#
+# mindkét tag két bináris keresés és egy prefix-különbség, így a határon
+# átnyúló (és az egymást átfedő) műszakokból is pontosan az intervallumba eső
+# rész számít.
+
+
+class _Sorted:
+    """Rendezett egész-tömb prefix-összegekkel."""
+
+    __slots__ = ("values", "cum")
+
+    def __init__(self):
+        self.values = []
+        self.cum = [0]  # cum[k] = az első k érték összege
+
+    def add(self, value: int):
+        if not self.values or value >= self.values[-1]:
+            # a szokásos eset: időrendben érkező műszak, O(1)
+            self.values.append(value)
+            self.cum.append(self.cum[-1] + value)
+            return
+        idx = bisect_right(self.values, value)
+        self.values.insert(idx, value)
+        self.cum.append(0)
+        self._recum(idx)
+
+    def discard(self, value: int):
+        idx = bisect_left(self.values, value)
+        if idx < len(self.values) and self.values[idx] == value:
+            del self.values[idx]
+            self.cum.pop()
+            self._recum(idx)
+
+    def _recum(self, idx: int):
+        cum, values = self.cum, self.values
+        for k in range(idx, len(values)):
+            cum[k + 1] = cum[k] + values[k]
+
+    def reach(self, a: int, b: int) -> int:
+        """Σ (b − max(x, a))⁺ az összes x értékre."""
+        le_a = bisect_right(self.values, a)
+        lt_b = bisect_left(self.values, b)
+        if lt_b < le_a:
+            lt_b = le_a
+        return le_a * (b - a) + (lt_b - le_a) * b - (self.cum[lt_b] - self.cum[le_a])
+
+
+class _Series:
+    __slots__ = ("starts", "ends", "shifts")
+
+    def __init__(self):
+        self.starts = _Sorted()
+        self.ends = _Sorted()
+        self.shifts = {}  # record_key → (kezdet, vég)
+
+    def add(self, key, start: int, end: int):
+        self.starts.add(start)
+        self.ends.add(end)
+        self.shifts[key] = (start, end)
+
+    def discard(self, key):
+        shift = self.shifts.pop(key, None)
+        if shift is not None:
+            self.starts.discard(shift[0])
+            self.ends.discard(shift[1])
+
+    def total(self, a: Optional[int], b: Optional[int]) -> Optional[int]:
+        """Percek az [a, b] intervallumban; None, ha egy műszak sem fedi."""
+        if a is None:
+            a = self.starts.values[0]
+        if b is None:
+            b = self.ends.values[-1]
+        # átfedő műszakok száma: b előtt kezdődik, és a után ér véget (kezdet ≤ vég)
+        if b < a or bisect_left(self.starts.values, b) - bisect_right(self.ends.values, a) <= 0:
+            return None
+        return max(0, self.starts.reach(a, b) - self.ends.reach(a, b))
+
+
+def _group(rec) -> Tuple[str, str]:
+    return rec.name or "Ismeretlen", (rec.position or "").replace("Mentő - ", "").strip()
+
+
+def _shift(rec):
+    """(kezdet, vég) falióra-percben egy leadta rekordra, egyébként None."""
+    if "duration" not in rec:
+        return None
+    end = rec.end_min if rec.end_min is not None else rec.ts_min
+    if end is None:
+        return None
+    try:
+        minutes = int(rec.duration or 0)
+    except (TypeError, ValueError):
+        return None
+    start = rec.start_min if rec.start_min is not None else end - minutes
+    return min(start, end), end
+
+
+class ShiftTotals:
+    """Per-(name, position) prefix sums over leadta shifts; a DutyLog listener."""
+
+    def __init__(self):
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._where = {}  # record_key → group
+
+    def on_upsert(self, rec, old):
+        if old is not None:
+            self.on_remove(old)
+        shift = _shift(rec)
+        if shift is None:
+            return
+        key, group = record_key(rec), _group(rec)
+        self._series.setdefault(group, _Series()).add(key, *shift)
+        self._where[key] = group
+
+    def on_remove(self, rec):
+        key = record_key(rec)
+        group = self._where.pop(key, None)
+        if group is None:
+            return
+        series = self._series[group]
+        series.discard(key)
+        if not series.shifts:
+            del self._series[group]
+
+    def on_clear(self):
+        self._series.clear()
+        self._where.clear()
+
+    def attach(self, log):
+        if self in log.listeners:
+            return
+        self.on_clear()
+        for rec in log:
+            self.on_upsert(rec, None)
+        log.listeners.append(self)
+
+    def totals(self, start: Optional[int] = None, end: Optional[int] = None) -> Dict[Tuple[str, str], int]:
+        """(név, rang) → percek a [start, end] falióra-perc intervallumban (a határon átnyúló műszakok vágva)."""
+        out = {}
+        for group, series in self._series.items():
+            total = series.total(start, end)
+            if total is not None:
+                out[group] = total
+        return out
@@ -0,0 +1,306 @@
+import os, json, logging, threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from .records import to_plain
+
+logger = logging.getLogger("EMS_DUTY_CORE")
+
+# Append-only duty journal
+#
+# duty_log.json   – snapshot (JSON array, időrendben), csak tömörítéskor íródik újra
+# duty_log.jsonl  – napló: soronként egy JSON rekord, minden új/módosított rekord ide kerül
+#
+# Betöltéskor a snapshotot olvassuk, majd rájátsszuk a naplót (message_id alapján
+# a későbbi rekord felülírja a korábbit). A félbeszakadt utolsó sort eldobjuk.
+#
+# Külső változás: a journal számon tartja, mekkorának kell lennie a két fájlnak
+# a saját írásai után (snapshot: mtime + méret, napló: bájtméret). Ha a lemezen
+# más látszik, valaki más írt bele (másik bot-folyamat, offline újraépítés,
+# kézi szerkesztés) – lásd external_change() / read_appended() és repository.py.
+
+
+def _salvage_snapshot(text: str) -> List[dict]:
+    """Recover every complete JSON object from a damaged snapshot array."""
+    decoder = json.JSONDecoder()
+    records = []
+    pos = text.find("{")
+    while pos != -1:
+        try:
+            obj, end = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            pos = text.find("{", pos + 1)
+            continue
+        if isinstance(obj, dict):
+            records.append(obj)
+        pos = text.find("{", end)
+    return records
+
+
+def file_stamp(path) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, méret), vagy None, ha a fájl nem létezik."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def merge_records(records: Iterable[dict]) -> List[dict]:
+    """message_id alapján egyedisít (a későbbi nyer), majd timestamp szerint rendez."""
+    seen = {}
+    anon = []
+    for rec in records:
+        mid = rec.get("message_id")
+        if mid is None:
+            anon.append(rec)
+        else:
+            seen[mid] = rec
+    merged = anon + list(seen.values())
+    merged.sort(key=lambda x: x.get("timestamp", ""))
+    return merged
+
+
+class DutyJournal:
+    """Snapshot + append-only JSONL journal for the duty log.
+
+    `append()` costs one line write; the journal is fsync'd every `fsync_every`
+    records (or on `sync()`), and `compact()` atomically rewrites the snapshot
+    and empties the journal.
+    """
+
+    def __init__(self, snapshot_path, journal_path=None, fsync_every: int = 50, compact_every: int = 5000):
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = Path(journal_path) if journal_path else self.snapshot_path.with_suffix(".jsonl")
+        self.fsync_every = max(1, int(fsync_every))
+        self.compact_every = max(1, int(compact_every))
+        self.journal_lines = 0
+        self._unsynced = 0
+        self._fh = None
+        # a saját írások utáni elvárt állapot (külső változás felismeréséhez)
+        self.known_snapshot = None  # (mtime_ns, méret) vagy None
+        self.known_journal_size = 0
+        self._foreign = []  # saját írás előtt beolvasott külső naplósorok (read_appended adja át)
+        self._truncated = False
+        # a write-behind persister worker szálból ír, a lekérdezések a loop szálból olvasnak
+        self._lock = threading.RLock()
+
+    # ---------------- betöltés ----------------
+
+    def _load_snapshot(self) -> List[dict]:
+        if not self.snapshot_path.exists():
+            return []
+        text = self.snapshot_path.read_text(encoding="utf-8")
+        if not text.strip():
+            return []
+        try:
+            data = json.loads(text)
+            return data if isinstance(data, list) else []
+        except json.JSONDecodeError as e:
+            records = _salvage_snapshot(text)
+            logger.warning(f"Sérült snapshot ({self.snapshot_path}): {e} – {len(records)} rekord helyreállítva")
+            return records
+
+    def _load_journal(self, repair: bool = True) -> List[dict]:
+        if self._fh is not None:
+            self._fh.flush()
+        if not self.journal_path.exists():
+            return []
+        records = []
+        good_end = 0
+        with open(self.journal_path, "rb") as f:
+            raw_lines = f.readlines()
+        offset = 0
+        for idx, raw in enumerate(raw_lines):
+            offset += len(raw)
+            is_last = idx == len(raw_lines) - 1
+            if not raw.strip():
+                good_end = offset
+                continue
+            try:
+                rec = json.loads(raw.decode("utf-8"))
+            except (ValueError, UnicodeDecodeError):
+                if is_last:
+                    logger.warning(f"Félbeszakadt utolsó naplósor eldobva ({self.journal_path})")
+                    break
+                logger.warning(f"Hibás naplósor kihagyva ({self.journal_path}, sor {idx + 1})")
+                good_end = offset
+                continue
+            if is_last and not raw.endswith(b"\n"):
+                # teljes JSON, csak a sorvége hiányzik – megtartjuk és lezárjuk
+                records.append(rec)
+                good_end = offset
+                if repair:
+                    with open(self.journal_path, "ab") as f:
+                        f.write(b"\n")
+                break
+            records.append(rec)
+            good_end = offset
+        if repair and good_end < offset:
+            # a torn sort levágjuk, hogy a következő append ne ragadjon hozzá
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good_end)
+        self.journal_lines = len(records)
+        return records
+
+    def load(self, repair: bool = True) -> List[dict]:
+        """Snapshot + journal visszajátszása, egyedisítve és időrendben.
+        `repair=False` csak olvas (a torn sort nem vágja le) – futás közbeni lekérdezésekhez.
+        """
+        with self._lock:
+            records = merge_records(self._load_snapshot() + self._load_journal(repair))
+            self._mark_files()
+            return records
+
+    # ---------------- külső változás ----------------
+
+    def _mark_files(self):
+        if self._fh is not None:
+            self._fh.flush()
+        self.known_snapshot = file_stamp(self.snapshot_path)
+        journal = file_stamp(self.journal_path)
+        self.known_journal_size = journal[1] if journal else 0
+        self._foreign, self._truncated = [], False
+
+    def _read_lines(self, start: int, end: Optional[int] = None) -> Tuple[List[dict], int]:
+        """A napló [start, end) bájtjainak teljes sorai → (rekordok, elfogyasztott bájtok)."""
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(start)
+                data = f.read() if end is None else f.read(max(0, end - start))
+        except FileNotFoundError:
+            return [], 0
+        consumed = data.rfind(b"\n") + 1
+        records = []
+        for raw in data[:consumed].splitlines():
+            if not raw.strip():
+                continue
+            try:
+                records.append(json.loads(raw.decode("utf-8")))
+            except (ValueError, UnicodeDecodeError):
+                logger.warning(f"Hibás külső naplósor kihagyva ({self.journal_path})")
+        return records, consumed
+
+    def _absorb_foreign(self, fh):
+        """Saját írás előtt: a közben más által hozzáírt sorok félreolvasása, hogy az ismert méret ne csússzon el."""
+        fh.flush()
+        size = os.fstat(fh.fileno()).st_size
+        if size > self.known_journal_size:
+            records, _ = self._read_lines(self.known_journal_size, size)
+            self._foreign.extend(records)
+        elif size < self.known_journal_size:
+            self._truncated = True
+        self.known_journal_size = size
+
+    def external_change(self) -> Optional[str]:
+        """None: csak a saját írásaink; "append": a naplóhoz más is hozzáírt; "rewrite": a snapshot
+        cserélődött vagy a napló rövidült. Ha épp mi írunk (a zár foglalt), None – majd legközelebb."""
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            if self._fh is not None:
+                self._fh.flush()
+            if self._truncated or file_stamp(self.snapshot_path) != self.known_snapshot:
+                return "rewrite"
+            journal = file_stamp(self.journal_path)
+            size = journal[1] if journal else 0
+            if size < self.known_journal_size:
+                return "rewrite"
+            return "append" if size > self.known_journal_size or self._foreign else None
+        finally:
+            self._lock.release()
+
+    def stamp(self) -> Optional[list]:
+        """A saját írások utáni fájlállapot ([snapshot (mtime_ns, méret), napló mérete]) – a származtatott
+        tükrök (sqlite) ezzel jelzik, meddig követik a naplót. None, ha be nem dolgozott külső sorok vannak."""
+        with self._lock:
+            if self._foreign or self._truncated:
+                return None
+            return [list(self.known_snapshot) if self.known_snapshot else None, self.known_journal_size]
+
+    def read_appended(self) -> List[dict]:
+        """A napló ismert vége utáni teljes sorok (mások írásai); a félkész utolsó sor a következő olvasásé."""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+            records, consumed = self._read_lines(self.known_journal_size)
+            records, self._foreign = self._foreign + records, []
+            self.known_journal_size += consumed
+            self.journal_lines += len(records)
+            return records
+
+    # ---------------- írás ----------------
+
+    def _handle(self):
+        if self._fh is None:
+            self._fh = open(self.journal_path, "a", encoding="utf-8")
+        return self._fh
+
+    def _write(self, fh, rec: dict):
+        line = json.dumps(rec, ensure_ascii=False, default=to_plain) + "\n"
+        fh.write(line)
+        self.known_journal_size += len(line.encode("utf-8"))
+        self.journal_lines += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def append(self, rec: dict):
+        with self._lock:
+            fh = self._handle()
+            self._absorb_foreign(fh)
+            self._write(fh, rec)
+
+    def append_many(self, recs: Iterable[dict]):
+        with self._lock:
+            fh = self._handle()
+            self._absorb_foreign(fh)
+            for rec in recs:
+                self._write(fh, rec)
+
+    def sync(self):
+        with self._lock:
+            if self._fh is None or not self._unsynced:
+                return
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._unsynced = 0
+
+    def needs_compaction(self) -> bool:
+        return self.journal_lines >= self.compact_every
+
+    def compact(self, records: Iterable[dict]):
+        """Atomic snapshot rewrite (tmp + os.replace), then the journal is emptied."""
+        sorted_log = sorted(records, key=lambda x: x.get("timestamp", ""))
+        tmp = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(sorted_log, f, ensure_ascii=False, indent=2, default=to_plain)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.snapshot_path)
+            self.close()
+            with open(self.journal_path, "w", encoding="utf-8"):
+                pass
+            self.journal_lines = 0
+            self._mark_files()
+
+    def reset(self):
+        """Snapshot és napló törlése (teljes újraépítéshez)."""
+        with self._lock:
+            self.close()
+            for p in (self.snapshot_path, self.journal_path):
+                if p.exists():
+                    p.unlink()
+            self.journal_lines = 0
+            self.known_snapshot, self.known_journal_size = None, 0
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None:
+                try:
+                    self.sync()
+                finally:
+                    self._fh.close()
+                    self._fh = None
+                    self._unsynced = 0
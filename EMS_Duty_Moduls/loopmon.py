@@ -0,0 +1,120 @@
+import os, sys, time, asyncio, logging, threading, traceback
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+from .metrics import Histogram
+
+logger = logging.getLogger("EMS_DUTY_CORE")
+
+# Event loop késés-figyelő
+#
+# A parancsok és az on_message egy része szinkron fájl-I/O-t (json.load /
+# json.dump, open().write) végez közvetlenül az asyncio loopon; ha ez sokáig
+# tart, a gateway heartbeat is késik. A LoopLagMonitor két részből áll:
+#   - egy loop-taszk LOOP_LAG_INTERVAL mp-enként alszik, és méri, mennyivel
+#     később ébredt (ütemezési késés → hisztogram, a küszöb felett log),
+#   - egy watchdog szál figyeli a taszk utolsó ébredését; ha a loop
+#     LOOP_LAG_THRESHOLD_MS óta nem ébredt, a loop szálának aktuális stackjét
+#     (sys._current_frames) a futó parancs(ok) nevével együtt logolja, és a
+#     legbelső saját (repó-beli) keretet "hot spot"-ként számolja.
+# Így a blokkoló hívás helye a blokkolás közben látszik, nem utólag kell kitalálni.
+
+STACK_DEPTH = 12  # ennyi keret kerül a logba
+PKG_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS = os.path.abspath(__file__)
+
+
+def hotspot_of(stack: Iterable[traceback.FrameSummary]) -> str:
+    """A legbelső repó-beli keret ("fájl:sor függvény"); ha nincs ilyen, a legbelső keret."""
+    frames = list(stack)
+    for fs in reversed(frames):
+        path = os.path.abspath(fs.filename)
+        if path.startswith(PKG_ROOT + os.sep) and path != _THIS:
+            return f"{Path(os.path.relpath(path, PKG_ROOT)).as_posix()}:{fs.lineno} {fs.name}"
+    if not frames:
+        return "?"
+    return f"{os.path.basename(frames[-1].filename)}:{frames[-1].lineno} {frames[-1].name}"
+
+
+class LoopLagMonitor:
+    """Asyncio scheduling-lag sampler plus a watchdog thread that dumps the loop thread's stack on stalls."""
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        threshold_ms: Optional[float] = None,
+        running: Optional[Callable[[], List[str]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.interval = float(interval if interval is not None else os.getenv("LOOP_LAG_INTERVAL", "0.1"))
+        self.threshold = float(threshold_ms if threshold_ms is not None else os.getenv("LOOP_LAG_THRESHOLD_MS", "250")) / 1000
+        self._running = running or (lambda: [])  # futó parancsok nevei (CommandMetrics.running)
+        self._clock = clock
+        self.lag = Histogram()  # ütemezési késés, ms
+        self.stalls = 0
+        self.blocked = 0.0  # a küszöb feletti késések összege, mp
+        self.hotspots = Counter()
+        self._beat = clock()
+        self._reported = None
+        self._loop_thread = None
+        self._task = None
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    def start(self):
+        """Indítás a loop szálából (pl. setup_hook): mérő taszk + watchdog szál."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = self._clock()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            before = self._clock()
+            await asyncio.sleep(self.interval)
+            now = self._clock()
+            self._beat = now
+            lag = max(0.0, now - before - self.interval)
+            self.lag.add(lag * 1000)
+            if lag >= self.threshold:
+                self.stalls += 1
+                self.blocked += lag
+                logger.warning(f"Event loop késés: {lag * 1000:.0f} ms (futó parancs: {', '.join(self._running()) or '-'})")
+
+    def _watch(self):
+        while not self._stop.wait(min(self.interval, self.threshold / 2)):
+            self.check()
+
+    def check(self) -> Optional[str]:
+        """Watchdog lépés: ha a loop a küszöbnél régebben nem ébredt, a stackje egyszer logolva (hot spot-tal)."""
+        beat = self._beat
+        stalled = self._clock() - beat - self.interval
+        if stalled < self.threshold or beat == self._reported or self._loop_thread is None:
+            return None
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return None
+        self._reported = beat
+        stack = traceback.extract_stack(frame)
+        spot = hotspot_of(stack)
+        self.hotspots[spot] += 1
+        logger.warning(
+            f"Event loop blokkolva {stalled * 1000:.0f} ms óta – futó parancs: {', '.join(self._running()) or '-'}; hely: {spot}\n"
+            + "".join(stack.format()[-STACK_DEPTH:]).rstrip()
+        )
+        return spot
+
+    def stats(self) -> str:
+        return (f"késés p50 {self.lag.percentile(0.5):.0f} ms, p95 {self.lag.percentile(0.95):.0f} ms, max {self.lag.max:.0f} ms, "
+                f"{self.stalls} blokkolás ({self.blocked:.1f}s)")
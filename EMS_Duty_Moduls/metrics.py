@@ -0,0 +1,325 @@
+import os, json, math, time, asyncio, logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("EMS_DUTY_CORE")
+
+# Parancs-késleltetés mérése (command_metrics.json)
+#
+# Minden parancsot végponttól végpontig mérünk (a bot before_invoke / after_invoke
+# hookja, a parancs callbackjével azonos taskban), fázisokra bontva:
+#   - send:    a ctx.send hívások ideje; a hívások száma a Discord-hívások száma,
+#   - load / compute: a parancs jelöli (`state.METRICS.phase(ctx, "load")`),
+#   - egyéb:   a maradék (parancs-feldolgozás, check-ek, jelöletlen kód).
+# Parancsonként és fázisonként log-skálás hisztogram (1 ms felett 25%-os
+# vödrök), METRICS_SLICE mp-es szeletekben, az utolsó METRICS_WINDOW szelet
+# marad meg (alapból 24 × 1 óra). A p50 / p95 / max a `!parancs_stat` admin
+# parancsban látszik. Mentés legfeljebb METRICS_SAVE_INTERVAL mp-enként
+# háttérszálon (a loopot nem fogja) és leállításkor. A SLOW_COMMAND_MS (vagy a help_meta slow_ms) fölötti futások
+# fázisbontással figyelmeztetést írnak a logba.
+
+BUCKET_BASE = 1.25
+BUCKETS = 60  # 1.25**59 ms ≈ 9 perc; e fölött az utolsó vödör
+TOTAL = "összesen"
+OTHER = "egyéb"
+
+
+def bucket_of(ms: float) -> int:
+    if ms <= 1.0:
+        return 0
+    return min(BUCKETS - 1, int(math.ceil(math.log(ms, BUCKET_BASE))))
+
+
+class Histogram:
+    """Log-bucketed latency histogram (ms) with count, sum, max and percentile estimates."""
+
+    __slots__ = ("counts", "n", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float):
+        self.counts[bucket_of(ms)] += 1
+        self.n += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def merge(self, other: "Histogram"):
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.n += other.n
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """A q-adik kvantilis vödrének felső határa (legfeljebb a mért maximum)."""
+        if not self.n:
+            return 0.0
+        rank, seen = max(1, math.ceil(q * self.n)), 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(BUCKET_BASE ** i, self.max)
+        return self.max
+
+    def to_json(self) -> dict:
+        return {"c": {str(i): c for i, c in enumerate(self.counts) if c}, "n": self.n, "sum": round(self.total, 3), "max": round(self.max, 3)}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Histogram":
+        h = cls()
+        for i, c in data.get("c", {}).items():
+            h.counts[min(BUCKETS - 1, int(i))] += int(c)
+        h.n, h.total, h.max = int(data.get("n", 0)), float(data.get("sum", 0.0)), float(data.get("max", 0.0))
+        return h
+
+
+class Span:
+    """Egy parancsfutás: fázisidők (egymásba ágyazva a belső fázis ideje nem számít kétszer) és Discord-hívások."""
+
+    def __init__(self, command: str, clock: Callable[[], float], slow_ms: Optional[float] = None):
+        self.command = command
+        self.slow_ms = slow_ms
+        self._clock = clock
+        self.started = clock()
+        self.phases: Dict[str, float] = {}  # fázis → mp
+        self.calls = 0
+        self.original_send = None  # a becsomagolt ctx.send (finish után visszakerül)
+        self._stack = []  # [név, kezdet, gyerekfázisok ideje]
+
+    @contextmanager
+    def phase(self, name: str):
+        frame = [name, self._clock(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = self._clock() - frame[1]
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - frame[2]
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+
+class CommandMetrics:
+    """Rolling per-command / per-phase latency histograms fed by discord.py command events."""
+
+    def __init__(
+        self,
+        path=None,
+        slow_ms: Optional[float] = None,
+        slice_seconds: Optional[float] = None,
+        window: Optional[int] = None,
+        save_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.perf_counter,
+        wall: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path) if path else None
+        self.slow_ms = float(slow_ms if slow_ms is not None else os.getenv("SLOW_COMMAND_MS", "2000"))
+        self.slice_seconds = float(slice_seconds or os.getenv("METRICS_SLICE", "3600"))
+        self.window = int(window or os.getenv("METRICS_WINDOW", "24"))
+        self.save_interval = float(save_interval if save_interval is not None else os.getenv("METRICS_SAVE_INTERVAL", "300"))
+        self._clock = clock
+        self._wall = wall
+        # szelet kezdete (epoch mp) → parancs → {"phases": {fázis: Histogram}, "calls": int, "errors": int}
+        self._slices: Dict[int, Dict[str, dict]] = {}
+        self._spans: Dict[int, Span] = {}  # id(ctx) → futó mérés
+        self._last_save = wall()
+        self._saving: Optional[asyncio.Task] = None
+        self.dirty = False
+
+    # ---------------- mérés ----------------
+
+    def begin(self, ctx, command: Optional[str] = None, slow_ms: Optional[float] = None) -> Span:
+        """Mérés indítása; a ctx.send-et becsomagolja (send fázis + hívásszám)."""
+        if command is None:
+            command = ctx.command.qualified_name
+            slow_ms = getattr(ctx.command.callback, "help_slow_ms", None)
+        span = Span(command, self._clock, slow_ms)
+        self._spans[id(ctx)] = span
+        original = span.original_send = ctx.send
+
+        async def send(*args, **kwargs):
+            span.calls += 1
+            with span.phase("send"):
+                return await original(*args, **kwargs)
+
+        ctx.send = send
+        return span
+
+    def running(self) -> List[str]:
+        """A most futó parancsok nevei (a loop-figyelő logjához)."""
+        return [span.command for span in list(self._spans.values())]
+
+    def phase(self, ctx, name: str):
+        """Fázis jelölése egy parancson belül (`with state.METRICS.phase(ctx, "load"):`); mérés nélkül no-op."""
+        span = self._spans.get(id(ctx))
+        return span.phase(name) if span is not None else _noop()
+
+    def finish(self, ctx, failed: bool = False) -> Optional[Span]:
+        span = self._spans.pop(id(ctx), None)
+        if span is None:
+            return None
+        total = self._clock() - span.started
+        ctx.send = span.original_send
+        self.record(span.command, total, span.phases, span.calls, failed)
+        threshold = span.slow_ms if span.slow_ms is not None else self.slow_ms
+        if total * 1000 >= threshold:
+            parts = ", ".join(f"{name} {sec * 1000:.0f} ms" for name, sec in span.phases.items())
+            logger.warning(f"Lassú parancs: !{span.command} {total * 1000:.0f} ms ({parts or 'nincs fázis'}; {span.calls} Discord-hívás)")
+        return span
+
+    def record(self, command: str, total: float, phases: Dict[str, float], calls: int = 0, failed: bool = False):
+        """Egy futás (mp-ben) beírása az aktuális szeletbe; a fázisokon kívüli idő az "egyéb"."""
+        now = self._wall()
+        cell = self._cell(int(now // self.slice_seconds * self.slice_seconds), command)
+        cell["calls"] += calls
+        cell["errors"] += int(failed)
+        values = dict(phases)
+        values[OTHER] = max(0.0, total - sum(phases.values()))
+        values[TOTAL] = total
+        for name, sec in values.items():
+            hist = cell["phases"].get(name)
+            if hist is None:
+                hist = cell["phases"][name] = Histogram()
+            hist.add(sec * 1000)
+        self.dirty = True
+
+    def _cell(self, slice_start: int, command: str) -> dict:
+        if slice_start not in self._slices:
+            self._slices[slice_start] = {}
+            for old in sorted(self._slices)[:-self.window]:
+                del self._slices[old]
+        return self._slices[slice_start].setdefault(command, {"phases": {}, "calls": 0, "errors": 0})
+
+    # ---------------- lekérdezés ----------------
+
+    def summary(self) -> List[dict]:
+        """Parancsonként az ablak összesítése: runs, errors, calls, p50/p95/max (ms) és fázisonként ugyanez."""
+        merged: Dict[str, dict] = {}
+        for slice_start in sorted(self._slices):
+            for command, cell in self._slices[slice_start].items():
+                acc = merged.setdefault(command, {"phases": {}, "calls": 0, "errors": 0})
+                acc["calls"] += cell["calls"]
+                acc["errors"] += cell["errors"]
+                for name, hist in cell["phases"].items():
+                    acc["phases"].setdefault(name, Histogram()).merge(hist)
+        out = []
+        for command, acc in merged.items():
+            total = acc["phases"].get(TOTAL, Histogram())
+            out.append({
+                "command": command,
+                "runs": total.n,
+                "errors": acc["errors"],
+                "calls": acc["calls"],
+                "p50": total.percentile(0.5),
+                "p95": total.percentile(0.95),
+                "max": total.max,
+                "phases": {name: {"p50": h.percentile(0.5), "p95": h.percentile(0.95), "mean": h.total / h.n if h.n else 0.0}
+                           for name, h in acc["phases"].items() if name != TOTAL},
+            })
+        out.sort(key=lambda row: row["p95"], reverse=True)
+        return out
+
+    # ---------------- perzisztencia ----------------
+
+    def to_json(self) -> dict:
+        return {
+            "slice": self.slice_seconds,
+            "slices": {
+                str(start): {
+                    command: {"calls": cell["calls"], "errors": cell["errors"], "phases": {name: h.to_json() for name, h in cell["phases"].items()}}
+                    for command, cell in commands_.items()
+                }
+                for start, commands_ in self._slices.items()
+            },
+        }
+
+    def load(self):
+        self._slices.clear()
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            for start, commands_ in data.get("slices", {}).items():
+                self._slices[int(start)] = {
+                    command: {"calls": int(cell.get("calls", 0)), "errors": int(cell.get("errors", 0)),
+                              "phases": {name: Histogram.from_json(h) for name, h in cell.get("phases", {}).items()}}
+                    for command, cell in commands_.items()
+                }
+            for old in sorted(self._slices)[:-self.window]:
+                del self._slices[old]
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Parancs-metrika fájl nem olvasható ({self.path}): {e} – üres statisztika")
+            self._slices.clear()
+        self.dirty = False
+
+    def save(self, path=None):
+        """Szinkron mentés (leállításkor); futás közben a save_soon."""
+        path = Path(path) if path else self.path
+        self._last_save = self._wall()
+        if path is None or not self.dirty:
+            return
+        self._write(path, self.to_json())
+        self.dirty = False
+
+    def save_soon(self) -> Optional[asyncio.Task]:
+        """Esedékes mentés indítása háttérszálon; None, ha nincs mit / még nem kell menteni."""
+        if self._saving is not None and not self._saving.done():
+            return self._saving
+        if self.path is None or not self.dirty or self._wall() - self._last_save < self.save_interval:
+            return None
+        self._saving = asyncio.get_running_loop().create_task(self._save_in_thread())
+        return self._saving
+
+    async def _save_in_thread(self):
+        # a pillanatkép a loopon készül (a szeletek közben változhatnak), csak a kiírás megy szálra
+        data, path = self.to_json(), self.path
+        self._last_save = self._wall()
+        self.dirty = False
+        try:
+            await asyncio.to_thread(self._write, path, data)
+        except OSError as e:
+            self.dirty = True
+            logger.warning(f"Parancs-metrikák mentése sikertelen ({path}): {e}")
+
+    @staticmethod
+    def _write(path: Path, data: dict):
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+@contextmanager
+def _noop():
+    yield
+
+
+def install_command_metrics(bot, metrics: CommandMetrics):
+    """A mérés bekötése a bot globális before_invoke / after_invoke hookjába (a bot egyetlen ilyen hookja).
+
+    Az on_command listener külön taskban fut, a parancs első await-je után: addig
+    a load / compute fázis és az első ctx.send mérés nélkül maradna. A hookok a
+    callbackkel egy taskban, közvetlenül előtte / utána futnak; az after_invoke
+    hiba esetén is (ctx.command_failed). Az on_command_error a hook előtt elbukó
+    (check, argumentum) parancsoknál nem talál mérést.
+    """
+
+    async def before_invoke(ctx):
+        metrics.begin(ctx)
+
+    async def after_invoke(ctx):
+        metrics.finish(ctx, failed=getattr(ctx, "command_failed", False))
+        metrics.save_soon()
+
+    async def on_command_error(ctx, error):
+        metrics.finish(ctx, failed=True)
+
+    bot.before_invoke(before_invoke)
+    bot.after_invoke(after_invoke)
+    bot.add_listener(on_command_error, "on_command_error")
@@ -0,0 +1,123 @@
+import os, json, logging
+import datetime as dtmod
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .dutyparse import is_duty_title, parse_duty_embed
+from .journal import merge_records
+
+logger = logging.getLogger("EMS_DUTY_CORE")
+
+# Offline duty_log újraépítés dumpokból
+#
+# A duty-kártyák teljes embedje több helyen is megvan lemezen:
+#   riports/sniff_duty_*.json / exports/sniff_duty.json – JSON lista ("embeds", "timestamp" vagy "created_at")
+#   riports/sniff_duty_*.txt – szöveges riport ("ID:", "Timestamp:", "Title:", "Description:" blokkok)
+#   raw_sniff.log – az on_message nyers naplója ("Message ID:", "Timestamp:", "Embeds: [...]" blokkok)
+# Ezekből hálózat nélkül újraépíthető a duty_log: fájlonként (nagy dump-halmaznál
+# külön processzekben) a közös értelmezőn át rekordok, message_id szerint egyesítve.
+
+BLOCK_SEPARATOR = "=============================="
+Row = Tuple[Optional[int], Optional[str], Optional[str], Optional[str]]  # (id, cím, leírás, időpont ISO)
+
+
+def _json_rows(text: str) -> Iterator[Row]:
+    for row in json.loads(text):
+        embed = (row.get("embeds") or [{}])[0]
+        yield row.get("id"), embed.get("title"), embed.get("description"), row.get("timestamp") or row.get("created_at")
+
+
+def _text_rows(text: str) -> Iterator[Row]:
+    """Szöveges riport és raw_sniff.log blokkjai (az első embed)."""
+    for block in text.split(BLOCK_SEPARATOR):
+        mid = title = description = when = None
+        lines = block.strip("\n").split("\n")
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+            key, _, value = line.partition(": ")
+            if key in ("ID", "Message ID"):
+                mid = value.strip()
+            elif key == "Timestamp":
+                when = value.strip()
+            elif key == "Embeds":
+                # raw_sniff.log: a JSON embed mindig nyer (a tartalom sorai is kezdődhetnek "Title:"-lel)
+                embeds = json.loads(value) or [{}]
+                title, description = embeds[0].get("title"), embeds[0].get("description")
+            elif line.startswith("Title:") and title is None:
+                title = line[len("Title:"):].strip()
+            elif line == "Description:" and description is None:
+                # a leírás a következő üres sorig / következő embedig tart
+                body = []
+                while i + 1 < len(lines) and lines[i + 1].strip() and not lines[i + 1].startswith("--- Embed"):
+                    i += 1
+                    body.append(lines[i])
+                description = "\n".join(body)
+            i += 1
+        if mid is not None and mid.isdigit():
+            yield int(mid), title, description, when
+
+
+def read_dump(path) -> Iterator[Row]:
+    """Egy dump sorai formátumtól függetlenül: (message_id, cím, leírás, ISO időpont)."""
+    text = Path(path).read_text(encoding="utf-8", errors="replace")
+    if text.lstrip().startswith("["):
+        return _json_rows(text)
+    return _text_rows(text)
+
+
+def parse_rows(rows: Iterable[Row]) -> Tuple[List[dict], int]:
+    """Sorok → duty rekordok; a második érték a nem duty-kártya / hiányos sorok száma."""
+    records, skipped = [], 0
+    for mid, title, description, when in rows:
+        if mid is None or not when or not is_duty_title(title):
+            skipped += 1
+            continue
+        try:
+            created_at = dtmod.datetime.fromisoformat(when)
+        except ValueError:
+            skipped += 1
+            continue
+        rec = parse_duty_embed(title, description, created_at, int(mid))
+        if rec is None:
+            skipped += 1
+        else:
+            records.append(rec)
+    return records, skipped
+
+
+def parse_dump(path) -> Tuple[List[dict], int]:
+    try:
+        return parse_rows(read_dump(path))
+    except (OSError, ValueError) as e:
+        logger.warning(f"[OFFLINE] Dump nem olvasható ({path}): {e}")
+        return [], 0
+
+
+def rebuild_from_dumps(paths: Iterable, workers: Optional[int] = None, existing: Iterable[dict] = ()) -> Tuple[List[dict], dict]:
+    """Dumpok → egyesített, időrendbe rendezett duty rekordok (message_id szerint egyedi) + statisztika.
+
+    Több fájlnál a fájlok értelmezése `workers` processzben fut (alapból a CPU-k száma);
+    `existing` rekordjai (pl. a meglévő duty_log) megmaradnak, a dumpbeli változat felülírja őket.
+    """
+    paths = [Path(p) for p in paths]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            results = list(pool.map(parse_dump, paths))
+    else:
+        results = [parse_dump(p) for p in paths]
+
+    parsed = sum(len(recs) for recs, _ in results)
+    skipped = sum(n for _, n in results)
+    existing = list(existing)
+    merged = merge_records(existing + [rec for recs, _ in results for rec in recs])
+    stats = {
+        "files": len(paths),
+        "parsed": parsed,
+        "skipped": skipped,
+        "duplicates": len(existing) + parsed - len(merged),
+        "records": len(merged),
+    }
+    return merged, stats
@@ -0,0 +1,129 @@
+import asyncio, logging, time
+from typing import AsyncIterator, Callable, Optional
+
+logger = logging.getLogger("EMS_DUTY_CORE")
+
+# History-olvasás ütemezése (rate limit)
+#
+# A régi fix sleep-ek (0.5 s / üzenet, 0.2 s / üzenet, 0.5 s / 50 üzenet) az
+# üzenetekhez kötődtek, pedig HTTP-kérés csak oldalanként (100 üzenet) megy ki.
+# A HistoryPacer egy közös token bucket oldalankénti kérésekre:
+#   - minden oldal előtt egy token (a párhuzamos ablakok is ugyanazon osztoznak),
+#   - gyors oldal → a ráta lassan nő (additív), lassú oldal → csökken (szorzó),
+#   - 429 (a discord.http "rate limited" figyelmeztetése) → a ráta feleződik, és
+#     a retry_after idejére senki nem kér új oldalt.
+# Így a szkennelés a legnagyobb biztonságos sebességen fut.
+
+HISTORY_PAGE = 100  # discord.py ennyi üzenetet kér le egyszerre
+
+
+class HistoryPacer:
+    """Shared, adaptive (AIMD) token bucket for channel.history() page requests."""
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        burst: float = 2.0,
+        min_rate: float = 0.2,
+        max_rate: float = 10.0,
+        slow_page: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable = asyncio.sleep,
+    ):
+        self.rate = float(rate)          # oldal / mp
+        self.burst = float(burst)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.slow_page = float(slow_page)  # e fölötti oldal-késleltetés már torlódás
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self.pages = 0
+        self.rate_limits = 0
+        self.waited = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Várakozás egy oldal-kérés tokenjére."""
+        while True:
+            now = self._clock()
+            self._refill(now)
+            if now < self._blocked_until:
+                delay = self._blocked_until - now
+            elif self._tokens >= 1:
+                self._tokens -= 1
+                self.pages += 1
+                return
+            else:
+                delay = (1 - self._tokens) / self.rate
+            self.waited += delay
+            await self._sleep(delay)
+
+    def observe(self, latency: float):
+        """Egy oldal lekérési ideje: gyors → +0.5 oldal/mp, lassú → ×0.7."""
+        if latency > self.slow_page:
+            self.rate = max(self.min_rate, self.rate * 0.7)
+        else:
+            self.rate = min(self.max_rate, self.rate + 0.5)
+
+    def rate_limited(self, retry_after: float):
+        """429: ráta felezése, a tokenek elvesznek, retry_after-ig szünet."""
+        now = self._clock()
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate * 0.5)
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, now + max(0.0, float(retry_after)))
+        self.rate_limits += 1
+        logger.warning(f"History rate limit: retry_after={float(retry_after):.2f}s, új ráta {self.rate:.2f} oldal/mp")
+
+    async def pace(self, messages: AsyncIterator, page_size: int = HISTORY_PAGE) -> AsyncIterator:
+        """Egy history-iterátor átengedése oldalanként egy tokennel, az oldalak idejének mérésével."""
+        it = messages.__aiter__()
+        count = 0
+        while True:
+            page_start = count % page_size == 0
+            if page_start:
+                await self.acquire()
+                started = self._clock()
+            try:
+                msg = await it.__anext__()
+            except StopAsyncIteration:
+                return
+            if page_start:
+                self.observe(self._clock() - started)
+            count += 1
+            yield msg
+
+    def stats(self) -> str:
+        return f"ráta {self.rate:.2f} oldal/mp, {self.pages} oldal, {self.rate_limits}× 429, {self.waited:.1f}s várakozás"
+
+
+class RateLimitTap(logging.Handler):
+    """Feeds discord.http's 429 warnings (retry_after) into a HistoryPacer."""
+
+    def __init__(self, pacer: HistoryPacer):
+        super().__init__(level=logging.WARNING)
+        self.pacer = pacer
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if "rate limited" in str(record.msg) and "429" in str(record.msg) and record.args:
+                self.pacer.rate_limited(float(record.args[-1]))
+        except Exception:
+            self.handleError(record)
+
+
+def install_rate_limit_tap(pacer: HistoryPacer, logger_name: str = "discord.http") -> Optional[RateLimitTap]:
+    """A pacer feliratkoztatása a discord.py 429-es figyelmeztetéseire (egyszer)."""
+    target = logging.getLogger(logger_name)
+    for handler in target.handlers:
+        if isinstance(handler, RateLimitTap) and handler.pacer is pacer:
+            return None
+    tap = RateLimitTap(pacer)
+    target.addHandler(tap)
+    return tap
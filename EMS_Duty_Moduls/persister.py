@@ -0,0 +1,132 @@
+import asyncio, logging, time
+from typing import Callable, List, Optional
+
+logger = logging.getLogger("EMS_DUTY_CORE")
+
+
+class WriteBehindPersister:
+    """Write-behind, coalescing persister for the duty journal.
+
+    The event loop only queues records (`mark_dirty`); a background task drains
+    the queue at most once per `interval` seconds, or earlier once `batch_size`
+    records are pending. Serialization and fsync run in a worker thread on a
+    snapshot of the queued records, so the gateway heartbeat never waits on disk.
+
+    With a `checkpoint` (checkpoint.IngestCheckpoint), the message-id marks seen
+    before a batch was taken are committed and saved only after that batch
+    is on disk.
+    """
+
+    def __init__(self, journal, records: Callable[[], list], interval: float = 5.0, batch_size: int = 500, sinks=None, checkpoint=None):
+        self.journal = journal
+        self.records = records  # callable → aktuális duty_log (tömörítéshez)
+        self.sinks = list(sinks or [])  # további célok upsert_many()-vel, pl. SqliteDutyStore
+        self.checkpoint = checkpoint  # üzenet-ID jel, csak sikeres kiírás után lép előre
+        self.interval = float(interval)
+        self.batch_size = max(1, int(batch_size))
+        self.pending: List[dict] = []
+        self.in_flight: List[dict] = []  # épp a worker szálon íródó köteg (a repository ezeket nem törli)
+        self.compact_requested = False
+        self.flushes = 0
+        self.last_flush = None
+        self._wake: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return self._task
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        return self._task
+
+    def mark_dirty(self, rec: Optional[dict] = None):
+        if rec is not None:
+            self.pending.append(rec)
+        if self._wake is not None and len(self.pending) >= self.batch_size:
+            self._wake.set()
+
+    def mark_dirty_many(self, recs: List[dict]):
+        """Egy köteg sorba állítása egy lépésben (process_duty_batch)."""
+        self.pending.extend(recs)
+        self.mark_dirty()
+
+    def request_compaction(self):
+        """A következő flush a teljes snapshotot is újraírja."""
+        self.compact_requested = True
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception(f"Write-behind mentés sikertelen: {e}")
+
+    async def flush(self):
+        async with self._lock:
+            # a köteggel együtt: az eddig látott üzenetek mind benne vannak (vagy már lemezen)
+            marks = self.checkpoint.pending() if self.checkpoint is not None else None
+            if not self.pending and not self.compact_requested:
+                if marks:
+                    await self._commit(marks)
+                return False
+            batch, self.pending = self.pending, []
+            compact = self.compact_requested or (
+                self.journal.journal_lines + len(batch) >= self.journal.compact_every
+            )
+            self.compact_requested = False
+            snapshot = list(self.records()) if compact else None
+            self.in_flight = batch
+            try:
+                await asyncio.to_thread(self._write, batch, snapshot)
+            except Exception:
+                # ne vesszen el semmi: a köteg visszakerül a sor elejére
+                self.pending[:0] = batch
+                self.compact_requested = self.compact_requested or compact
+                raise
+            finally:
+                self.in_flight = []
+            self.flushes += 1
+            self.last_flush = time.time()
+            if marks:
+                await self._commit(marks)
+            return True
+
+    async def _commit(self, marks):
+        if self.checkpoint.commit(marks):
+            await asyncio.to_thread(self.checkpoint.save)
+
+    def _write(self, batch: List[dict], snapshot: Optional[list]):
+        if snapshot is not None:
+            # a snapshot már tartalmazza a köteg rekordjait is
+            self.journal.compact(snapshot)
+        else:
+            self.journal.append_many(batch)
+            self.journal.sync()
+        for sink in self.sinks:
+            sink.upsert_many(batch)
+
+    async def close(self):
+        """Leállításkor: a háttértaszk leállítása és a függő rekordok kiírása."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._lock is not None:
+            await self.flush()
+        await asyncio.to_thread(self.journal.close)
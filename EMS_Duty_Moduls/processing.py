@@ -1,17 +1,160 @@
-import os, json, re, asyncio
+import os, json, asyncio
 from pathlib import Path
 import datetime as dtmod
-from typing import List
+from typing import List, Optional
 
 from . import state
+from .dutyparse import PARSER_VERSION, is_duty_title, make_person_key, normalize_person_name, parse_duty_embed
+from .ingest import BatchStats, ingest_batch, pages
+from .journal import DutyJournal
+from .repository import DutyRepository
+from .store import MemoryDutyStore
+from .timeutil import to_minutes
 
 DUTY_JSON = "duty_log.json"
+ROLLUP_JSON = "duty_rollup.json"
+CHECKPOINT_JSON = "duty_checkpoint.json"
+JOURNAL = DutyJournal(DUTY_JSON)
+
+
+def load_log():
+    """Snapshot + napló betöltése a state.duty_log-ba; a napi rollup feliratkozik (vagy már követi)."""
+    get_repository().load()
+    state.ROLLUP.attach(state.duty_log, ROLLUP_JSON)
+    state.SHIFTS.attach(state.duty_log)
+    state.ACTIVE.attach(state.duty_log)
+    state.CHECKPOINT.path = Path(CHECKPOINT_JSON)
+    state.CHECKPOINT.load()
+    return len(state.duty_log)
+
+
+def _backend():
+    # lekérdező backend; ha a core nem állított be mást, memória
+    if state.STORE is None:
+        state.STORE = MemoryDutyStore(lambda: state.duty_log)
+    return state.STORE
+
+
+def _unwritten():
+    # a persister sorában álló / épp íródó rekordok – külső újraírásnál sem törlődnek
+    p = state.PERSISTER
+    return (p.pending + p.in_flight) if p is not None else []
+
+
+def get_repository():
+    """A bot egyetlen duty-log repositoryja (state.REPO): memóriából olvas, a fájlok külső változását mtime / méret alapján követi."""
+    if state.REPO is None:
+        state.REPO = DutyRepository(lambda: JOURNAL, lambda: state.duty_log, _backend, pending=_unwritten)
+    return state.REPO
+
+
+def get_store():
+    """A parancsok által használt lekérdező felület (a repository, store API-val)."""
+    return get_repository()
+
+
+def get_shift_totals():
+    """Prefix-összeg index az intervallum-összesítésekhez (első híváskor felépül a duty_log-ból)."""
+    get_repository().ensure_fresh()
+    state.SHIFTS.attach(state.duty_log)
+    return state.SHIFTS
+
+
+def get_active():
+    """Élő szolgálati állapot (első híváskor felépül a duty_log-ból)."""
+    get_repository().ensure_fresh()
+    state.ACTIVE.attach(state.duty_log)
+    return state.ACTIVE
+
+
+def get_pacer():
+    """A history-olvasások közös ütemezője (pacing.HistoryPacer)."""
+    return state.PACER
+
+
+def _persister():
+    p = state.PERSISTER
+    return p if p is not None and p.running else None
+
 
 def save_log():
+    """Tömörítés: a teljes duty_log snapshotba írása, a napló ürítése.
+    Ha fut a write-behind persister, csak kéri a tömörítést (háttérszálon fut le).
+    """
     try:
-        sorted_log = sorted(state.duty_log, key=lambda x: x.get("timestamp", ""))
-        with open(DUTY_JSON, "w", encoding="utf-8") as f:
-            json.dump(sorted_log, f, ensure_ascii=False, indent=2)
+        state.ROLLUP.save()
+        state.CHECKPOINT.save()
+    except Exception:
+        pass
+    p = _persister()
+    if p is not None:
+        p.request_compaction()
+        return
+    try:
+        JOURNAL.compact(state.duty_log)
+    except Exception:
+        pass
+
+
+async def flush_pending():
+    """A persister sorában álló rekordok kiírása (lemezről olvasó lekérdezések előtt)."""
+    p = _persister()
+    if p is not None:
+        await p.flush()
+
+
+async def fresh_store():
+    """A lekérdező felület a persister sorának kiírása és a fájlváltozás-ellenőrzés után.
+
+    Sqlite backendnél (DUTY_STORE=sqlite) a rekordok csak a persister flush-ával
+    kerülnek a tükörbe; e nélkül a lekérdezés DUTY_FLUSH_INTERVAL mp-nyi friss
+    rekordot nem látna. Minden parancs ezen keresztül kér store-t.
+    """
+    await flush_pending()
+    repo = get_repository()
+    repo.ensure_fresh()
+    return repo
+
+
+async def commit_checkpoint():
+    """A látott üzenetek rekordjainak lemezre írása, utána a checkpoint léptetése és mentése."""
+    p = _persister()
+    if p is not None:
+        await p.flush()  # a flush commitolja a checkpointot
+        return
+    JOURNAL.sync()
+    state.CHECKPOINT.commit()
+    state.CHECKPOINT.save()
+
+
+def persist_record(rec: dict):
+    """Egy rekord mentése: persisterrel csak sorba áll, nélküle azonnal a naplóba kerül."""
+    p = _persister()
+    if p is not None:
+        p.mark_dirty(rec)
+        return
+    try:
+        JOURNAL.append(rec)
+        get_store().upsert_many([rec])
+        if JOURNAL.needs_compaction():
+            save_log()
+    except Exception:
+        pass
+
+
+def persist_records(recs: List[dict]):
+    """Egy köteg mentése egyszerre: persisterrel egy sorba állítás, nélküle egy napló-írás."""
+    if not recs:
+        return
+    p = _persister()
+    if p is not None:
+        p.mark_dirty_many(recs)
+        return
+    try:
+        JOURNAL.append_many(recs)
+        get_store().upsert_many(recs)
+        if JOURNAL.needs_compaction():
+            save_log()
     except Exception:
         pass
 
@@ -25,18 +168,8 @@ def deduplicate_log(logs: List[dict]) -> List[dict]:
     return list(seen.values())
 
 
-def normalize_person_name(name: str) -> str:
-    return re.sub(r"\s+", " ", (name or "").strip()).lower()
-
-
-def make_person_key(name_norm: str, fivem_name: str) -> str:
-    nn = (name_norm or "").strip().lower()
-    fv = (fivem_name or "").strip().lower()
-    return f"{nn}|{fv}"
-
-# Minimal process_duty_message – in modular setup, more features can be added
-
-def process_duty_message(msg, add_to_state=True):
+def parse_duty_message(msg) -> Optional[dict]:
+    """Duty-log embed → rekord (felvette / leadta); None, ha nem duty-kártya vagy nem értelmezhető."""
     # msg is a discord.Message-like object or a dict with embed
     try:
         embed = None
@@ -45,123 +178,74 @@ def process_duty_message(msg, add_to_state=True):
         elif isinstance(msg, dict):
             embed = msg.get('embed')
         else:
-            return False
-        title = (getattr(embed, 'title', None) or embed.get('title', '')).strip()
+            return None
+        if isinstance(embed, dict):
+            title, description = embed.get('title'), embed.get('description')
+        else:
+            title, description = getattr(embed, 'title', None), getattr(embed, 'description', None)
     except Exception:
+        return None
+    if not is_duty_title(title):
+        return None
+    if isinstance(msg, dict):
+        created_at, message_id = msg.get('created_at'), msg.get('id')
+    else:
+        created_at, message_id = getattr(msg, 'created_at', None), getattr(msg, 'id', None)
+    return parse_duty_embed(title, description, created_at, message_id)
+
+
+def process_duty_message(msg, add_to_state=True):
+    rec = parse_duty_message(msg)
+    if rec is None:
         return False
+    if add_to_state:
+        state.duty_log.upsert(rec)
+        persist_record(rec)
+    return True
 
-    # More complete detection: parse description for position and duration
-    if "felvette a szolgálatot" in title.lower():
-        # parse name and fivem
-        try:
-            name_part = title.split("(")[0].replace("**", "").strip()
-            fivem_part = title.split("(")[1].split(")")[0].strip()
-        except Exception:
-            return False
-        # description: may contain position line (e.g., 'Mentő - ...')
-        description = ""
-        try:
-            description = getattr(embed, 'description', None) or (embed.get('description') if isinstance(embed, dict) else "")
-        except Exception:
-            description = ""
-
-        position = ""
-        if description:
-            for raw in description.split("\n"):
-                line = raw.strip()
-                if line.startswith("Mentő"):
-                    position = line
-
-        # Prefer message.created_at if available
-        created_at = getattr(msg, 'created_at', None) or (msg.get('created_at') if isinstance(msg, dict) else None)
-        start_time = (created_at or dtmod.datetime.now()).strftime("%Y-%m-%d %H:%M")
-        name_norm = normalize_person_name(name_part)
-        person_key = make_person_key(name_norm, fivem_part)
-        rec = {
-            "message_id": getattr(msg, 'id', None) or msg.get('id'),
-            "name": name_part,
-            "name_norm": name_norm,
-            "fivem_name": fivem_part,
-            "position": position,
-            "person_key": person_key,
-            "start_time": start_time,
-            "timestamp": start_time,
-            "type": "felvette",
-        }
-        if add_to_state:
-            state.duty_log.append(rec)
-            state.duty_log[:] = deduplicate_log(state.duty_log)
-            save_log()
-        return True
-
-    if "leadta a szolgálatot" in title.lower():
-        # handle end
-        try:
-            name_part = title.split("(")[0].replace("**", "").strip()
-            fivem_part = title.split("(")[1].split(")")[0].strip()
-        except Exception:
-            return False
-        description = ""
-        try:
-            description = getattr(embed, 'description', None) or (embed.get('description') if isinstance(embed, dict) else "")
-        except Exception:
-            description = ""
-
-        position = ""
-        duration = 0
-        for raw in (description or "").split("\n"):
-            line = raw.strip()
-            if line.startswith("Mentő"):
-                position = line
-            m = re.search(r"szolgálatban töltött idő\s*[:\-]?\s*(\d+)\s*perc", line, flags=re.IGNORECASE)
-            if m:
-                duration = int(m.group(1))
-
-        end_dt = getattr(msg, 'created_at', None) or (msg.get('created_at') if isinstance(msg, dict) else None) or dtmod.datetime.now()
-        end_time = end_dt.strftime("%Y-%m-%d %H:%M")
-        start_time_val = end_dt - dtmod.timedelta(minutes=duration)
-        start_time = start_time_val.strftime("%Y-%m-%d %H:%M")
-        name_norm = normalize_person_name(name_part)
-        person_key = make_person_key(name_norm, fivem_part)
-        rec = {
-            "message_id": getattr(msg, 'id', None) or msg.get('id'),
-            "name": name_part,
-            "name_norm": name_norm,
-            "fivem_name": fivem_part,
-            "position": position,
-            "person_key": person_key,
-            "end_time": end_time,
-            "timestamp": end_time,
-            "type": "leadta",
-            "duration": duration,
-        }
-        if add_to_state:
-            state.duty_log.append(rec)
-            state.duty_log[:] = deduplicate_log(state.duty_log)
-            save_log()
-        return True
 
-    return False
+def process_duty_batch(messages, reparse=False) -> BatchStats:
+    """Egy history-oldal (legfeljebb 100 üzenet) feldolgozása egy lépésben, egyetlen mentéssel.
+    Az ismert message_id-kat (reparse nélkül) nem dolgozza fel újra.
+    """
+    return ingest_batch(state.duty_log, messages, parse_duty_message, persist_records, reparse=reparse)
+
+
+def ingest_message(msg) -> bool:
+    """Élő (gateway) duty-log üzenet feldolgozása és a checkpoint léptetése."""
+    ok = process_duty_message(msg)
+    channel = getattr(msg, "channel", None)
+    if channel is not None and getattr(msg, "id", None) is not None:
+        state.CHECKPOINT.advance(channel.id, msg.id)
+    return ok
+
+
+def resume_point(channel_id, fallback_days: int = 35):
+    """Honnan kell pótolni a history-t: a checkpoint üzenet-ID-ja, különben a legutolsó rekord ideje (üres naplónál `fallback_days` nap)."""
+    last_seen = state.CHECKPOINT.last_seen(channel_id)
+    # üres naplónál (pl. törölt duty_log.json) a checkpoint nem érvényes
+    if last_seen is not None and state.duty_log:
+        import discord
+        return discord.Object(id=last_seen)
+    latest = get_store().latest_timestamp()
+    if latest is None:
+        return dtmod.datetime.now(dtmod.timezone.utc) - dtmod.timedelta(days=fallback_days)
+    from .helpers import budapest_tz
+    return budapest_tz.localize(dtmod.datetime.strptime(latest, "%Y-%m-%d %H:%M"))
+
+
+def needs_reparse() -> bool:
+    """Az értelmező (PARSER_VERSION) változott a napló utolsó teljes feldolgozása óta: a teljes frissítés újraolvas."""
+    return bool(state.duty_log) and state.CHECKPOINT.parser_version != PARSER_VERSION
 
 
 def get_time_for_period(start_date, end_date):
     """Összesített szolgálati idők lekérése adott időintervallumra (percben).
     Returns a list of formatted strings "<name> – <position>: X óra Y perc" sorted by descending minutes.
+    A határon átnyúló műszakokból csak az intervallumba eső perceket számolja.
     """
-    summary = {}
-
-    for log in state.duty_log:
-        try:
-            ts = dtmod.datetime.strptime(log["timestamp"], "%Y-%m-%d %H:%M")
-            if start_date <= ts <= end_date:
-                name = log.get("name", "Ismeretlen")
-                position = log.get("position", "").replace("Mentő - ", "").strip()
-                duration = int(log.get("duration", 0))
-
-                key = f"{name} – {position}"
-                summary[key] = summary.get(key, 0) + duration
-        except Exception:
-            continue
+    totals = get_shift_totals().totals(to_minutes(start_date), to_minutes(end_date))
+    summary = {f"{name} – {position}": minutes for (name, position), minutes in totals.items()}
 
     sorted_summary = sorted(summary.items(), key=lambda x: x[1], reverse=True)
     results = []
@@ -172,17 +256,20 @@ def get_time_for_period(start_date, end_date):
     return results
 
 
-async def backfill_duty_messages(channel, after=None, max_messages=None):
-    """Beolvassa a duty channel history-ját és meghívja process_duty_message minden üzenetre.
-    `after` is a datetime or None, `max_messages` optionally limits how many messages to read.
+async def backfill_duty_messages(channel, after=None, max_messages=None, progress=None):
+    """Beolvassa a duty channel history-ját oldalanként, és process_duty_batch-csel dolgozza fel.
+    `after` is a datetime or None, `max_messages` optionally limits how many messages to read,
+    `progress` is an optional progress.ProgressReporter (edited status message).
+    A már ismert (duty_log-ban lévő) üzeneteket nem dolgozza fel újra.
     Returns processed count.
     """
-    processed = 0
-    processed_loop = 0
-    async for msg in channel.history(limit=max_messages or None, after=after):
-        process_duty_message(msg)
-        processed += 1
-        processed_loop += 1
-        if processed_loop % 50 == 0:
-            await asyncio.sleep(0.5)
-    return processed
+    stats = BatchStats()
+    async for page in pages(state.PACER.pace(channel.history(limit=max_messages or None, after=after))):
+        stats.add(process_duty_batch(page))
+        state.CHECKPOINT.advance(channel.id, stats.last_id)
+        if progress is not None:
+            await progress.update(stats.seen, stats.last_id)
+    await commit_checkpoint()
+    if progress is not None:
+        await progress.finish(f"kész ({stats.seen} üzenet, {stats})", only_if_shown=True)
+    return stats.seen
@@ -0,0 +1,130 @@
+import logging, time
+import datetime as dtmod
+from typing import Callable, Optional
+
+from .history import snowflake_at
+
+logger = logging.getLogger("EMS_DUTY_CORE")
+
+# Egyetlen, szerkesztett állapotüzenet hosszú beolvasásokhoz
+#
+# 50 / 200 üzenetenként új admin-üzenet helyett egy üzenetet küldünk, és azt
+# legfeljebb `interval` mp-enként szerkesztjük: feldolgozott darabszám,
+# üzenet/mp és becsült hátralévő idő. Az ETA a snowflake-ekből jön: a
+# beolvasott tartomány (kezdő és záró ID ideje) mekkora részén vagyunk túl az
+# utolsó üzenet ID-ja alapján – ismert darabszámnál (`total`) abból.
+
+
+def snowflake_of(value) -> Optional[int]:
+    """None / int / datetime / Snowflake-szerű (.id) → snowflake (datetime → az időpont első ID-ja)."""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, dtmod.datetime):
+        return snowflake_at(value)
+    return getattr(value, "id", None)
+
+
+def _format_eta(seconds: float) -> str:
+    seconds = int(max(0, seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}ó {seconds % 3600 // 60:02d}p"
+    return f"{seconds // 60}p {seconds % 60:02d}mp"
+
+
+class ProgressReporter:
+    """Owns one status message and edits it at most every `interval` seconds.
+
+    `begin()` posts it right away; otherwise the first `update()` after
+    `interval` seconds does, so short scans post nothing.
+    """
+
+    def __init__(
+        self,
+        target,
+        label: str,
+        start=None,
+        end=None,
+        total: Optional[int] = None,
+        interval: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.target = target  # csatorna / ctx (send()), None → csak napló
+        self.label = label
+        self.start_id = snowflake_of(start)
+        self.end_id = snowflake_of(end) if end is not None else snowflake_at(dtmod.datetime.now(dtmod.timezone.utc))
+        self.total = total
+        self.interval = float(interval)
+        self._clock = clock
+        self.started = clock()
+        self.processed = 0
+        self.last_id = None
+        self.message = None
+        self.edits = 0
+        self._last_edit = None
+
+    # ---------------- számítás ----------------
+
+    def fraction(self) -> Optional[float]:
+        """A kész rész aránya (0..1), vagy None, ha nem becsülhető."""
+        if self.total:
+            return min(1.0, self.processed / self.total)
+        if self.last_id is None or self.start_id is None or self.end_id is None:
+            return None
+        span = (self.end_id >> 22) - (self.start_id >> 22)
+        if span == 0:
+            return None
+        return min(1.0, max(0.0, ((self.last_id >> 22) - (self.start_id >> 22)) / span))
+
+    def render(self, final: Optional[str] = None) -> str:
+        elapsed = max(1e-9, self._clock() - self.started)
+        rate = self.processed / elapsed
+        if final is not None:
+            return f"```diff\n+ [OK] {self.label}: {final} ({self.processed} üzenet, {elapsed:.1f} s, {rate:.0f} üzenet/s)\n```"
+        parts = [f"{self.processed} üzenet", f"{rate:.0f} üzenet/s"]
+        done = self.fraction()
+        if done is not None:
+            parts.append(f"{done * 100:.0f}%")
+            if done > 0:
+                parts.append(f"ETA {_format_eta(elapsed * (1 - done) / done)}")
+        return f"```diff\n- [INFO] {self.label}: " + " | ".join(parts) + "\n```"
+
+    # ---------------- üzenet ----------------
+
+    async def _show(self, text: str):
+        self._last_edit = self._clock()
+        if self.target is None:
+            logger.info(text.strip("`\n"))
+            return
+        try:
+            if self.message is None:
+                self.message = await self.target.send(text)
+            else:
+                await self.message.edit(content=text)
+                self.edits += 1
+        except Exception as e:
+            # az állapotüzenet hibája nem állíthatja meg a beolvasást
+            logger.warning(f"[PROGRESS] Állapotüzenet frissítése sikertelen: {e}")
+
+    async def begin(self):
+        await self._show(self.render())
+
+    async def update(self, processed: Optional[int] = None, last_id=None, step: int = 1):
+        """Előrehaladás jelzése (darabszám vagy +step); a szerkesztés legfeljebb `interval`-onként."""
+        self.processed = processed if processed is not None else self.processed + step
+        if last_id is not None:
+            self.last_id = snowflake_of(last_id)
+        # az első állapotüzenet csak `interval` után jelenik meg: rövid beolvasásnál egy sem
+        since = self._last_edit if self._last_edit is not None else self.started
+        if self._clock() - since >= self.interval:
+            await self._show(self.render())
+
+    async def finish(self, text: str = "kész", only_if_shown: bool = False):
+        """Záró állapot; `only_if_shown` esetén csak egy már kint lévő állapotüzenetet ír át."""
+        if only_if_shown and self.message is None:
+            return
+        await self._show(self.render(final=text))
+
+    async def fail(self, text: str):
+        await self._show(f"```diff\n- [HIBA] {self.label}: {text} ({self.processed} üzenet után)\n```")
@@ -0,0 +1,135 @@
+import sys
+from typing import Optional
+
+from .timeutil import format_minutes, parse_minutes
+
+# Kompakt duty rekord
+#
+# A duty_log eddig 9–11 kulcsos dict-ekből állt, amelyek ugyanazokat a név-,
+# rang- és FiveM-stringeket ezerszer ismételték, az időpontokat pedig
+# "%Y-%m-%d %H:%M" szövegként tárolták. A DutyRecord __slots__ alapú: a
+# szöveges mezők internáltak (egy példány / érték), az időpontok egész
+# "falióra-percek" (helyi idő, 1970-01-01 00:00-tól), a JSON alak pedig
+# veszteségmentesen visszaállítható (kulcssorrenddel együtt).
+
+_STR_FIELDS = ("name", "name_norm", "fivem_name", "position", "person_key", "type", "discord_id")
+_SLOT_FIELDS = frozenset(_STR_FIELDS + ("message_id", "duration"))
+_TIME_FIELDS = {"start_time": "start_min", "end_time": "end_min", "timestamp": "ts_min"}
+TIME_SLOTS = _TIME_FIELDS  # JSON időmező → perc-slot (lekérdezésekhez)
+_LAYOUTS = {}
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class DutyRecord:
+    """One duty_log entry with attribute access and a read-only dict-like view.
+
+    `rec.name`, `rec.position`, `rec.duration`, `rec.ts_min` … for new code;
+    `rec.get("timestamp")`, `rec["type"]`, `"end_time" in rec` keep old dict
+    consumers working. `to_dict()` gives back the exact JSON shape.
+    """
+
+    __slots__ = (
+        "message_id", "name", "name_norm", "fivem_name", "position", "person_key", "type",
+        "discord_id", "duration", "start_min", "end_min", "ts_min", "extra", "_layout",
+    )
+
+    def __init__(self):
+        for slot in DutyRecord.__slots__:
+            object.__setattr__(self, slot, None)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DutyRecord":
+        if isinstance(data, DutyRecord):
+            return data
+        rec = cls()
+        extra = None
+        for key, value in data.items():
+            if key in _TIME_FIELDS:
+                minutes = parse_minutes(value)
+                if minutes is not None:
+                    setattr(rec, _TIME_FIELDS[key], minutes)
+                    continue
+            elif key in _SLOT_FIELDS:
+                setattr(rec, key, _intern(value) if key in _STR_FIELDS else value)
+                continue
+            # ismeretlen kulcs vagy nem szabványos időpont: változatlanul megmarad
+            if extra is None:
+                extra = {}
+            extra[key] = value
+        rec.extra = extra
+        layout = tuple(data.keys())
+        rec._layout = _LAYOUTS.setdefault(layout, layout)
+        return rec
+
+    # ---------------- szöveges időmezők ----------------
+
+    @property
+    def timestamp(self) -> Optional[str]:
+        return self.get("timestamp")
+
+    @property
+    def start_time(self) -> Optional[str]:
+        return self.get("start_time")
+
+    @property
+    def end_time(self) -> Optional[str]:
+        return self.get("end_time")
+
+    # ---------------- dict-kompatibilis nézet ----------------
+
+    def _value(self, key):
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        slot = _TIME_FIELDS.get(key)
+        if slot is not None:
+            minutes = getattr(self, slot)
+            return format_minutes(minutes) if minutes is not None else None
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        if key not in self._layout:
+            return default
+        return self._value(key)
+
+    def __getitem__(self, key):
+        if key not in self._layout:
+            raise KeyError(key)
+        return self._value(key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._layout
+
+    def keys(self):
+        return self._layout
+
+    def items(self):
+        return [(k, self._value(k)) for k in self._layout]
+
+    def to_dict(self) -> dict:
+        return {k: self._value(k) for k in self._layout}
+
+    def __eq__(self, other):
+        if isinstance(other, DutyRecord):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"DutyRecord({self.to_dict()!r})"
+
+
+def as_record(rec) -> DutyRecord:
+    return rec if isinstance(rec, DutyRecord) else DutyRecord.from_dict(rec)
+
+
+def to_plain(obj):
+    """json.dump(default=...) hook: DutyRecord → eredeti JSON alak."""
+    if isinstance(obj, DutyRecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,139 @@
+import os, time, logging
+from typing import Callable, Iterable, List, Optional
+
+from .records import as_record
+from .store import record_key
+
+logger = logging.getLogger("EMS_DUTY_CORE")
+
+# A bot egyetlen duty-log repositoryja (state.REPO / a monolitban DUTY_REPO)
+#
+# Minden parancs ezen keresztül kérdez: az olvasás a memóriából megy (DutyLog +
+# a rá feliratkozott rollup / shift / active nézetek, a lekérdező backend a
+# store.py memória- vagy sqlite-tükre). Lekérdezés előtt, legfeljebb
+# DUTY_REPO_CHECK_INTERVAL mp-enként, a duty_log.json / duty_log.jsonl
+# (mtime, méret) adatát összevetjük azzal, amit a saját írásaink után várunk
+# (journal.external_change):
+#   - a naplóhoz más is hozzáírt → csak az új sorokat olvassuk be (upsert),
+#   - a snapshot cserélődött / a napló rövidült (offline újraépítés, másik
+#     folyamat tömörítése, kézi szerkesztés) → a fájl tartalmát a memóriával
+#     összevetve csak a változott rekordokat írjuk át, a hiányzókat töröljük
+#     (a persister sorában várók kivételével).
+# A nézetek listenerként követik a változást, így egyik parancs sem parse-olja
+# újra a teljes fájlt.
+
+
+class DutyRepository:
+    """Single in-memory duty-log repository, validated against the on-disk files by mtime / size.
+
+    `journal`, `log`, `backend` and `pending` are callables so the repository
+    always works on the current objects (tests swap them out).
+    """
+
+    def __init__(
+        self,
+        journal: Callable,
+        log: Callable,
+        backend: Callable,
+        pending: Optional[Callable[[], Iterable[dict]]] = None,
+        check_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.journal = journal
+        self.log = log
+        self.backend = backend
+        self.pending = pending or (lambda: ())  # még ki nem írt rekordok (persister sora)
+        self.check_interval = float(check_interval if check_interval is not None else os.getenv("DUTY_REPO_CHECK_INTERVAL", "2"))
+        self._clock = clock
+        self._next_check = 0.0
+        self.reloads = 0  # külső változás miatti frissítések
+        self.applied = 0  # ezekben átírt / törölt rekordok
+
+    # ---------------- betöltés / frissesség ----------------
+
+    def load(self) -> int:
+        """Teljes betöltés induláskor (snapshot + napló); utána csak a változások jönnek."""
+        self.log().replace_all(self.journal().load())
+        self._next_check = self._clock() + self.check_interval
+        return len(self.log())
+
+    def refresh(self) -> int:
+        """Külső fájlváltozás keresése és alkalmazása most; a módosított rekordok száma."""
+        self._next_check = self._clock() + self.check_interval
+        journal = self.journal()
+        change = journal.external_change()
+        if change is None:
+            return 0
+        log = self.log()
+        if change == "append":
+            records = journal.read_appended()
+            log.upsert_many(records)
+            self.backend().upsert_many(records)
+            changed = len(records)
+        else:
+            changed = self._apply_rewrite(log, journal.load(repair=False))
+        self.reloads += 1
+        self.applied += changed
+        logger.info(f"duty_log külső változás ({change}): {changed} rekord frissítve a memóriában")
+        return changed
+
+    def _apply_rewrite(self, log, records: List[dict]) -> int:
+        on_disk = {record_key(r): r for r in records}
+        keep = {record_key(r) for r in self.pending()}
+        changed = 0
+        for key in [record_key(r) for r in log]:
+            if key not in on_disk and key not in keep:
+                log.remove(key)
+                changed += 1
+        for key, rec in on_disk.items():
+            if key in keep:
+                continue  # a memóriabeli (újabb) változat marad, a persister kiírja
+            rec = as_record(rec)
+            current = log.get(key)
+            if current is None or current.to_dict() != rec.to_dict():
+                log.upsert(rec)
+                changed += 1
+        if changed:
+            self.backend().sync_from(log)
+        return changed
+
+    def ensure_fresh(self):
+        if self._clock() >= self._next_check:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"duty_log fájlváltozás ellenőrzése sikertelen: {e}")
+
+    # ---------------- lekérdezés (store API) ----------------
+
+    def between(self, start=None, end=None, field: str = "timestamp", include_end: bool = False) -> List[dict]:
+        self.ensure_fresh()
+        return self.backend().between(start, end, field=field, include_end=include_end)
+
+    def for_person(self, name_norm: Optional[str] = None, person_key: Optional[str] = None) -> List[dict]:
+        self.ensure_fresh()
+        return self.backend().for_person(name_norm=name_norm, person_key=person_key)
+
+    def latest_timestamp(self) -> Optional[str]:
+        self.ensure_fresh()
+        return self.backend().latest_timestamp()
+
+    def count(self) -> int:
+        self.ensure_fresh()
+        return self.backend().count()
+
+    # írások: a backendé (a duty_log-ot a hívó frissíti, a fájlokat a journal / persister)
+    def upsert_many(self, recs: Iterable[dict]):
+        self.backend().upsert_many(recs)
+
+    def clear(self):
+        self.backend().clear()
+
+    def sync_from(self, records: Iterable[dict]):
+        self.backend().sync_from(records)
+
+    def close(self):
+        self.backend().close()
+
+    def stats(self) -> str:
+        return f"{len(self.log())} rekord, {self.reloads} külső frissítés ({self.applied} rekord)"
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+bench_ingest.py — a beolvasási utak mérése élő guild nélkül: a valódi parancskód
+(!frissites teljes / normál, !jelen frissit, !betoppano_export) fut egy helyi
+FakeChannel ellen (EMS_Duty_Moduls/fakediscord.py), ideiglenes könyvtárban.
+Használat:
+  python EMS_Duty_Moduls/scripts/bench_ingest.py [--messages 20000] [--latency 0.05] [--rate-limit-every 0]
+  python EMS_Duty_Moduls/scripts/bench_ingest.py --dumps 'riports/sniff_duty_*.json'
+"""
+import os
+import sys
+import glob
+import time
+import asyncio
+import argparse
+import tempfile
+import datetime as dtmod
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO))
+
+from EMS_Duty_Moduls import helpers, processing, state  # noqa: E402
+from EMS_Duty_Moduls.commands.betoppano_export import BetoppanoExportCog  # noqa: E402
+from EMS_Duty_Moduls.commands.frissites import FrissitesCog  # noqa: E402
+from EMS_Duty_Moduls.commands.jelen import JelenCog  # noqa: E402
+from EMS_Duty_Moduls.fakediscord import FakeBot, FakeChannel, FakeContext, messages_from_dumps, synthetic_messages  # noqa: E402
+from EMS_Duty_Moduls.journal import DutyJournal  # noqa: E402
+from EMS_Duty_Moduls.pacing import HistoryPacer, install_rate_limit_tap  # noqa: E402
+
+DUTY_CHANNEL_ID = 1349829361649324173
+BETOPPANO_CHANNEL_ID = 1280885410960113768  # a betoppano_export beégetett csatornája
+
+
+async def measure(label, channel, coro, results):
+    served0, pages0, limits0, times0 = channel.served, channel.page_requests, channel.rate_limits, len(channel.page_times)
+    t0 = time.perf_counter()
+    await coro
+    took = time.perf_counter() - t0
+    times = sorted(channel.page_times[times0:])
+    pages = channel.page_requests - pages0
+    p = (lambda q: times[min(len(times) - 1, int(q * len(times)))] * 1000) if times else (lambda q: 0.0)
+    results.append((label, channel.served - served0, pages, channel.rate_limits - limits0, took, p(0.5), p(0.95)))
+
+
+async def run(args, corpus, extra):
+    duty = FakeChannel(corpus, id=DUTY_CHANNEL_ID, page_latency=args.latency, jitter=args.jitter,
+                       rate_limit_every=args.rate_limit_every, retry_after=args.retry_after)
+    betoppano = FakeChannel(synthetic_messages(len(corpus), seed=1), id=BETOPPANO_CHANNEL_ID, name="betoppanó",
+                            page_latency=args.latency, jitter=args.jitter)
+    admin = FakeChannel(id=int(os.getenv("ADMIN_CHANNEL_ID", "2")), name="admin")
+    bot = FakeBot(duty, betoppano, admin)
+    ctx = FakeContext(admin)
+    frissites = FrissitesCog(bot, state, helpers)
+    jelen = JelenCog(bot, state, helpers)
+    export = BetoppanoExportCog(bot, state, helpers)
+
+    results = []
+    await measure("!frissites teljes", duty, frissites.run_frissites_core(full_mode=True, ctx=ctx), results)
+    duty.extend(extra)
+    await measure("!frissites normál", duty, frissites.run_frissites_core(full_mode=False, ctx=ctx), results)
+    await measure("!jelen frissit", duty, jelen.jelen.callback(jelen, ctx, "frissit"), results)
+    await measure("!betoppano_export", betoppano, export.betoppano_export.callback(export, ctx), results)
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=20000, help="szintetikus korpusz mérete")
+    ap.add_argument("--dumps", default=None, help="felvett korpusz (glob), pl. 'riports/sniff_duty_*.json'")
+    ap.add_argument("--new", type=int, default=500, help="új üzenetek a normál frissítéshez")
+    ap.add_argument("--latency", type=float, default=0.05, help="oldal-késleltetés (s)")
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--rate-limit-every", type=int, default=0, help="minden N. oldalkérés 429")
+    ap.add_argument("--retry-after", type=float, default=1.0)
+    ap.add_argument("--rate", type=float, default=50.0, help="pacer kezdő / max oldal/mp")
+    args = ap.parse_args()
+
+    now = dtmod.datetime.now(dtmod.timezone.utc)
+    if args.dumps:
+        corpus = messages_from_dumps(sorted(glob.glob(str(REPO / args.dumps))) or sorted(glob.glob(args.dumps)))
+        extra = []
+    else:
+        # a korpusz a jelenig tart (a !jelen frissit az utolsó 2 napot olvassa)
+        corpus = synthetic_messages(args.messages + args.new, start=now - dtmod.timedelta(seconds=310 * (args.messages + args.new)))
+        corpus, extra = corpus[:args.messages], corpus[args.messages:]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.environ["DUTY_LOG_CHANNEL_ID"] = str(DUTY_CHANNEL_ID)
+        os.environ.setdefault("PROGRESS_INTERVAL", "5")
+        processing.JOURNAL = DutyJournal(Path(tmp) / "duty_log.json")
+        processing.load_log()
+        state.PACER = HistoryPacer(rate=args.rate, burst=args.rate, max_rate=args.rate)
+        install_rate_limit_tap(state.PACER)
+        results = asyncio.run(run(args, corpus, extra))
+        processing.JOURNAL.close()
+
+    print(f"korpusz: {len(corpus)} üzenet, oldal-késleltetés {args.latency * 1000:.0f} ms, 429 minden {args.rate_limit_every or '-'}. oldalon")
+    print(f"{'parancs':<22}{'üzenet':>8}{'oldal':>7}{'429':>5}{'idő s':>8}{'üzenet/s':>10}{'p50 ms':>8}{'p95 ms':>8}")
+    for label, count, pages, limits, took, p50, p95 in results:
+        print(f"{label:<22}{count:>8}{pages:>7}{limits:>5}{took:>8.2f}{count / took:>10.0f}{p50:>8.1f}{p95:>8.1f}")
+    print(f"duty_log: {len(state.duty_log)} rekord, pacer: {state.PACER.stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
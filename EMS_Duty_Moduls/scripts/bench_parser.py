@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+bench_parser.py — duty-kártya értelmezés mérése a valódi mintákon (riports/sniff_duty_*.json):
+régi (soronkénti split + le nem fordított re.search) vs. közös, előre fordított dutyparse.
+A két út kimenetét össze is veti; eltérésnél 1-gyel lép ki.
+Használat:
+  python EMS_Duty_Moduls/scripts/bench_parser.py [--samples 'riports/sniff_duty_*.json'] [--repeat 20]
+"""
+import re
+import sys
+import time
+import argparse
+import datetime as dtmod
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO))
+
+import json  # noqa: E402
+
+from EMS_Duty_Moduls.dutyparse import budapest_tz, make_person_key, normalize_person_name, parse_duty_embed  # noqa: E402
+
+
+# ---- régi út: a monolit parse_duty_message törzse (embed-mezőkre bontva) ----
+
+def old_parse(title, description, created_at, message_id):
+    title = (title or "").strip()
+    description = description or ""
+    if "felvette a szolgálatot" in title.lower():
+        try:
+            name_part = title.split("(")[0].replace("**", "").strip()
+            fivem_part = title.split("(")[1].split(")")[0].strip()
+        except Exception:
+            return None
+        position = ""
+        for raw in description.split("\n"):
+            line = raw.strip()
+            if line.startswith("Mentő"):
+                position = line
+        start_time = created_at.astimezone(budapest_tz)
+        name_norm = normalize_person_name(name_part)
+        return {
+            "message_id": message_id, "name": name_part, "name_norm": name_norm, "fivem_name": fivem_part,
+            "person_key": make_person_key(name_norm, fivem_part), "position": position,
+            "start_time": start_time.strftime("%Y-%m-%d %H:%M"), "timestamp": start_time.strftime("%Y-%m-%d %H:%M"),
+            "type": "felvette",
+        }
+    if "leadta a szolgálatot" not in title.lower():
+        return None
+    try:
+        name_part = title.split("(")[0].replace("**", "").strip()
+        fivem_part = title.split("(")[1].split(")")[0].strip()
+    except Exception:
+        return None
+    position = ""
+    duration = 0
+    for raw in description.split("\n"):
+        line = raw.strip()
+        if line.startswith("Mentő"):
+            position = line
+        m = re.search(r"szolgálatban töltött idő\s*[:\-]?\s*(\d+)\s*perc", line, flags=re.IGNORECASE)
+        if m:
+            duration = int(m.group(1))
+    end_time = created_at.astimezone(budapest_tz)
+    start_time = end_time - dtmod.timedelta(minutes=duration)
+    name_norm = normalize_person_name(name_part)
+    return {
+        "message_id": message_id, "name": name_part, "name_norm": name_norm, "fivem_name": fivem_part,
+        "person_key": make_person_key(name_norm, fivem_part), "position": position, "duration": duration,
+        "start_time": start_time.strftime("%Y-%m-%d %H:%M"), "end_time": end_time.strftime("%Y-%m-%d %H:%M"),
+        "timestamp": end_time.strftime("%Y-%m-%d %H:%M"), "type": "leadta",
+    }
+
+
+def load_samples(pattern):
+    samples = []
+    for path in sorted(REPO.glob(pattern)):
+        for row in json.loads(path.read_text(encoding="utf-8")):
+            embed = (row.get("embeds") or [{}])[0]
+            samples.append((
+                embed.get("title"),
+                embed.get("description"),
+                dtmod.datetime.fromisoformat(row["timestamp"]),
+                row["id"],
+            ))
+    return samples
+
+
+def bench(fn, samples, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for s in samples:
+            fn(*s)
+        took = time.perf_counter() - t0
+        best = took if best is None else min(best, took)
+    return best / len(samples) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--samples", default="riports/sniff_duty_*.json")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    samples = load_samples(args.samples)
+    if not samples:
+        print(f"Nincs minta: {args.samples}")
+        return 1
+    # nem duty-kártyák (pl. más bot üzenetei a csatornán): a gyors elutasítás mérése
+    others = [(f"Napi jelentés #{i}", "Összesítés\nnincs szolgálat", s[2], s[3]) for i, s in enumerate(samples)]
+
+    mismatches = [s for s in samples if old_parse(*s) != parse_duty_embed(*s)]
+    parsed = sum(1 for s in samples if parse_duty_embed(*s) is not None)
+    print(f"minták: {len(samples)} ({parsed} duty-kártya), eltérés: {len(mismatches)}")
+    for s in mismatches[:5]:
+        print("  ELTÉR:", s[0], "|", s[1])
+
+    print(f"{'eset':<22}{'régi µs/db':>12}{'új µs/db':>12}{'gyorsulás':>12}")
+    for label, rows in (("duty-kártyák", samples), ("nem duty-kártyák", others)):
+        old_us = bench(old_parse, rows, args.repeat)
+        new_us = bench(parse_duty_embed, rows, args.repeat)
+        print(f"{label:<22}{old_us:>12.2f}{new_us:>12.2f}{old_us / new_us:>11.1f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
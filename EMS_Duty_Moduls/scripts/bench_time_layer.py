@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+bench_time_layer.py — riport-lekérdezések mérése: régi (strptime minden rekordon)
+vs. új (egyszer parse-olt falióra-percek) időkezelés.
+Használat:
+  python EMS_Duty_Moduls/scripts/bench_time_layer.py [--log duty_log.json] [--repeat 20] [--scale 1]
+"""
+import sys
+import time
+import argparse
+import datetime as dtmod
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO))
+
+import pytz  # noqa: E402
+
+from EMS_Duty_Moduls.dutylog import DutyLog  # noqa: E402
+from EMS_Duty_Moduls.journal import DutyJournal  # noqa: E402
+from EMS_Duty_Moduls.store import MemoryDutyStore  # noqa: E402
+from EMS_Duty_Moduls.timeutil import MINUTES_PER_DAY, date_of, minutes_of  # noqa: E402
+
+budapest_tz = pytz.timezone("Europe/Budapest")
+FMT = "%Y-%m-%d %H:%M"
+
+
+# ---- régi út: a korábbi parancsok hurkai ----
+
+def old_weekly(raw, het_kezdete, het_vege):
+    totals = {}
+    for entry in raw:
+        if "duration" not in entry:
+            continue
+        ts = dtmod.datetime.strptime(entry["timestamp"], FMT).replace(tzinfo=budapest_tz)
+        if het_kezdete <= ts < het_vege:
+            totals[entry.get("name_norm")] = totals.get(entry.get("name_norm"), 0) + int(entry.get("duration", 0))
+    return totals
+
+
+def old_daily(raw):
+    days = {}
+    for r in raw:
+        if "end_time" not in r:
+            continue
+        day = dtmod.datetime.strptime(r["end_time"], FMT).replace(tzinfo=budapest_tz).date()
+        days[day] = days.get(day, 0) + int(r.get("duration", 0))
+    return days
+
+
+def old_jelen(raw, now):
+    recent = []
+    for days in (2, 5):
+        cutoff = now - dtmod.timedelta(days=days)
+        recent = [r for r in raw if dtmod.datetime.strptime(r["timestamp"], FMT).replace(tzinfo=budapest_tz) >= cutoff]
+        if recent:
+            break
+    return recent
+
+
+# ---- új út: perc-mezők ----
+
+def new_weekly(store, het_kezdete, het_vege):
+    lo, hi = minutes_of(het_kezdete), minutes_of(het_vege)
+    totals = {}
+    for entry in store.between(lo, hi):
+        if "duration" in entry:
+            totals[entry.name_norm] = totals.get(entry.name_norm, 0) + int(entry.duration or 0)
+    return totals
+
+
+def new_daily(log):
+    days = {}
+    for r in log:
+        if r.end_min is not None:
+            day = date_of(r.end_min)
+            days[day] = days.get(day, 0) + int(r.duration or 0)
+    return days
+
+
+def new_jelen(store, now):
+    now_min = minutes_of(now)
+    wide = store.between(now_min - 5 * MINUTES_PER_DAY, None)
+    return [e for e in wide if e.ts_min >= now_min - 2 * MINUTES_PER_DAY] or wide
+
+
+def bench(label, fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    print(f"  {label:<28} {best * 1000:9.2f} ms")
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark: strptime vs. cached epoch-minute time layer")
+    parser.add_argument("--log", type=str, default=str(REPO / "duty_log.json"), help="duty_log snapshot")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--scale", type=int, default=1, help="a rekordok sokszorozása (nagyobb naplóhoz)")
+    args = parser.parse_args()
+
+    raw = [r for r in DutyJournal(args.log).load(repair=False) if r.get("timestamp")]
+    if args.scale > 1:
+        raw = [dict(r, message_id=(r.get("message_id") or 0) * args.scale + i) for i in range(args.scale) for r in raw]
+    t0 = time.perf_counter()
+    log = DutyLog(raw)
+    print(f"{len(log)} rekord, betöltés + normalizálás: {(time.perf_counter() - t0) * 1000:.1f} ms")
+    store = MemoryDutyStore(lambda: log)
+
+    last = dtmod.datetime.strptime(raw[-1]["timestamp"], FMT).replace(tzinfo=budapest_tz)
+    het_vege = last.replace(hour=0, minute=0)
+    het_kezdete = het_vege - dtmod.timedelta(days=7)
+
+    for name, old, new in (
+        ("heti összesítés", lambda: old_weekly(raw, het_kezdete, het_vege), lambda: new_weekly(store, het_kezdete, het_vege)),
+        ("napi bontás", lambda: old_daily(raw), lambda: new_daily(log)),
+        ("jelen (2/5 napos ablak)", lambda: old_jelen(raw, last), lambda: new_jelen(store, last)),
+    ):
+        print(name)
+        t_old = bench("régi (strptime)", old, args.repeat)
+        t_new = bench("új (falióra-perc)", new, args.repeat)
+        print(f"  gyorsulás: {t_old / t_new:.1f}x")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+rebuild_offline.py — duty_log.json újraépítése hálózat nélkül a lemezen lévő dumpokból
+(riports/sniff_duty_*.json|txt, exports/sniff_duty.json, raw_sniff.log).
+Alapból a meglévő duty_log (snapshot + napló) rekordjai megmaradnak, a dumpok csak
+hozzáadnak / felülírnak; a checkpoint ilyenkor nem mozdul.
+--replace: a duty_log csak a dumpok tartalma lesz; a checkpoint a legrégebbi újraépített
+üzenetig áll vissza, így a bot onnantól a dumpok közti hézagokat is újraolvassa a Discordról.
+A régi snapshot és napló mindkét módban .bak néven megmarad.
+A duty_rollup.json és a duty_log.sqlite3 tükör törlődik – induláskor a duty_log-ból épülnek újra.
+Használat (a bot munkakönyvtárából):
+  python EMS_Duty_Moduls/scripts/rebuild_offline.py [dump ...] [--replace] [--workers N] [--dry-run]
+"""
+import sys
+import glob
+import time
+import shutil
+import argparse
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO))
+
+from EMS_Duty_Moduls.checkpoint import IngestCheckpoint  # noqa: E402
+from EMS_Duty_Moduls.dutyparse import PARSER_VERSION  # noqa: E402
+from EMS_Duty_Moduls.journal import DutyJournal  # noqa: E402
+from EMS_Duty_Moduls.offline import rebuild_from_dumps  # noqa: E402
+
+DEFAULT_DUMPS = ("riports/sniff_duty_*.json", "riports/sniff_duty_*.txt", "exports/sniff_duty*.json", "raw_sniff.log")
+
+
+def _backup(path: Path):
+    if path.exists():
+        backup = path.with_name(path.name + ".bak")
+        shutil.copy2(path, backup)
+        print(f"Régi fájl: {backup}")
+
+
+def _drop_derived(*paths):
+    # a duty_log-ból származó táblák: a régi tartalmuk már nem érvényes
+    for path in map(Path, paths):
+        for p in (path, path.with_name(path.name + "-wal"), path.with_name(path.name + "-shm")):
+            if p.exists():
+                p.unlink()
+                print(f"Törölve (induláskor újraépül): {p}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("dumps", nargs="*", help="dump fájlok / glob minták (alapból: " + ", ".join(DEFAULT_DUMPS) + ")")
+    ap.add_argument("--out", default="duty_log.json")
+    ap.add_argument("--checkpoint", default="duty_checkpoint.json")
+    ap.add_argument("--rollup", default="duty_rollup.json")
+    ap.add_argument("--sqlite", default="duty_log.sqlite3")
+    ap.add_argument("--replace", action="store_true", help="a duty_log csak a dumpok tartalma lesz (a meglévő rekordok elvesznek)")
+    ap.add_argument("--workers", type=int, default=None, help="értelmező processzek száma (alapból CPU-szám)")
+    ap.add_argument("--dry-run", action="store_true", help="csak statisztika, nem ír")
+    args = ap.parse_args(argv)
+
+    paths = sorted({p for pattern in (args.dumps or DEFAULT_DUMPS) for p in glob.glob(pattern)})
+    if not paths:
+        print("Nincs dump fájl.")
+        return 1
+
+    journal = DutyJournal(args.out)
+    existing = [] if args.replace else journal.load()
+    t0 = time.perf_counter()
+    records, stats = rebuild_from_dumps(paths, workers=args.workers, existing=existing)
+    took = time.perf_counter() - t0
+    print(f"{stats['files']} dump, {stats['parsed']} duty-kártya, {stats['skipped']} egyéb sor, "
+          f"{stats['duplicates']} ismétlődés → {stats['records']} rekord ({took:.2f} s)")
+    if args.dry_run or not records:
+        return 0 if records else 1
+
+    _backup(journal.snapshot_path)
+    _backup(journal.journal_path)
+    journal.compact(records)
+    journal.close()
+    _drop_derived(args.rollup, args.sqlite)
+
+    checkpoint = IngestCheckpoint(args.checkpoint)
+    if args.replace:
+        # a dumpok közti hézagok a legrégebbi újraépített üzenettől pótlódnak
+        first_id = min((r["message_id"] for r in records if r.get("message_id")), default=None)
+        if first_id is not None and checkpoint.rewind(first_id):
+            print(f"Checkpoint visszaállítva: {first_id}")
+        # minden rekord a mostani értelmezővel készült (összefésülésnél a régiek nem)
+        checkpoint.set_parser_version(PARSER_VERSION)
+    checkpoint.save()
+    print(f"Mentve: {journal.snapshot_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
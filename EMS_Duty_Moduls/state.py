@@ -1,11 +1,44 @@
 from pathlib import Path
 
+from .dutylog import DutyLog
+from .filestore import JsonFileStore
+from .active import ActiveDuty
+from .checkpoint import IngestCheckpoint
+from .intervals import ShiftTotals
+from .loopmon import LoopLagMonitor
+from .metrics import CommandMetrics
+from .pacing import HistoryPacer
+from .rollup import DutyRollup
+
 # Shared application state
 ROOT = Path("/volume1/homes/Attila_NAS_System/EMS_Duty")
-# duty_log: in-memory list of processed duty entries
-duty_log = []
+# duty_log: in-memory, message_id-indexed, time-ordered duty entries (dutylog.DutyLog)
+duty_log = DutyLog()
+# ROLLUP: percek (személy, nap) / (rang, nap) szerint, a duty_log listenereként frissül
+ROLLUP = DutyRollup()
+# SHIFTS: (név, rang) szerinti prefix-összeg index a tetszőleges intervallumú összesítésekhez
+SHIFTS = ShiftTotals()
+# ACTIVE: élő szolgálati állapot (person_key → utolsó felvette/leadta), a !jelen ebből válaszol
+ACTIVE = ActiveDuty()
+# CHECKPOINT: utolsó feldolgozott duty-log üzenet csatornánként (az on_message élő beolvasása lépteti)
+CHECKPOINT = IngestCheckpoint()
+# PACER: közös, adaptív token bucket a channel.history() oldal-kérésekhez (429 esetén lassít)
+PACER = HistoryPacer()
+# METRICS: parancsonkénti késleltetés-hisztogramok (a core köti be a bot parancs-eseményeire)
+METRICS = CommandMetrics()
+# LOOPMON: event loop késés-figyelő (a core setup_hook-ja indítja); blokkoláskor a loop stackjét logolja
+LOOPMON = LoopLagMonitor(running=METRICS.running)
+# FILES: JSON fájlok olvasása / atomikus írása szálkészletben, mtime szerinti gyorsítótárral
+FILES = JsonFileStore()
 EMS_PEOPLE = {}
 BOT = None
+# PERSISTER: write-behind duty_log mentő (persister.WriteBehindPersister), a core indítja
+PERSISTER = None
+# STORE: duty-log lekérdező backend (store.MemoryDutyStore / store.SqliteDutyStore)
+STORE = None
+# REPO: a bot egyetlen duty-log repositoryja (repository.DutyRepository, processing.get_repository);
+# a parancsok ezen át kérdeznek, a duty_log.json / .jsonl külső változását mtime / méret alapján tölti be
+REPO = None
 LOG_DIR = ROOT / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 
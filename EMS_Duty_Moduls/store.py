@@ -0,0 +1,270 @@
+import json, sqlite3, threading, logging
+from typing import Callable, Iterable, List, Optional
+
+from .records import TIME_SLOTS, DutyRecord, to_plain
+from .timeutil import format_minutes, to_minutes
+
+logger = logging.getLogger("EMS_DUTY_CORE")
+
+# Duty-log lekérdező réteg (repository API)
+#
+# A parancsok nem járják be közvetlenül a duty_log listát, hanem ezen az API-n
+# kérdeznek. Két backend van:
+#   memory – a memóriában lévő duty_log listán dolgozik (alapértelmezés)
+#   sqlite – stdlib sqlite3 (WAL) indexekkel; a write-behind persister tölti
+#
+# Az időpontok "%Y-%m-%d %H:%M" formátumú helyi (Budapest) falióra-idők, így a
+# szöveges összehasonlítás megegyezik az időrenddel. A memória backend a
+# DutyRecord egész perc-mezőin dolgozik (lásd timeutil.py), szövegfeldolgozás nélkül.
+# Határként datetime, "YYYY-MM-DD HH:MM" szöveg vagy falióra-perc (int) is adható.
+
+TIME_FMT = "%Y-%m-%d %H:%M"
+TIME_FIELDS = ("timestamp", "start_time", "end_time")
+
+
+def time_key(value) -> Optional[str]:
+    """datetime / falióra-perc → "%Y-%m-%d %H:%M" (aware értéknél a saját zónájának falióra-ideje)."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return format_minutes(value)
+    return value.strftime(TIME_FMT)
+
+
+def _ts_min(rec) -> int:
+    ts = rec.ts_min
+    return ts if ts is not None else -1
+
+
+def record_key(rec: dict):
+    """Egyedi kulcs: message_id, ennek hiányában a régi kézi rekordok tartalma alapján."""
+    mid = rec.get("message_id")
+    if mid is not None:
+        return mid
+    return ("_", rec.get("timestamp"), rec.get("name_norm"), rec.get("type"))
+
+
+def _in_range(value, start, end, include_end):
+    if value is None:
+        return False
+    if start is not None and value < start:
+        return False
+    if end is not None and (value > end if include_end else value >= end):
+        return False
+    return True
+
+
+class MemoryDutyStore:
+    """Repository API over the in-memory DutyLog (no separate copy); compares integer minutes."""
+
+    backend = "memory"
+
+    def __init__(self, records: Callable[[], list]):
+        self.records = records
+
+    def between(self, start=None, end=None, field: str = "timestamp", include_end: bool = False) -> List[dict]:
+        """Records whose `field` lies in [start, end) (or [start, end] with include_end), time-ordered."""
+        if field not in TIME_FIELDS:
+            raise ValueError(f"Ismeretlen időmező: {field}")
+        slot = TIME_SLOTS[field]
+        start, end = to_minutes(start), to_minutes(end)
+        log = self.records()
+        if field != "start_time" and hasattr(log, "range"):
+            # DutyLog: bisect a rendezett időindexen, csak az ablak rekordjai
+            return log.range(start, end, field=field, include_end=include_end)
+        rows = [r for r in log if _in_range(getattr(r, slot), start, end, include_end)]
+        rows.sort(key=lambda r: getattr(r, slot))
+        return rows
+
+    def for_person(self, name_norm: Optional[str] = None, person_key: Optional[str] = None) -> List[dict]:
+        log = self.records()
+        if hasattr(log, "for_person"):
+            # DutyLog: személyenkénti index, a költség a személy rekordjainak számával arányos
+            return log.for_person(name_norm=name_norm, person_key=person_key)
+        if person_key is not None:
+            rows = [r for r in log if r.person_key == person_key]
+        else:
+            rows = [r for r in log if r.name_norm == name_norm]
+        rows.sort(key=_ts_min)
+        return rows
+
+    def latest_timestamp(self) -> Optional[str]:
+        latest = max((r.ts_min for r in self.records() if r.ts_min is not None), default=None)
+        return format_minutes(latest) if latest is not None else None
+
+    def count(self) -> int:
+        return len(self.records())
+
+    # a memória backend maga a duty_log lista, ezért az írások no-opok
+    def upsert_many(self, recs: Iterable[dict]):
+        pass
+
+    def clear(self):
+        pass
+
+    def sync_from(self, records: Iterable[dict]):
+        pass
+
+    def close(self):
+        pass
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS duty (
+    rowkey      TEXT PRIMARY KEY,
+    message_id  INTEGER,
+    timestamp   TEXT,
+    start_time  TEXT,
+    end_time    TEXT,
+    name_norm   TEXT,
+    person_key  TEXT,
+    type        TEXT,
+    duration    INTEGER,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_duty_message_id ON duty(message_id);
+CREATE INDEX IF NOT EXISTS idx_duty_timestamp  ON duty(timestamp);
+CREATE INDEX IF NOT EXISTS idx_duty_end_time   ON duty(end_time);
+CREATE INDEX IF NOT EXISTS idx_duty_name_norm  ON duty(name_norm, timestamp);
+CREATE INDEX IF NOT EXISTS idx_duty_person_key ON duty(person_key, timestamp);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SqliteDutyStore:
+    """sqlite3 (WAL) backend with indexes on message_id, timestamp, end_time, name_norm, person_key.
+
+    Writes arrive from the persister worker thread; reads from the event loop
+    are index lookups. The connection is shared and guarded by a lock.
+
+    With a `stamp` callable (DutyJournal.stamp), every write stores the
+    journal's file stamp in the meta table in the same transaction, so
+    `open_store` can tell whether the mirror matches the files on disk.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path, stamp: Optional[Callable[[], object]] = None):
+        self.path = str(path)
+        self.stamp = stamp
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    @staticmethod
+    def _row(rec: dict):
+        key = record_key(rec)
+        rowkey = str(key) if not isinstance(key, tuple) else json.dumps(key, ensure_ascii=False)
+        duration = rec.get("duration")
+        return (
+            rowkey,
+            rec.get("message_id"),
+            rec.get("timestamp"),
+            rec.get("start_time"),
+            rec.get("end_time"),
+            rec.get("name_norm"),
+            rec.get("person_key"),
+            rec.get("type"),
+            int(duration) if duration is not None else None,
+            json.dumps(rec, ensure_ascii=False, default=to_plain),
+        )
+
+    def upsert_many(self, recs: Iterable[dict]):
+        rows = [self._row(r) for r in recs]
+        if not rows:
+            return
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO duty VALUES (?,?,?,?,?,?,?,?,?,?)", rows)
+            self._mark()
+            self.conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM duty")
+            self._mark()
+            self.conn.commit()
+
+    def sync_from(self, records: Iterable[dict]):
+        """Full reload from the JSON duty_log (startup / after a rebuild)."""
+        rows = [self._row(r) for r in records]
+        with self._lock:
+            self.conn.execute("DELETE FROM duty")
+            self.conn.executemany("INSERT OR REPLACE INTO duty VALUES (?,?,?,?,?,?,?,?,?,?)", rows)
+            self._mark()
+            self.conn.commit()
+
+    def _mark(self):
+        # a tükör ezzel a napló-állapottal egyezik (ugyanabban a tranzakcióban, mint az írás)
+        value = json.dumps(self.stamp()) if self.stamp is not None else None
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('journal_stamp', ?)", (value,))
+
+    def synced_stamp(self) -> Optional[str]:
+        """Az utolsó íráskor rögzített napló-bélyeg (JSON), vagy None."""
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'journal_stamp'").fetchone()
+        return row[0] if row else None
+
+    def _query(self, sql: str, params=()) -> List[dict]:
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [DutyRecord.from_dict(json.loads(r[0])) for r in rows]
+
+    def between(self, start=None, end=None, field: str = "timestamp", include_end: bool = False) -> List[dict]:
+        if field not in TIME_FIELDS:
+            raise ValueError(f"Ismeretlen időmező: {field}")
+        start, end = time_key(start), time_key(end)
+        where, params = [f"{field} IS NOT NULL"], []
+        if start is not None:
+            where.append(f"{field} >= ?")
+            params.append(start)
+        if end is not None:
+            where.append(f"{field} <= ?" if include_end else f"{field} < ?")
+            params.append(end)
+        return self._query(f"SELECT data FROM duty WHERE {' AND '.join(where)} ORDER BY {field}", params)
+
+    def for_person(self, name_norm: Optional[str] = None, person_key: Optional[str] = None) -> List[dict]:
+        if person_key is not None:
+            return self._query("SELECT data FROM duty WHERE person_key = ? ORDER BY timestamp", (person_key,))
+        return self._query("SELECT data FROM duty WHERE name_norm = ? ORDER BY timestamp", (name_norm,))
+
+    def latest_timestamp(self) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute("SELECT MAX(timestamp) FROM duty").fetchone()
+        return row[0] if row else None
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM duty").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def open_store(backend: Optional[str], records: Callable[[], list], sqlite_path="duty_log.sqlite3", stamp: Optional[Callable[[], object]] = None):
+    """DUTY_STORE=sqlite → SqliteDutyStore (induláskor szinkronizálva a duty_log-gal), egyébként memória.
+
+    `stamp` (DutyJournal.stamp) megadásakor a tükör akkor friss, ha az utolsó írásakor rögzített
+    napló-bélyeg egyezik a mostanival – a helyben cserélt rekordokat és a napló-írás után, a tükör
+    írása előtt elveszett módosításokat is észreveszi; nélküle csak a rekordszámot vetjük össze.
+    """
+    backend = (backend or "memory").strip().lower()
+    if backend != "sqlite":
+        return MemoryDutyStore(records)
+    store = SqliteDutyStore(sqlite_path, stamp=stamp)
+    current = records()
+    if stamp is not None:
+        current_stamp = stamp()
+        stale = current_stamp is None or store.synced_stamp() != json.dumps(current_stamp)
+    else:
+        stale = store.count() != len(current)
+    if stale:
+        logger.info(f"SQLite duty store szinkronizálása ({len(current)} rekord)")
+        store.sync_from(current)
+    return store
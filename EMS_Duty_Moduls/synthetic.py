@@ -0,0 +1,144 @@
+import os, math, random
+from collections import Counter
+import datetime as dtmod
+from typing import List, Optional, Sequence, Tuple
+
+import pytz
+
+from .dutyparse import make_person_key, normalize_person_name
+from .history import snowflake_at
+
+# Szintetikus duty_log (méréshez)
+#
+# Determinisztikus (seed), a duty_log.json sémájával egyező felvette / leadta
+# rekordpárok: a rangok a DEDIKALT_RANGOK / VEZETOSSEG env-ből (ha üres, a
+# szokásos mentős rangokból), a vezetőség kis arányban. A műszakhossz
+# log-normális (medián ~1,5 óra, néhány 0 perces lecsatlakozással), egy
+# személy műszakjai nem fedik egymást, és a napló `end`-ig (alapból most) tart,
+# így a !jelen-nek is van nyitott szolgálata.
+#
+# Ez az egyetlen szintetikus generátor: a fakediscord.synthetic_messages ugyanezeket
+# a rekordokat rendereli duty-kártyákká (duty_card), a message_id a valódi
+# (budapesti falióra → UTC) időpont snowflake-je, így a kártyák értelmezése
+# ugyanazt a rekordot adja vissza.
+
+DEFAULT_RANKS = ("Orvos", "Rezidens", "Szakorvos", "Mentőtiszt", "Mentőápoló")
+DEFAULT_LEADERS = ("Igazgató", "Főorvos")
+FIRST = ("Anna", "Béla", "Csilla", "Dániel", "Eszter", "Ferenc", "Gábor", "Hanna", "Imre", "Judit", "Kata", "László")
+LAST = ("Kovács", "Nagy", "Tóth", "Szabó", "Horváth", "Varga", "Kiss", "Molnár", "Németh", "Farkas", "Balogh", "Papp")
+TIME_FMT = "%Y-%m-%d %H:%M"
+BUDAPEST = pytz.timezone("Europe/Budapest")
+
+
+def env_ranks() -> tuple:
+    """(dedikált rangok, vezetőség) – az env-ből, mint a heti_top, üresen az alapértelmezés."""
+    ranks = [x.strip() for x in os.getenv("DEDIKALT_RANGOK", "").split(",") if x.strip()]
+    leaders = [x.strip() for x in os.getenv("VEZETOSSEG", "").split(",") if x.strip()]
+    return tuple(ranks) or DEFAULT_RANKS, tuple(leaders) or DEFAULT_LEADERS
+
+
+def shift_minutes(rng: random.Random, median: float = 90.0, sigma: float = 0.8, max_minutes: int = 720) -> int:
+    if rng.random() < 0.03:
+        return 0  # azonnali lecsatlakozás ("0 perc")
+    return max(1, min(max_minutes, int(rng.lognormvariate(math.log(median), sigma))))
+
+
+def _snowflake_of_wall(when: dtmod.datetime, offsets: dict) -> int:
+    """Budapesti falióra (naiv) → snowflake; az UTC-eltolás óránként gyorsítótárazva (a localize drága)."""
+    hour = (when.year, when.month, when.day, when.hour)
+    offset = offsets.get(hour)
+    if offset is None:
+        local = BUDAPEST.localize(when.replace(minute=0))
+        offset = offsets[hour] = local.utcoffset()
+    return snowflake_at((when - offset).replace(tzinfo=dtmod.timezone.utc))
+
+
+def generate_duty_log(
+    count: int,
+    people: int = 80,
+    seed: int = 0,
+    end: Optional[dtmod.datetime] = None,
+    start: Optional[dtmod.datetime] = None,
+    ranks: Optional[Sequence[str]] = None,
+    leaders: Optional[Sequence[str]] = None,
+    leader_share: float = 0.05,
+    median_shift: float = 90.0,
+) -> List[dict]:
+    """Legfeljebb `count` duty rekord (count/2 műszak) időrendben, `end`-ig (naiv budapesti falióra); az `end` utáni leadások elmaradnak.
+    `start` megadásakor a napló onnan indul, és a műszakok számából adódó időtartamig tart."""
+    rng = random.Random(seed)
+    env_r, env_l = env_ranks()
+    ranks, leaders = tuple(ranks or env_r), tuple(leaders or env_l)
+
+    roster = []
+    for i in range(people):
+        name = f"{rng.choice(FIRST)} {rng.choice(LAST)} {i}"
+        rank = rng.choice(leaders) if leaders and rng.random() < leader_share else rng.choice(ranks)
+        name_norm = normalize_person_name(name)
+        fivem = f"{name.split()[0].lower()}{i}"
+        roster.append((name, name_norm, fivem, make_person_key(name_norm, fivem), f"Mentő - {rank}", rng.uniform(0.3, 3.0)))
+    weights = [p[5] for p in roster]
+
+    # műszakok: átlagosan ~`people / 4` egyidejű szolgálat; személyenként egymás után, átfedés nélkül
+    shifts = max(1, count // 2)
+    span_min = int(shifts * (median_shift * 1.4) / max(1, people // 4)) + 60
+    if start is not None:
+        start = start.replace(second=0, microsecond=0)
+        end = start + dtmod.timedelta(minutes=span_min)
+    else:
+        end = end or dtmod.datetime.now().replace(second=0, microsecond=0)
+        start = end - dtmod.timedelta(minutes=span_min)
+    per_person = Counter(rng.choices(range(people), weights, k=shifts))
+    events = []
+    for p, n in per_person.items():
+        slot = span_min / n
+        t = rng.uniform(0, slot)
+        for _ in range(n):
+            duration = shift_minutes(rng, median_shift)
+            events.append((int(t), duration, p))
+            t += duration + rng.expovariate(1 / max(30.0, slot - duration))
+    events.sort()
+
+    records = []
+    offsets = {}
+    seq = 0
+    for begin, duration, p in events:
+        name, name_norm, fivem, key, position, _w = roster[p]
+        on = start + dtmod.timedelta(minutes=begin)
+        off = on + dtmod.timedelta(minutes=duration)
+        for kind, when in (("felvette", on), ("leadta", off)):
+            if len(records) >= count or when > end:
+                break
+            seq += 1
+            # snowflake: a valódi időpont + sorszám az alsó 22 biten (egyedi)
+            mid = _snowflake_of_wall(when, offsets) | (seq & 0x1FFFFF)
+            ts = when.strftime(TIME_FMT)
+            rec = {
+                "message_id": mid,
+                "name": name,
+                "name_norm": name_norm,
+                "fivem_name": fivem,
+                "person_key": key,
+                "position": position,
+            }
+            if kind == "felvette":
+                rec.update(start_time=ts, timestamp=ts, type="felvette")
+            else:
+                rec.update(duration=duration, start_time=on.strftime(TIME_FMT), end_time=ts, timestamp=ts, type="leadta")
+            records.append(rec)
+    records.sort(key=lambda r: (r["timestamp"], r["message_id"]))
+    return records
+
+
+def duty_card(rec: dict) -> Tuple[str, str]:
+    """Egy generált rekord duty-kártyája (cím, leírás), ahogy a duty-bot küldené."""
+    title = f"**{rec['name']} ({rec['fivem_name']}) {rec['type']} a szolgálatot**"
+    if rec["type"] == "leadta":
+        return title, f"{rec['position']}\nSzolgálatban töltött idő: {rec['duration']} perc"
+    return title, rec["position"]
+
+
+def salary_card(rec: dict) -> Tuple[str, str]:
+    """Fizetés-kártya ugyanarra a személyre (nem duty-kártya; az értelmező kihagyja)."""
+    rank = rec["position"].split(" - ", 1)[-1]
+    return f"**{rec['name']} ({rec['fivem_name']}) fizetést kapott**", f"Job: Mentő\nRang: {rank}\nFizetés összege: $500"
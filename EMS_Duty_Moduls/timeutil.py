@@ -0,0 +1,97 @@
+import datetime as dtmod
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Normalizált időréteg
+#
+# A duty_log időpontjai helyi (Budapest) falióra-idők "%Y-%m-%d %H:%M" alakban.
+# Betöltéskor / beolvasáskor egyszer egész "falióra-percekké" alakítjuk őket
+# (percek 1970-01-01 00:00 óta, időzóna nélkül), így a riportok csak egész
+# számokat hasonlítanak össze. Nap- és hét-határ egyszerű aritmetika; a
+# perc → dátum / szöveg visszaalakítás gyorsítótárazott.
+
+TIME_FMT = "%Y-%m-%d %H:%M"
+MINUTES_PER_DAY = 1440
+_EPOCH_ORD = dtmod.date(1970, 1, 1).toordinal()
+_EPOCH_WEEKDAY = 3  # 1970-01-01 csütörtök
+
+
+@lru_cache(maxsize=8192)
+def _day_number(day: str) -> Optional[int]:
+    """"YYYY-MM-DD" → napok száma 1970-01-01 óta (gyorsítótárazva: a napló napjai sokszor ismétlődnek)."""
+    if not (day[:4] + day[5:7] + day[8:10]).isdigit() or not day.isascii():
+        return None
+    try:
+        return dtmod.date(int(day[0:4]), int(day[5:7]), int(day[8:10])).toordinal() - _EPOCH_ORD
+    except ValueError:
+        return None
+
+
+def parse_minutes(value) -> Optional[int]:
+    """"YYYY-MM-DD HH:MM" → falióra-perc; None, ha nem pontosan ilyen alakú."""
+    if type(value) is not str or len(value) != 16 or value[4] != "-" or value[7] != "-" or value[10] != " " or value[13] != ":":
+        return None
+    days = _day_number(value[:10])
+    hh, mm = value[11:13], value[14:16]
+    if days is None or not (hh + mm).isdigit() or not value.isascii():
+        return None
+    hour, minute = int(hh), int(mm)
+    if hour > 23 or minute > 59:
+        return None
+    return days * MINUTES_PER_DAY + hour * 60 + minute
+
+
+@lru_cache(maxsize=65536)
+def format_minutes(minutes: int) -> str:
+    days, rem = divmod(minutes, MINUTES_PER_DAY)
+    return f"{date_of_day(days).isoformat()} {rem // 60:02d}:{rem % 60:02d}"
+
+
+def minutes_of(dt) -> int:
+    """datetime/date → falióra-perc (aware értéknél a saját zónájának faliórája, másodpercek levágva)."""
+    minutes = (dt.toordinal() - _EPOCH_ORD) * MINUTES_PER_DAY
+    if isinstance(dt, dtmod.datetime):
+        minutes += dt.hour * 60 + dt.minute
+    return minutes
+
+
+def to_minutes(value) -> Optional[int]:
+    """Lekérdezési határ normalizálása: None / int / "YYYY-MM-DD HH:MM" / datetime."""
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        minutes = parse_minutes(value)
+        if minutes is None:
+            raise ValueError(f"Hibás időpont: {value!r} (várt: YYYY-MM-DD HH:MM)")
+        return minutes
+    return minutes_of(value)
+
+
+def now_minutes(tz=None) -> int:
+    return minutes_of(dtmod.datetime.now(tz))
+
+
+@lru_cache(maxsize=8192)
+def date_of_day(day: int) -> dtmod.date:
+    return dtmod.date.fromordinal(_EPOCH_ORD + day)
+
+
+def date_of(minutes: int) -> dtmod.date:
+    """Helyi nap (date) egy falióra-perchez, gyorsítótárból."""
+    return date_of_day(minutes // MINUTES_PER_DAY)
+
+
+def day_start(minutes: int) -> int:
+    return minutes - minutes % MINUTES_PER_DAY
+
+
+def day_bounds(minutes: int) -> Tuple[int, int]:
+    start = day_start(minutes)
+    return start, start + MINUTES_PER_DAY
+
+
+def week_bounds(minutes: int) -> Tuple[int, int]:
+    """Hétfő 00:00 – következő hétfő 00:00 a megadott perc hetére."""
+    day = minutes // MINUTES_PER_DAY
+    start = (day - (day + _EPOCH_WEEKDAY) % 7) * MINUTES_PER_DAY
+    return start, start + 7 * MINUTES_PER_DAY
@@ -11,6 +11,25 @@ from dotenv import load_dotenv
 import pytz
 from pathlib import Path
 
+from EMS_Duty_Moduls.journal import DutyJournal
+from EMS_Duty_Moduls.dutylog import DutyLog
+from EMS_Duty_Moduls.persister import WriteBehindPersister
+from EMS_Duty_Moduls.store import open_store
+from EMS_Duty_Moduls.repository import DutyRepository
+from EMS_Duty_Moduls.rollup import DutyRollup
+from EMS_Duty_Moduls.intervals import ShiftTotals
+from EMS_Duty_Moduls.active import ActiveDuty
+from EMS_Duty_Moduls.checkpoint import IngestCheckpoint
+from EMS_Duty_Moduls.history import fetch_history_concurrent
+from EMS_Duty_Moduls.pacing import HistoryPacer, install_rate_limit_tap
+from EMS_Duty_Moduls.progress import ProgressReporter
+from EMS_Duty_Moduls.dutyparse import PARSER_VERSION, parse_duty_embed
+from EMS_Duty_Moduls.filestore import JsonFileStore
+from EMS_Duty_Moduls.ingest import BatchStats, ingest_batch, pages
+from EMS_Duty_Moduls.loopmon import LoopLagMonitor
+from EMS_Duty_Moduls.metrics import CommandMetrics, install_command_metrics
+from EMS_Duty_Moduls.timeutil import MINUTES_PER_DAY, format_minutes, minutes_of, now_minutes, to_minutes
+
 # ============ Alap ============
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
@@ -32,9 +51,26 @@ fh = logging.FileHandler("logs/runtime.log", encoding="utf-8")
 fh.setFormatter(logging.Formatter("%(asctime)s [%(levelname)-8s] %(message)s"))
 logger.addHandler(fh)
 
+class DutyBot(commands.Bot):
+    async def close(self):
+        """Tiszta leállás: a még ki nem írt duty_log rekordok mentése a kapcsolat zárása előtt."""
+        try:
+            await DUTY_PERSISTER.close()
+        except Exception as e:
+            logger.exception(f"duty_log mentése leállításkor sikertelen: {e}")
+        try:
+            DUTY_ROLLUP.save()
+            DUTY_CHECKPOINT.save()
+            COMMAND_METRICS.save()
+        except Exception as e:
+            logger.exception(f"Rollup / checkpoint mentése leállításkor sikertelen: {e}")
+        LOOP_MONITOR.stop()
+        JSON_FILES.close()
+        await super().close()
+
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = DutyBot(command_prefix="!", intents=intents)
 
 # --- EMS személy adatbázis betöltése (mention lookup) ---
 try:
@@ -59,6 +95,8 @@ RAW_LOG_FILE = "raw_sniff.log"
 @bot.event
 async def on_message(message):
     if message.channel.id == int(os.getenv("DUTY_LOG_CHANNEL_ID", "0")):
+        # élő beolvasás: a duty-kártya azonnal a duty_log-ba kerül, history-olvasás nélkül
+        await ingest_live_message(message)
         try:
             with open(RAW_LOG_FILE, "a", encoding="utf-8") as f:
                 f.write("\n==============================\n")
@@ -71,30 +109,116 @@ async def on_message(message):
                     role_ids = [r.id for r in message.author.roles]
                     f.write(f"Roles: {role_ids}\n")
                 f.write(f"Raw object: {repr(message)}\n")
+                # teljes embed (egy sor JSON): ebből offline is újraépíthető a duty_log (EMS_Duty_Moduls/offline.py)
+                f.write(f"Embeds: {json.dumps([e.to_dict() for e in message.embeds], ensure_ascii=False)}\n")
         except Exception as e:
             print(f"[RAW LOGGER ERROR] {e}", flush=True)
     await bot.process_commands(message)
 
 # ========= Adattár =========
+# duty_log.json = snapshot, duty_log.jsonl = append-only napló (lásd EMS_Duty_Moduls/journal.py)
 DUTY_JSON = "duty_log.json"
-if os.path.exists(DUTY_JSON):
-    with open(DUTY_JSON, "r", encoding="utf-8") as f:
-        duty_log = json.load(f)
-else:
-    duty_log = []
+DUTY_JOURNAL = DutyJournal(DUTY_JSON)
+duty_log = DutyLog(DUTY_JOURNAL.load())  # message_id hash index + időrend, O(1) dedup
+
+# Napi rollup: percek (személy, nap) / (rang, nap) szerint; a duty_log minden változását követi
+DUTY_ROLLUP = DutyRollup()
+DUTY_ROLLUP.attach(duty_log, "duty_rollup.json")
+
+# (név, rang) szerinti prefix-összegek: tetszőleges intervallum összege két bináris kereséssel
+DUTY_SHIFTS = ShiftTotals()
+DUTY_SHIFTS.attach(duty_log)
+
+# Élő szolgálati állapot: person_key → utolsó felvette/leadta esemény (a !jelen ebből válaszol)
+DUTY_ACTIVE = ActiveDuty()
+DUTY_ACTIVE.attach(duty_log)
+
+# Utolsó feldolgozott duty-log üzenet csatornánként (snowflake): minden frissítés ettől folytatja;
+# tartósan csak akkor lép előre, ha az addigi rekordok már lemezen vannak (persister flush után)
+DUTY_CHECKPOINT = IngestCheckpoint("duty_checkpoint.json")
+
+# Közös, adaptív token bucket a history oldal-kérésekhez; a discord.py 429-es figyelmeztetései lassítják
+DUTY_PACER = HistoryPacer()
+install_rate_limit_tap(DUTY_PACER)
+
+# Parancsonkénti késleltetés + event loop késés-figyelő: ha a loop LOOP_LAG_THRESHOLD_MS-nál tovább
+# blokkol (szinkron fájl-I/O, json.dump), a loop stackje a futó parancs nevével a logba kerül
+COMMAND_METRICS = CommandMetrics("command_metrics.json")
+COMMAND_METRICS.load()
+install_command_metrics(bot, COMMAND_METRICS)
+LOOP_MONITOR = LoopLagMonitor(running=COMMAND_METRICS.running)
+
+# Parancsok JSON fájljai (char_to_discord_name.json, discord_user_ids.json, ...): olvasás / atomikus írás
+# szálkészletben, mtime szerinti gyorsítótárral – a loop nem blokkol fájl-I/O-n
+JSON_FILES = JsonFileStore()
+
+# Write-behind mentés: a loop csak sorba állítja a rekordokat, a háttértaszk
+# legfeljebb DUTY_FLUSH_INTERVAL mp-enként (vagy DUTY_FLUSH_BATCH rekordonként) ír, worker szálon.
+# Lekérdező repository: DUTY_STORE=sqlite → indexelt sqlite3 (WAL) tükör, egyébként a memóriabeli duty_log
+DUTY_STORE = open_store(os.getenv("DUTY_STORE"), lambda: duty_log, "duty_log.sqlite3", stamp=DUTY_JOURNAL.stamp)
+
+DUTY_PERSISTER = WriteBehindPersister(
+    DUTY_JOURNAL,
+    lambda: duty_log,
+    interval=float(os.getenv("DUTY_FLUSH_INTERVAL", "5")),
+    batch_size=int(os.getenv("DUTY_FLUSH_BATCH", "500")),
+    sinks=[DUTY_STORE],
+    checkpoint=DUTY_CHECKPOINT,
+)
+
+# Egyetlen duty-log repository: a parancsok ezen át kérdeznek (memóriából); lekérdezés előtt legfeljebb
+# DUTY_REPO_CHECK_INTERVAL mp-enként megnézi, írt-e más a duty_log.json / .jsonl fájlba (mtime / méret),
+# és csak a változást tölti be (lásd EMS_Duty_Moduls/repository.py)
+DUTY_REPO = DutyRepository(
+    lambda: DUTY_JOURNAL,
+    lambda: duty_log,
+    lambda: DUTY_STORE,
+    pending=lambda: DUTY_PERSISTER.pending + DUTY_PERSISTER.in_flight,
+)
 
 def save_log():
-    """Duty-log mentése időrendbe rendezve (timestamp szerint)."""
+    """Duty-log tömörítése: teljes snapshot időrendben + a napló ürítése (és a rollup mentése)."""
     try:
-        sorted_log = sorted(
-            duty_log,
-            key=lambda x: x.get("timestamp", "")
-        )
-        with open(DUTY_JSON, "w", encoding="utf-8") as f:
-            json.dump(sorted_log, f, ensure_ascii=False, indent=2)
+        DUTY_ROLLUP.save()
+        DUTY_CHECKPOINT.save()
+    except Exception as e:
+        logger.error(f"Hiba a rollup / checkpoint mentésekor: {e}")
+    if DUTY_PERSISTER.running:
+        DUTY_PERSISTER.request_compaction()
+        return
+    try:
+        DUTY_JOURNAL.compact(duty_log)
     except Exception as e:
         logger.error(f"Hiba a duty_log mentésekor: {e}")
 
+def persist_record(rec: dict):
+    """Egy új/módosított rekord mentése: persisterrel sorba áll, nélküle azonnal a naplóba kerül."""
+    if DUTY_PERSISTER.running:
+        DUTY_PERSISTER.mark_dirty(rec)
+        return
+    try:
+        DUTY_JOURNAL.append(rec)
+        DUTY_STORE.upsert_many([rec])
+        if DUTY_JOURNAL.needs_compaction():
+            save_log()
+    except Exception as e:
+        logger.error(f"Hiba a duty_log naplózásakor: {e}")
+
+def persist_records(recs: List[dict]):
+    """Egy köteg mentése egyszerre: persisterrel egy sorba állítás, nélküle egy napló-írás."""
+    if not recs:
+        return
+    if DUTY_PERSISTER.running:
+        DUTY_PERSISTER.mark_dirty_many(recs)
+        return
+    try:
+        DUTY_JOURNAL.append_many(recs)
+        DUTY_STORE.upsert_many(recs)
+        if DUTY_JOURNAL.needs_compaction():
+            save_log()
+    except Exception as e:
+        logger.error(f"Hiba a duty_log köteg naplózásakor: {e}")
+
 # def save_log():
 #     with open(DUTY_JSON, "w", encoding="utf-8") as f:
 #         json.dump(duty_log, f, ensure_ascii=False, indent=2)
@@ -102,14 +226,6 @@ def save_log():
 def normalize_person_name(name: str) -> str:
     return re.sub(r"\s+", " ", (name or "").strip()).lower()
 
-def deduplicate_log():
-    # message_id alapján egyedisítés, legfrissebbet tartjuk meg
-    seen = {}
-    for rec in duty_log:
-        mid = rec.get("message_id")
-        seen[mid] = rec
-    return list(seen.values())
-
 # ========= Discord user ID térkép a betoppanó JSON-ból =========
 USER_ID_MAP_FILE = "discord_user_ids.json"  # discord_name_norm -> user_id
 
@@ -179,112 +295,77 @@ def make_person_key(name_norm: str, fivem_name: str) -> str:
     fv = (fivem_name or "").strip().lower()
     return f"{nn}|{fv}"
 
+def parse_duty_message(message: discord.Message) -> Optional[dict]:
+    """Duty-log embed → rekord: 'felvette' ÉS 'leadta a szolgálatot' kártyák; egyébként None."""
+    if not message.embeds:
+        return None
+    embed = message.embeds[0]
+    # közös, előre fordított sablonok (EMS_Duty_Moduls/dutyparse.py); a nem duty-kártyák az első ellenőrzésen kiesnek
+    return parse_duty_embed(embed.title, embed.description, message.created_at, message.id)
+
 async def process_duty_message(message: discord.Message):
-    """A duty-log csatorna embedjeit dolgozzuk fel: 'felvette' ÉS 'leadta a szolgálatot' kártyák."""
+    """A duty-log csatorna egy üzenetének feldolgozása (élő beolvasás, egyedi újraolvasás)."""
     if message.channel.id != DUTY_LOG_CHANNEL_ID:
         return
-    if getattr(message.author, "bot", False) is True and not message.embeds:
+    if message.id in duty_log:
         return
-    if not message.embeds:
+    rec = parse_duty_message(message)
+    if rec is None:
         return
-    if any(x.get("message_id") == message.id for x in duty_log):
-        return
-
-    embed = message.embeds[0]
-    title = (embed.title or "").strip()
-    description = (embed.description or "")
-
-    # ==============================================================
-    # FELVETTE A SZOLGÁLATOT
-    # ==============================================================
-    if "felvette a szolgálatot" in title.lower():
-        try:
-            name_part = title.split("(")[0].replace("**", "").strip()
-            fivem_part = title.split("(")[1].split(")")[0].strip()
-        except Exception:
-            return
+    duty_log.upsert(rec)
+    persist_record(rec)
 
-        position = ""
-        for raw in description.split("\n"):
-            line = raw.strip()
-            if line.startswith("Mentő"):
-                position = line
-
-        start_time = message.created_at.astimezone(budapest_tz)
-        name_norm = normalize_person_name(name_part)
-        person_key = make_person_key(name_norm, fivem_part)
-
-        duty_log.append({
-            "message_id": message.id,
-            "name": name_part,
-            "name_norm": name_norm,
-            "fivem_name": fivem_part,
-            "person_key": person_key,
-            "position": position,
-            "start_time": start_time.strftime("%Y-%m-%d %H:%M"),
-            "timestamp": start_time.strftime("%Y-%m-%d %H:%M"),
-            "type": "felvette"
-        })
+def process_duty_batch(messages: List[discord.Message], reparse: bool = False) -> BatchStats:
+    """Egy history-oldal (legfeljebb 100 üzenet) feldolgozása egy lépésben, egyetlen mentéssel.
 
-        duty_log[:] = deduplicate_log()
-        save_log()
-        return  # ⬅ ne fusson le a "leadta" ág is
-
-    # ==============================================================
-    # LEADTA A SZOLGÁLATOT
-    # ==============================================================
-    if "leadta a szolgálatot" not in title.lower():
+    Az ismert message_id-kat (reparse nélkül) nem dolgozza fel újra; a más csatornából
+    érkező üzeneteket kihagyja. Visszaadja a köteg statisztikáját (új / felülírt / kihagyott / hibás).
+    """
+    own = [m for m in messages if m.channel.id == DUTY_LOG_CHANNEL_ID]
+    stats = ingest_batch(duty_log, own, parse_duty_message, persist_records, reparse=reparse)
+    stats.skipped += len(messages) - len(own)
+    return stats
+
+async def commit_checkpoint():
+    """A látott üzenetek rekordjainak lemezre írása, utána a checkpoint léptetése és mentése."""
+    if DUTY_PERSISTER.running:
+        await DUTY_PERSISTER.flush()  # a flush commitolja a checkpointot
         return
-
+    DUTY_JOURNAL.sync()
+    DUTY_CHECKPOINT.commit()
+    DUTY_CHECKPOINT.save()
+
+def resume_after(channel_id: int):
+    """A history-olvasás kezdete: a tartós checkpoint üzenet-ID-ja, vagy None, ha nincs (vagy üres a napló)."""
+    last_seen = DUTY_CHECKPOINT.last_seen(channel_id)
+    if last_seen is None or not duty_log:
+        return None
+    return discord.Object(id=last_seen)
+
+async def ingest_live_message(message: discord.Message):
+    """Gateway-ről érkező duty-log üzenet feldolgozása és a checkpoint léptetése."""
     try:
-        name_part = title.split("(")[0].replace("**", "").strip()
-        fivem_part = title.split("(")[1].split(")")[0].strip()
-    except Exception:
+        await process_duty_message(message)
+    except Exception as e:
+        logger.exception(f"[LIVE] Duty-log üzenet feldolgozása sikertelen ({message.id}): {e}")
         return
-
-    position = ""
-    duration = 0
-    for raw in description.split("\n"):
-        line = raw.strip()
-        if line.startswith("Mentő"):
-            position = line
-        m = re.search(r"szolgálatban töltött idő\s*[:\-]?\s*(\d+)\s*perc", line, flags=re.IGNORECASE)
-        if m:
-            duration = int(m.group(1))
-
-    end_time = message.created_at.astimezone(budapest_tz)
-    start_time = end_time - timedelta(minutes=duration)
-    name_norm = normalize_person_name(name_part)
-    person_key = make_person_key(name_norm, fivem_part)
-
-    duty_log.append({
-        "message_id": message.id,
-        "name": name_part,
-        "name_norm": name_norm,
-        "fivem_name": fivem_part,
-        "person_key": person_key,
-        "position": position,
-        "duration": duration,
-        "start_time": start_time.strftime("%Y-%m-%d %H:%M"),
-        "end_time": end_time.strftime("%Y-%m-%d %H:%M"),
-        "timestamp": end_time.strftime("%Y-%m-%d %H:%M"),
-        "type": "leadta"
-    })
-
-    duty_log[:] = deduplicate_log()
-    save_log()
+    DUTY_CHECKPOINT.advance(message.channel.id, message.id)
 
 # ========= Duty-log visszamenőleges beolvasás =========
 async def backfill_duty_messages(guild: discord.Guild):
-    """Az utóbbi ~35 nap duty-log üzeneteit beolvassuk, hogy a JSON naprakész legyen."""
+    """A leállás alatt kimaradt duty-log üzenetek pótlása (az élő beolvasás az on_message-ben fut).
+
+    Az utolsó feldolgozott üzenet (checkpoint) utáni üzeneteket olvassa; checkpoint
+    nélkül a legutolsó rekord időpontjától, üres naplónál az utóbbi ~35 napból.
+    """
     channel = guild.get_channel(DUTY_LOG_CHANNEL_ID)
     if not channel:
         logger.error("Duty-log csatorna nem elérhető azonosító alapján.")
         return
 
     logger.info(f"Üzenetek betöltése: #{channel.name}")
-    latest_ts = None
-    if duty_log:
+    latest_ts = resume_after(channel.id)
+    if latest_ts is None and duty_log:
         try:
             latest_ts = max(
                 dtmod.datetime.strptime(r["timestamp"], "%Y-%m-%d %H:%M")
@@ -295,39 +376,28 @@ async def backfill_duty_messages(guild: discord.Guild):
 
     after = latest_ts or (dtmod.datetime.now(budapest_tz) - timedelta(days=35))
     # history olvasás, óvatosan a rate limitekkel
-    processed = 0
+    stats = BatchStats()
     admin_channel_id = int(os.getenv("ADMIN_CHANNEL_ID", "0"))
     admin_channel = guild.get_channel(admin_channel_id)
+    # 🔹 egyetlen állapotüzenet az admin csatornán, legfeljebb PROGRESS_INTERVAL mp-enként szerkesztve
+    progress = ProgressReporter(admin_channel, "Duty-log beolvasás", start=after, interval=float(os.getenv("PROGRESS_INTERVAL", "10")))
 
     try:
-        async for msg in channel.history(limit=None, after=after):
-            await process_duty_message(msg)
-            processed += 1
-
-            # 🔹 50 üzenetenként jelez az admin csatornára
-            if processed % 50 == 0 and admin_channel:
-                await admin_channel.send(
-                    f"```diff\n+ [INFO] Duty-log feldolgozás folyamatban... ({processed} üzenet beolvasva)\n```"
-                )
-                # plusz naplóba is
-                logger.info(f"Duty-log beolvasás: {processed} üzenet feldolgozva...")
-
-            await asyncio.sleep(0.5)  # rate limit kímélés
-
-        logger.info(f"Duty-log beolvasás kész. Feldolgozott: {processed}")
-
-        # 🔹 Befejezés jelzése az admin csatornára
-        if admin_channel:
-            await admin_channel.send(
-                f"```diff\n+ [OK] Duty-log beolvasás kész ({processed} üzenet feldolgozva).\n```"
-            )
+        # oldalanként (≤100 üzenet) egy feldolgozás + egy mentés; az ismert message_id-kat kihagyja
+        async for page in pages(DUTY_PACER.pace(channel.history(limit=None, after=after))):
+            stats.add(process_duty_batch(page))
+            DUTY_CHECKPOINT.advance(channel.id, stats.last_id)
+            await progress.update(stats.seen, stats.last_id)
+
+        await commit_checkpoint()
+        logger.info(f"Duty-log beolvasás kész. Feldolgozott: {stats.seen} – {stats} ({DUTY_PACER.stats()})")
+
+        # 🔹 Befejezés jelzése az admin csatornára (az állapotüzenet átírásával)
+        await progress.finish(f"kész ({stats.seen} üzenet feldolgozva, új: {stats.new})")
 
     except discord.DiscordException as e:
         logger.warning(f"Backfill közbeni Discord-hiba: {e}")
-        if admin_channel:
-            await admin_channel.send(
-                f"```diff\n- [HIBA] Duty-log beolvasás megszakadt: {e}\n```"
-            )
+        await progress.fail(f"Duty-log beolvasás megszakadt: {e}")
 # ==========================================================================
 # ============================  PARANCSOK  =================================
 # ==========================================================================
@@ -418,22 +488,13 @@ async def ping(ctx):
 # ---------------------------------------------------------------------------
 # időszakos összegzés helper
 def get_time_for_period(start_date, end_date):
-    """Összesített szolgálati idők lekérése adott időintervallumra."""
-    summary = {}
-
-    for log in duty_log:
-        try:
-            ts = dtmod.datetime.strptime(log["timestamp"], "%Y-%m-%d %H:%M").replace(tzinfo=budapest_tz)
-            if start_date <= ts <= end_date:
-                name = log.get("name", "Ismeretlen")
-                position = log.get("position", "").replace("Mentő - ", "").strip()
-                duration = log.get("duration", 0)
-
-                # név + pozíció kulcs alapján összegez
-                key = f"{name} – {position}"
-                summary[key] = summary.get(key, 0) + duration
-        except Exception:
-            continue
+    """Összesített szolgálati idők lekérése adott időintervallumra.
+    A határon átnyúló műszakokból csak az intervallumba eső percek számítanak.
+    """
+    # név + pozíció kulcs alapján összegez (prefix-összeg index, csoportonként két bináris keresés)
+    DUTY_REPO.ensure_fresh()
+    totals = DUTY_SHIFTS.totals(to_minutes(start_date), to_minutes(end_date))
+    summary = {f"{name} – {position}": minutes for (name, position), minutes in totals.items()}
 
     # csökkenő sorrend perc szerint
     sorted_summary = sorted(summary.items(), key=lambda x: x[1], reverse=True)
@@ -666,7 +727,7 @@ async def szolgalat(ctx, kezdet: str, kezdet_ido: str, veg: str, veg_ido: str):
 )
 async def szemely(ctx, *, nev: str):
     target = normalize_person_name(nev)
-    matches = [r for r in duty_log if r.get("name_norm") == target]
+    matches = DUTY_REPO.for_person(name_norm=target)
     if not matches:
         await ctx.send(f"```diff\n- [INFO] Nincs adat {nev} nevű személyről.\n```")
         return
@@ -674,14 +735,10 @@ async def szemely(ctx, *, nev: str):
     # időtartamok sorolása (start-end)
     lines = []
     for r in matches:
-        try:
-            st = dtmod.datetime.strptime(r["start_time"], "%Y-%m-%d %H:%M")
-            et = dtmod.datetime.strptime(r["end_time"], "%Y-%m-%d %H:%M")
-        except Exception:
+        if r.start_min is None or r.end_min is None:
             continue
-        dur = int(r.get("duration", 0))
-        h, m = divmod(dur, 60)
-        lines.append(f"{st:%Y-%m-%d %H:%M} - {et:%Y-%m-%d %H:%M}  {h} óra {m} perc")
+        h, m = divmod(int(r.duration or 0), 60)
+        lines.append(f"{format_minutes(r.start_min)} - {format_minutes(r.end_min)}  {h} óra {m} perc")
 
     intro = random.choice([
         f"🔍 Keresem {nev} szolgálati naplóit...",
@@ -746,23 +803,16 @@ async def szemely(ctx, *, nev: str):
 )
 async def szemely_napi(ctx, *, nev: str):
     target = normalize_person_name(nev)
-    matches = [r for r in duty_log if r.get("name_norm") == target]
+    matches = DUTY_REPO.for_person(name_norm=target)
     if not matches:
         await ctx.send(f"```diff\n- [INFO] Nincs adat {nev} nevű személyről.\n```")
         return
 
-    day_totals = {}
-    for r in matches:
-        try:
-            et = dtmod.datetime.strptime(r["end_time"], "%Y-%m-%d %H:%M").replace(tzinfo=budapest_tz)
-        except Exception:
-            continue
-        dur = int(r.get("duration", 0))
-        day = et.date()
-        day_totals[day] = day_totals.get(day, 0) + dur
+    # napi összegek a rollup tábla celláiból (nap szerint rendezve)
+    day_totals = DUTY_ROLLUP.person_days(name_norm=target)
 
     lines = []
-    for day in sorted(day_totals.keys()):
+    for day in day_totals:
         h, m = divmod(day_totals[day], 60)
         lines.append(f"{day}: {h} óra {m} perc")
 
@@ -829,18 +879,12 @@ async def napi(ctx, datum: str):
         return
 
     entries = []
-    for r in duty_log:
-        try:
-            et = dtmod.datetime.strptime(r["end_time"], "%Y-%m-%d %H:%M").replace(tzinfo=budapest_tz)
-        except Exception:
-            continue
-
-        if day_start <= et < day_end:
-            dur = int(r.get("duration", 0))
-            h, m = divmod(dur, 60)
-            entries.append(
-                f"{r.get('name','Ismeretlen')} {r.get('position','')}: {h} óra {m} perc."
-            )
+    for r in DUTY_REPO.between(day_start, day_end, field="end_time"):
+        dur = int(r.get("duration", 0))
+        h, m = divmod(dur, 60)
+        entries.append(
+            f"{r.get('name','Ismeretlen')} {r.get('position','')}: {h} óra {m} perc."
+        )
 
     if not entries:
         await ctx.send(f"Nincs adat {datum} napra.")
@@ -878,8 +922,11 @@ async def run_frissites_core(full_mode: bool = False, ctx=None):
             if ctx:
                 await ctx.send("```diff\n- [INFO] Teljes újraépítés mód aktiválva...\n```")
             try:
-                if os.path.exists("duty_log.json"):
-                    os.remove("duty_log.json")
+                if os.path.exists("duty_log.json") or DUTY_JOURNAL.journal_path.exists():
+                    if DUTY_PERSISTER.running:
+                        await DUTY_PERSISTER.flush()
+                    DUTY_JOURNAL.reset()
+                    DUTY_STORE.clear()
                     duty_log.clear()
                     logger.info("Régi duty_log.json törölve")
                     if ctx:
@@ -896,10 +943,11 @@ async def run_frissites_core(full_mode: bool = False, ctx=None):
             after = None  # teljes újraépítés → minden üzenet
         else:
 # ----------------------------------------------------------------
-# NORMÁL FRISSÍTÉS: csak az utóbbi ~40 nap üzenetei
+# NORMÁL FRISSÍTÉS: a checkpoint utáni (valóban új) üzenetek;
+# checkpoint nélkül a legutolsó rekordtól, üres naplónál ~40 nap
 # ----------------------------------------------------------------
-            after = dtmod.datetime.now(budapest_tz) - timedelta(days=40)
-            if duty_log:
+            after = resume_after(channel.id) or dtmod.datetime.now(budapest_tz) - timedelta(days=40)
+            if duty_log and not isinstance(after, discord.Object):
                 try:
                     latest_ts = max(
                         dtmod.datetime.strptime(l["timestamp"], "%Y-%m-%d %H:%M")
@@ -915,23 +963,48 @@ async def run_frissites_core(full_mode: bool = False, ctx=None):
 # -------------------------------------------------------------------
 # BEOLVASÁS / FELDOLGOZÁS
 # -------------------------------------------------------------------
-        new_processed = 0
-        async for msg in channel.history(limit=None, after=after):
-            before_len = len(duty_log)
-            await process_duty_message(msg)
-            if len(duty_log) > before_len:
-                new_processed += 1
-
-        duty_log[:] = deduplicate_log()
+        stats = BatchStats()
+        # egyetlen, időnként szerkesztett állapotüzenet (teljes módban a csatorna létrehozásától számolt ETA)
+        progress = ProgressReporter(
+            ctx, "Duty-log frissítés", start=channel if full_mode else after,
+            interval=float(os.getenv("PROGRESS_INTERVAL", "10")),
+        )
+
+        async def handle(page):
+            # egy history-oldal: egy lépésben feldolgozva, egyszer sorba állítva mentésre
+            stats.add(process_duty_batch(page))
+            DUTY_CHECKPOINT.advance(channel.id, stats.last_id)
+            await progress.update(stats.seen, stats.last_id)
+
+        if full_mode:
+            # teljes újraépítés: a csatorna élettartama snowflake-ablakokra bontva, párhuzamosan olvasva
+            # (a feldolgozás sorrendje ugyanaz, mint soros olvasásnál)
+            await fetch_history_concurrent(
+                channel,
+                handle,
+                windows=int(os.getenv("DUTY_REBUILD_WINDOWS", "16")),
+                concurrency=int(os.getenv("DUTY_REBUILD_CONCURRENCY", "4")),
+                pacer=DUTY_PACER,
+                per_page=True,
+            )
+        else:
+            async for page in pages(DUTY_PACER.pace(channel.history(limit=None, after=after))):
+                await handle(page)
+
+        if full_mode:
+            # a napló most az aktuális értelmezővel épült újra
+            DUTY_CHECKPOINT.set_parser_version(PARSER_VERSION)
+        await commit_checkpoint()
         save_log()
+        await progress.finish("beolvasás kész", only_if_shown=True)
         total = len(duty_log)
 
         msg_ok = (
             f"```diff\n+ [OK] Frissítés befejezve.\n"
-            f"+ Új üzenetek: {new_processed}\n"
+            f"+ Új üzenetek: {stats.new}\n"
             f"+ Összesen: {total} rekord\n```"
         )
-        logger.info(f"[CORE] Frissítés OK – új: {new_processed}, össz: {total}")
+        logger.info(f"[CORE] Frissítés OK – {stats}, össz: {total}")
         if ctx:
             await ctx.send(msg_ok)
 
@@ -989,22 +1062,32 @@ def format_duration(minutes: int) -> str:
     return f"{h} óra {m} perc"
 
 
-def build_weekly_report(het_kezdete, het_vege, data):
+def build_weekly_report(het_kezdete, het_vege, data=None):
     """Összeállítja a heti jelentés szövegét Discord-barát formában."""
     ossz_idoperc = {}
     utolso_rang = {}
 
-    # ---- Adatok összegzése időtartomány szerint ----
+    # ---- Adatok összegzése időtartomány szerint (falióra-percekben) ----
+    lo, hi = minutes_of(het_kezdete), minutes_of(het_vege)
+    if data is None and lo % MINUTES_PER_DAY == 0 and hi % MINUTES_PER_DAY == 0:
+        # egész napos határok: a napi rollup celláiból (≤ 7 × létszám cella)
+        DUTY_REPO.ensure_fresh()
+        for name, (perc, pos) in DUTY_ROLLUP.totals_by_name(lo // MINUTES_PER_DAY, hi // MINUTES_PER_DAY).items():
+            ossz_idoperc[name] = perc
+            utolso_rang[name] = pos
+        data = ()
+    elif data is None:
+        data = DUTY_REPO.between(lo, hi)
     for entry in data:
         if "duration" not in entry:
             continue
-        ts = dtmod.datetime.strptime(entry["timestamp"], "%Y-%m-%d %H:%M").replace(tzinfo=budapest_tz)
-        if not (het_kezdete <= ts < het_vege):
+        ts = entry.ts_min
+        if ts is None or not (lo <= ts < hi):
             continue
 
-        name = entry.get("name_norm")
-        position = entry.get("position", "")
-        duration = int(entry.get("duration", 0))
+        name = entry.name_norm
+        position = entry.position or ""
+        duration = int(entry.duration or 0)
         if not name:
             continue
 
@@ -1137,14 +1220,6 @@ async def heti_top(ctx, offset: int = 0):
         await ctx.send("```diff\n- [HIBA] Ezt a parancsot csak az admin csatornán lehet használni.\n```")
         return
 
-    JSON_FILE = "duty_log.json"
-    if not os.path.exists(JSON_FILE):
-        await ctx.send(f"```diff\n- [HIBA] A {JSON_FILE} nem található.\n```")
-        return
-
-    with open(JSON_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
     # Időintervallum számítása (aktuális hét hétfő–vasárnap)
     ma = dtmod.datetime.now(budapest_tz)
     napok_vasarnapig = (ma.weekday() + 1) % 7
@@ -1156,7 +1231,7 @@ async def heti_top(ctx, offset: int = 0):
         het_kezdete += timedelta(days=7 * offset)
         het_vege += timedelta(days=7 * offset)
 
-    szoveg = build_weekly_report(het_kezdete, het_vege, data)
+    szoveg = build_weekly_report(het_kezdete, het_vege)
 
     # Utolsó jelentés eltárolása
     last_weekly_report_text = szoveg
@@ -1267,22 +1342,22 @@ async def mehet(ctx):
 @require_admin_channel()
 @help_meta(
     category="Szolgálati riportok",
-    usage="!jelen",
+    usage="!jelen [frissit]",
     short="Megmutatja, hogy kik vannak jelenleg szolgálatban a legfrissebb adatok alapján.",
     details=(
-        "A parancs megvizsgálja az elmúlt 48 óra duty-log üzeneteit, frissíti a belső "
-        "adatbázist, majd kilistázza, hogy kik vannak **aktuálisan szolgálatban**.\n\n"
+        "A parancs az élő szolgálati állapotból (minden beolvasott duty-log üzenettel "
+        "frissül) azonnal kilistázza, hogy kik vannak **aktuálisan szolgálatban**.\n\n"
         "**A működés fő lépései:**\n"
-        "1) Az elmúlt 2 nap összes duty-log üzenetének feldolgozása.\n"
-        "2) A frissített `duty_log.json` betöltése.\n"
+        "1) `!jelen frissit` esetén előbb az elmúlt 2 nap duty-log üzeneteinek újraolvasása.\n"
+        "2) Személyenként (person_key) a legutolsó felvette / leadta esemény.\n"
         "3) Csak az utolsó ismert státusz alapján „felvette” állapotú személyek "
-        "kiszűrése.\n"
-        "4) Duplikátumok eltávolítása.\n"
+        "kiszűrése (az elmúlt 48 órából; ha azóta nem volt esemény, 5 napból).\n"
+        "4) Duplikátumok nélkül – személyenként egy sor.\n"
         "5) Rangsorrend szerinti rendezés (vezetők → dedikált rangok → mindenki más).\n"
         "6) Figyelmeztetés, ha valaki a megengedett maximális óraszám felett van "
         "szolgálatban (‼️ ikon + óra kiírása).\n\n"
         "**Kimeneti formátum:**\n"
-        "A bot először jelzi a frissítés indítását:\n"
+        "`!jelen frissit` esetén a bot először jelzi a frissítés indítását:\n"
         "```\n"
         "🔄 Adatbázis frissítése folyamatban...\n"
         "✅ Frissítés kész (XX üzenet, YY.s alatt).\n"
@@ -1303,10 +1378,11 @@ async def mehet(ctx):
     ),
     examples=[
         "!jelen",
+        "!jelen frissit",
         "!szolgálatban",
         "!Jelen",
         (
-            "Minta kimenet:\n"
+            "Minta kimenet (!jelen frissit):\n"
             "```\n"
             "🔄 Adatbázis frissítése folyamatban a pontos eredmény elérése végett...\n"
             "✅ Frissítés kész (46 üzenet, 9.9 s alatt).\n\n"
@@ -1316,90 +1392,52 @@ async def mehet(ctx):
         )
     ]
 )
-async def jelen(ctx):
-    """Valós adatokból mutatja, kik vannak szolgálatban, előtte 2 napos frissítéssel."""
-    import json
-    import asyncio
-    from datetime import datetime, timedelta
-
-    DUTY_JSON = "duty_log.json"
-    await ctx.send("🔄 Adatbázis frissítése folyamatban a pontos eredmény elérése végett...")
-
-    # --- 1️⃣ Duty-log frissítés az utolsó 2 napból ---
-    processed = 0
-    start_time = dtmod.datetime.now(budapest_tz)
-    try:
-        channel = bot.get_channel(int(os.getenv("DUTY_LOG_CHANNEL_ID")))
-        if channel:
-            after = dtmod.datetime.now(budapest_tz) - timedelta(days=2)
-            async for msg in channel.history(limit=None, after=after):
-                await process_duty_message(msg)
-                processed += 1
-                if processed % 200 == 0:
-                    await ctx.send(f"📥 {processed} üzenet feldolgozva...")
-                await asyncio.sleep(0.2)
-            elapsed = (dtmod.datetime.now(budapest_tz) - start_time).total_seconds()
-            await ctx.send(f"✅ Frissítés kész ({processed} üzenet, {elapsed:.1f} s alatt).")
-        else:
-            await ctx.send("⚠️ Duty-log csatorna nem található, frissítés kihagyva.")
-    except Exception as e:
-        await ctx.send(f"⚠️ Duty-log frissítés sikertelen: {e}")
-        logger.warning(f"[JELEN] Duty-log frissítés sikertelen: {e}")
-
-    # --- 2️⃣ JSON betöltés ---
-    if not os.path.exists(DUTY_JSON):
-        await ctx.send(f"```diff\n- [HIBA] {DUTY_JSON} fájl nem található.\n```")
-        return
+async def jelen(ctx, mod: Optional[str] = None):
+    """Az élő szolgálati állapotból mutatja, kik vannak szolgálatban; `frissit` esetén előtte 2 napos frissítéssel."""
+    from datetime import timedelta
+
+    # --- 1️⃣ Duty-log frissítés az utolsó 2 napból (csak kérésre) ---
+    if mod and mod.lower() in ("frissit", "frissít", "force"):
+        await ctx.send("🔄 Adatbázis frissítése folyamatban a pontos eredmény elérése végett...")
+        processed = 0
+        start_time = dtmod.datetime.now(budapest_tz)
+        try:
+            channel = bot.get_channel(int(os.getenv("DUTY_LOG_CHANNEL_ID")))
+            if channel:
+                after = dtmod.datetime.now(budapest_tz) - timedelta(days=2)
+                progress = ProgressReporter(ctx, "📥 Duty-log frissítés", start=after, interval=float(os.getenv("PROGRESS_INTERVAL", "10")))
+                # ugyanaz az oldal-pipeline, mint a backfill_duty_messages-ben: oldalanként checkpoint-léptetés
+                stats = BatchStats()
+                async for page in pages(DUTY_PACER.pace(channel.history(limit=None, after=after))):
+                    stats.add(process_duty_batch(page))
+                    DUTY_CHECKPOINT.advance(channel.id, stats.last_id)
+                    processed += len(page)
+                    await progress.update(processed, page[-1].id)
+                await commit_checkpoint()
+                await progress.finish("kész", only_if_shown=True)
+                elapsed = (dtmod.datetime.now(budapest_tz) - start_time).total_seconds()
+                await ctx.send(f"✅ Frissítés kész ({processed} üzenet, {elapsed:.1f} s alatt).")
+            else:
+                await ctx.send("⚠️ Duty-log csatorna nem található, frissítés kihagyva.")
+        except Exception as e:
+            await ctx.send(f"⚠️ Duty-log frissítés sikertelen: {e}")
+            logger.warning(f"[JELEN] Duty-log frissítés sikertelen: {e}")
 
-    with open(DUTY_JSON, "r", encoding="utf-8") as f:
-        entries = json.load(f)
+    # --- 2️⃣ Élő állapot: az utolsó 2 nap nyitott felvételei ---
+    now_min = now_minutes(budapest_tz)
+    cutoff = now_min - 2 * MINUTES_PER_DAY
 
-    # --- 3️⃣ Csak az utolsó 2 napból származó bejegyzéseket nézzük ---
-    cutoff = dtmod.datetime.now(budapest_tz) - timedelta(days=2)
-    recent_entries = []
-    for e in entries:
-        try:
-            ts = dtmod.datetime.strptime(e["timestamp"], "%Y-%m-%d %H:%M").replace(tzinfo=budapest_tz)
-            if ts >= cutoff:
-                recent_entries.append(e)
-        except Exception:
-            continue
+    DUTY_REPO.ensure_fresh()
+    # fallback 5 napra, ha 2 napja nem volt esemény
+    if DUTY_ACTIVE.latest_min is None or DUTY_ACTIVE.latest_min < cutoff:
+        cutoff = now_min - 5 * MINUTES_PER_DAY
 
-    # fallback 5 napra
-    if not recent_entries:
-        cutoff = dtmod.datetime.now(budapest_tz) - timedelta(days=5)
-        for e in entries:
-            try:
-                ts = dtmod.datetime.strptime(e["timestamp"], "%Y-%m-%d %H:%M").replace(tzinfo=budapest_tz)
-                if ts >= cutoff:
-                    recent_entries.append(e)
-            except Exception:
-                continue
+    # személyenként egy sor (a legutolsó felvétel), felvétel szerint időrendben
+    active = DUTY_ACTIVE.active(since_min=cutoff)
 
-    # --- 4️⃣ Aktív személyek kiszűrése ---
     vezetoseg = [x.strip() for x in os.getenv("VEZETOSSEG", "").split(",") if x.strip()]
     dedikalt = [x.strip() for x in os.getenv("DEDIKALT_RANGOK", "").split(",") if x.strip()]
 
-    state = {}
-    for e in sorted(recent_entries, key=lambda x: x.get("timestamp", "")):
-        key = e.get("person_key") or e.get("name_norm")
-        if key:
-            state[key] = e.get("type")
-
-    active = [
-        e for e in recent_entries
-        if (e.get("person_key") or e.get("name_norm")) in state
-        and state[e.get("person_key") or e.get("name_norm")] == "felvette"
-        and e.get("type") == "felvette"
-    ]
-
-    # --- 5️⃣ Duplikátumok eltávolítása ---
-    seen = {}
-    for e in sorted(active, key=lambda x: x.get("timestamp", "")):
-        key = e.get("person_key") or e.get("name_norm")
-        seen[key] = e
-    active = list(seen.values())
-
     if not active:
         await ctx.send("```diff\n- Jelenleg senki sincs szolgálatban!\n```")
         return
@@ -1416,34 +1454,32 @@ async def jelen(ctx):
                 return base + j
         return base + len(dedikalt) + 999
 
-    active_sorted = sorted(active, key=lambda e: rank_priority(e.get("position", "")))
+    active_sorted = sorted(active, key=lambda e: rank_priority(e.position or ""))
 
     lines = [f"Szolgálatban van {len(active_sorted)} fő az elmúlt 48 órát figyelembe véve:"]
-    max_name_len = max(len(e.get("name", "")) for e in active_sorted)
-    max_rank_len = max(len(e.get("position", "").replace("Mentő - ", "").strip()) for e in active_sorted)
+    max_name_len = max(len(e.name or "") for e in active_sorted)
+    max_rank_len = max(len((e.position or "").replace("Mentő - ", "").strip()) for e in active_sorted)
     limit_hours = int(os.getenv("MAX_ON_DUTY_HOURS", "12"))
 
     for e in active_sorted:
-        name = e.get("name", "")
+        name = e.name or ""
         position = (
-            e.get("position", "")
+            (e.position or "")
             .replace("Mentő - ", "")
             .replace("Igazgató-helyettes", "Ig. helyettes")
             .replace("Osztályvezető-helyettes", "Osztv. helyettes")
             .strip()
         )
-        start_time = e.get("start_time", e.get("timestamp", ""))
+        start_time = e.get("start_time", e.timestamp or "")
+        start_min = e.start_min if e.start_min is not None else e.ts_min
         emoji = "✅"
         warning = ""
 
-        try:
-            start_dt = dtmod.datetime.strptime(start_time, "%Y-%m-%d %H:%M").replace(tzinfo=budapest_tz)
-            diff_hours = (dtmod.datetime.now(budapest_tz) - start_dt).total_seconds() / 3600
-            if diff_hours > limit_hours:
-                emoji = "‼️"
-                warning = f" ⚠️ ({int(diff_hours)}h)"
-        except Exception:
-            pass
+        # se start_time, se értelmezhető timestamp: listázzuk, de időtúllépést nem számolunk
+        diff_hours = (now_min - start_min) / 60 if start_min is not None else 0
+        if diff_hours > limit_hours:
+            emoji = "‼️"
+            warning = f" ⚠️ ({int(diff_hours)}h)"
 
         lines.append(
             f"{emoji} {name.ljust(max_name_len)} | {position.ljust(max_rank_len - 5)} | {start_time}{warning}"
@@ -1496,17 +1532,15 @@ async def teszt_jelen(ctx):
     TEST_FILE = os.getenv("TEST_MODE_FILE", "hamis_duty_log.json")
     LIMIT = int(os.getenv("TEST_MODE_RECORD_LIMIT", "10"))
 
-    if not os.path.exists(TEST_FILE):
-        await ctx.send(f"```diff\n- [TESZT HIBA] Teszt fájl nem található: {TEST_FILE}\n```")
-        return
-
-    # Hamis duty log beolvasása
+    # Hamis duty log beolvasása (fájl-szálkészletben)
     try:
-        with open(TEST_FILE, "r", encoding="utf-8") as f:
-            entries = json.load(f)
+        entries = await JSON_FILES.read(TEST_FILE)
     except Exception as e:
         await ctx.send(f"```diff\n- [TESZT HIBA] JSON olvasási hiba: {e}\n```")
         return
+    if entries is None:
+        await ctx.send(f"```diff\n- [TESZT HIBA] Teszt fájl nem található: {TEST_FILE}\n```")
+        return
 
     # Utolsó N rekord
     entries = entries[-LIMIT:]
@@ -1721,7 +1755,9 @@ async def betoppano_export(ctx, *args):
     if before_dt_utc:
         history_kwargs["before"] = before_dt_utc
 
-    async for msg in ch.history(**history_kwargs):
+    progress = ProgressReporter(ctx, "Betoppanó export", start=after_dt_utc or ch, end=before_dt_utc, interval=float(os.getenv("PROGRESS_INTERVAL", "10")))
+    async for msg in DUTY_PACER.pace(ch.history(**history_kwargs)):
+        await progress.update(len(entries) + 1, msg.id)
         entries.append({
             "id": msg.id,
             "author": str(msg.author),
@@ -1732,9 +1768,10 @@ async def betoppano_export(ctx, *args):
             "mentions": [m.id for m in msg.mentions],
         })
 
-    # Mentés
-    with open(export_file, "w", encoding="utf-8") as f:
-        json.dump(entries, f, ensure_ascii=False, indent=2)
+    await progress.finish("letöltés kész", only_if_shown=True)
+
+    # Mentés (fájl-szálkészletben; az export nem marad a gyorsítótárban)
+    await JSON_FILES.write(export_file, entries, cache=False)
 
     await ctx.send(f"```diff\n+ [OK] {len(entries)} üzenet mentve → {export_file}```")
 
@@ -1764,48 +1801,40 @@ async def betoppano_export(ctx, *args):
 )
 async def diagnosztika(ctx):
     """Gyors ellenőrzés: betoppano_log.json, discord_user_ids.json, char_to_discord_name.json konzisztencia."""
-    import json
-
     files = {
         "betoppano_log.json": None,
         "discord_user_ids.json": None,
         "char_to_discord_name.json": None,
     }
 
-    # Ellenőrizzük a fájlok meglétét és tartalmát
+    # Ellenőrizzük a fájlok meglétét és tartalmát (olvasás a fájl-szálkészletben)
+    loaded = {}
     for fname in files:
-        if not os.path.exists(fname):
-            files[fname] = f"❌ Nem található"
-            continue
         try:
-            with open(fname, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    files[fname] = f"✅ {len(data)} elem"
-                elif isinstance(data, dict):
-                    files[fname] = f"✅ {len(data)} kulcs"
-                else:
-                    files[fname] = f"⚠️ Ismeretlen formátum"
+            data = await JSON_FILES.read(fname)
         except Exception as e:
             files[fname] = f"❌ Hiba beolvasáskor: {e}"
+            continue
+        if data is None:
+            files[fname] = f"❌ Nem található"
+        elif isinstance(data, list):
+            files[fname] = f"✅ {len(data)} elem"
+        elif isinstance(data, dict):
+            files[fname] = f"✅ {len(data)} kulcs"
+        else:
+            files[fname] = f"⚠️ Ismeretlen formátum"
+        loaded[fname] = data
 
     # Kapcsolati arányok (ha minden megvan)
     found_pairs = 0
     missing_in_ids = 0
-    if os.path.exists("char_to_discord_name.json") and os.path.exists("discord_user_ids.json"):
-        try:
-            with open("char_to_discord_name.json", "r", encoding="utf-8") as f:
-                char_map = json.load(f)
-            with open("discord_user_ids.json", "r", encoding="utf-8") as f:
-                id_map = json.load(f)
-
-            for char_name, discord_name in char_map.items():
-                if discord_name.lower().strip() in id_map:
-                    found_pairs += 1
-                else:
-                    missing_in_ids += 1
-        except Exception:
-            pass
+    char_map, id_map = loaded.get("char_to_discord_name.json"), loaded.get("discord_user_ids.json")
+    if isinstance(char_map, dict) and isinstance(id_map, dict):
+        for char_name, discord_name in char_map.items():
+            if str(discord_name).lower().strip() in id_map:
+                found_pairs += 1
+            else:
+                missing_in_ids += 1
 
     summary = (
         "```diff\n"
@@ -1873,24 +1902,20 @@ async def pair_char(ctx, fivem_nev: str = None, discord_nev: str = None):
     fivem_norm = _norm(fivem_nev)
     discord_norm = _norm(discord_nev)
 
-    # --- JSON beolvasás vagy új létrehozás ---
-    if os.path.exists(CHAR_TO_DISCORD_NAME_FILE):
-        try:
-            with open(CHAR_TO_DISCORD_NAME_FILE, "r", encoding="utf-8") as f:
-                mapping = json.load(f)
-        except Exception:
-            mapping = {}
-    else:
-        mapping = {}
-
     # --- állapotváltozás detektálása ---
-    previous = mapping.get(fivem_norm)
-    mapping[fivem_norm] = discord_norm
+    def _pair(mapping):
+        previous = mapping.get(fivem_norm)
+        mapping[fivem_norm] = discord_norm
+        return previous
 
-    # --- fájl mentés ---
+    # --- beolvasás + atomikus mentés a fájl-szálkészletben (sérült fájl → új térkép) ---
     try:
-        with open(CHAR_TO_DISCORD_NAME_FILE, "w", encoding="utf-8") as f:
-            json.dump(mapping, f, ensure_ascii=False, indent=2)
+        try:
+            previous = await JSON_FILES.update(CHAR_TO_DISCORD_NAME_FILE, _pair)
+        except ValueError:
+            mapping = {}
+            previous = _pair(mapping)
+            await JSON_FILES.write(CHAR_TO_DISCORD_NAME_FILE, mapping)
     except Exception as e:
         await ctx.send(f"```diff\n- Mentési hiba: {e}\n```")
         return
@@ -1939,22 +1964,21 @@ async def char_lista(ctx):
     """Megjeleníti a FiveM karakter ↔ Discord név párosításokat."""
     CHAR_TO_DISCORD_NAME_FILE = "char_to_discord_name.json"
 
+    # --- JSON beolvasás (fájl-szálkészlet, mtime szerinti gyorsítótár) ---
+    try:
+        mapping = await JSON_FILES.read(CHAR_TO_DISCORD_NAME_FILE)
+    except Exception as e:
+        await ctx.send(f"```diff\n- Hiba a fájl beolvasásakor: {e}\n```")
+        return
+
     # --- Fájl ellenőrzés ---
-    if not os.path.exists(CHAR_TO_DISCORD_NAME_FILE):
+    if mapping is None:
         await ctx.send(
             "```diff\n- A char_to_discord_name.json fájl még nem létezik.\n"
             "+ Használd előbb a !pair_char parancsot a létrehozásához.\n```"
         )
         return
 
-    # --- JSON beolvasás ---
-    try:
-        with open(CHAR_TO_DISCORD_NAME_FILE, "r", encoding="utf-8") as f:
-            mapping = json.load(f)
-    except Exception as e:
-        await ctx.send(f"```diff\n- Hiba a fájl beolvasásakor: {e}\n```")
-        return
-
     if not mapping:
         await ctx.send("```diff\n- A fájl üres, még nincsenek párosítások.\n```")
         return
@@ -2252,7 +2276,9 @@ logger.info(f"Regisztrált parancsok: {[c.name for c in bot.commands]}")
 # ---------------------------------------------------------------------------
 @bot.event
 async def setup_hook():
-    """Háttérfeladatok, pl. automatikus frissítés indítása."""
+    """Háttérfeladatok, pl. automatikus frissítés és a duty_log write-behind mentés indítása."""
+    DUTY_PERSISTER.start()
+    LOOP_MONITOR.start()
     asyncio.create_task(auto_refresh_task())
     logger.info("Automatikus frissítés ütemezve (setup_hook).")
 
@@ -2269,7 +2295,8 @@ async def on_command_error(ctx, error):
 @bot.event
 async def on_ready():
     logger.info(f"Bejelentkezve mint: {bot.user}")
-    duty_log[:] = deduplicate_log()
+    if duty_log and DUTY_CHECKPOINT.parser_version != PARSER_VERSION:
+        logger.warning("A duty-kártya értelmező verziója változott – a meglévő rekordokat a `!frissites teljes` építi újra")
     save_log()
     for guild in bot.guilds:
         await backfill_duty_messages(guild)
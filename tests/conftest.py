@@ -0,0 +1,22 @@
+import pytest
+
+from EMS_Duty_Moduls import processing
+from EMS_Duty_Moduls.journal import DutyJournal
+
+
+@pytest.fixture(autouse=True)
+def isolated_journal(tmp_path, monkeypatch):
+    # keep tests from writing into the repository's duty_log.json / duty_log.jsonl
+    journal = DutyJournal(tmp_path / "duty_log.json")
+    monkeypatch.setattr(processing, "JOURNAL", journal)
+    yield journal
+    journal.close()
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    # tests/test_bench_reports.py eredménytáblája (EMS_BENCH=1)
+    lines = getattr(config, "bench_table", None)
+    if lines:
+        terminalreporter.section("riport-parancsok skálázódása")
+        for line in lines:
+            terminalreporter.write_line(line)
@@ -0,0 +1,60 @@
+from EMS_Duty_Moduls.active import ActiveDuty
+from EMS_Duty_Moduls.dutylog import DutyLog
+from EMS_Duty_Moduls.timeutil import parse_minutes
+
+
+def _event(mid, kind, when, name="john doe", fivem="jd"):
+    rec = {"message_id": mid, "name": name.title(), "name_norm": name, "fivem_name": fivem,
+           "position": "Mentő - Orvos", "person_key": f"{name}|{fivem}", "timestamp": when, "type": kind}
+    if kind == "felvette":
+        rec["start_time"] = when
+    else:
+        rec["end_time"] = when
+        rec["duration"] = 60
+    return rec
+
+
+def _log_with_active(records=()):
+    log = DutyLog(records)
+    active = ActiveDuty()
+    active.attach(log)
+    return log, active
+
+
+def test_transitions_follow_latest_event():
+    log, active = _log_with_active([_event(1, "felvette", "2025-11-10 08:00")])
+    assert [r.message_id for r in active.active()] == [1]
+
+    log.upsert(_event(2, "felvette", "2025-11-10 09:00", name="jane roe", fivem="jr"))
+    log.upsert(_event(3, "leadta", "2025-11-10 10:00"))
+    assert [r.message_id for r in active.active()] == [2]
+    assert len(active) == 1
+
+    # késve beolvasott régebbi esemény nem írja felül az állapotot
+    log.upsert(_event(0, "felvette", "2025-11-10 07:00"))
+    assert [r.message_id for r in active.active()] == [2]
+    assert active.latest_min == parse_minutes("2025-11-10 10:00")
+
+
+def test_replace_and_remove_of_latest_event_recomputes():
+    log, active = _log_with_active([
+        _event(1, "felvette", "2025-11-10 08:00"),
+        _event(2, "leadta", "2025-11-10 10:00"),
+    ])
+    assert active.active() == []
+    log.remove(2)
+    assert [r.message_id for r in active.active()] == [1]
+    log.upsert(_event(1, "leadta", "2025-11-10 08:30"))
+    assert active.active() == []
+    log.clear()
+    assert len(active) == 0 and active.latest_min is None
+
+
+def test_since_filter_and_order():
+    _, active = _log_with_active([
+        _event(1, "felvette", "2025-11-10 08:00"),
+        _event(2, "felvette", "2025-11-12 09:00", name="jane roe", fivem="jr"),
+        _event(3, "felvette", "2025-11-12 07:00", name="max mustermann", fivem="mm"),
+    ])
+    assert [r.message_id for r in active.active()] == [1, 3, 2]
+    assert [r.message_id for r in active.active(since_min=parse_minutes("2025-11-12 00:00"))] == [3, 2]
@@ -0,0 +1,139 @@
+"""Riport-parancsok skálázódása szintetikus duty_log-on (opt-in mérés).
+
+Futtatás:  EMS_BENCH=1 python -m pytest -q tests/test_bench_reports.py -p no:cacheprovider
+  EMS_BENCH_SIZES=10000,100000,1000000   rekordszámok
+  EMS_BENCH_REPEAT=5                      ismétlés (a legjobb idő számít)
+  EMS_BENCH_OUT=bench.json                eredmények mentése
+  EMS_BENCH_BASELINE=bench.json           összevetés egy korábbi mentéssel (EMS_BENCH_TOLERANCE=2.0 szorzó felett hiba)
+"""
+import os, json, time, asyncio, tracemalloc
+import datetime as dtmod
+
+import pytest
+
+from EMS_Duty_Moduls import helpers, processing, state
+from EMS_Duty_Moduls.active import ActiveDuty
+from EMS_Duty_Moduls.commands.heti_top import HetiTopCog
+from EMS_Duty_Moduls.commands.jelen import JelenCog
+from EMS_Duty_Moduls.commands.napi import NapiCog
+from EMS_Duty_Moduls.commands.szemely import SzemelyCog
+from EMS_Duty_Moduls.dutylog import DutyLog
+from EMS_Duty_Moduls.fakediscord import FakeChannel, FakeContext
+from EMS_Duty_Moduls.intervals import ShiftTotals
+from EMS_Duty_Moduls.rollup import DutyRollup
+from EMS_Duty_Moduls.synthetic import generate_duty_log
+from EMS_Duty_Moduls.timeutil import MINUTES_PER_DAY, parse_minutes
+
+pytestmark = pytest.mark.skipif(not os.getenv("EMS_BENCH"), reason="mérés: EMS_BENCH=1")
+
+SIZES = [int(x) for x in os.getenv("EMS_BENCH_SIZES", "10000,100000,1000000").split(",") if x.strip()]
+REPEAT = int(os.getenv("EMS_BENCH_REPEAT", "5"))
+RESULTS = {}  # (parancs, méret) → {"ms": ..., "peak_kb": ...}
+
+
+def _measure(fn):
+    best = float("inf")
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms": best * 1000, "peak_kb": peak / 1024}
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda n: f"{n // 1000}k")
+def scenario(request):
+    size = request.param
+    end = dtmod.datetime.now().replace(second=0, microsecond=0)
+    records = generate_duty_log(size, seed=size, end=end)
+    with pytest.MonkeyPatch.context() as mp:
+        for name, value in (("duty_log", DutyLog()), ("ROLLUP", DutyRollup()), ("SHIFTS", ShiftTotals()),
+                            ("ACTIVE", ActiveDuty()), ("STORE", None), ("REPO", None)):
+            mp.setattr(state, name, value)
+
+        def load():
+            # mint a processing.load_log: betöltés, majd a nézetek felépítése
+            state.duty_log.replace_all(records)
+            state.ROLLUP.attach(state.duty_log)
+            state.SHIFTS.attach(state.duty_log)
+            state.ACTIVE.attach(state.duty_log)
+
+        t0 = time.perf_counter()
+        load()
+        took = time.perf_counter() - t0
+        # memória külön futásban: a tracemalloc többszörösére lassítja a betöltést
+        tracemalloc.start()
+        load()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        RESULTS[("betöltés", size)] = {"ms": took * 1000, "peak_kb": peak / 1024}
+
+        first, last = (parse_minutes(records[i]["timestamp"]) // MINUTES_PER_DAY for i in (0, -1))
+        busiest = max(state.ROLLUP.totals_by_name(first, last + 1).items(), key=lambda kv: kv[1][0])[0]
+        yield {"size": size, "end": end, "person": busiest, "ctx": FakeContext(FakeChannel(id=2, name="admin"))}
+
+
+def _week(end):
+    het_vege = end.replace(hour=0, minute=0)
+    return het_vege - dtmod.timedelta(days=7), het_vege
+
+
+def _commands(sc):
+    ctx, end, person = sc["ctx"], sc["end"], sc["person"]
+    het_kezdete, het_vege = _week(end)
+    heti, szemely, napi, jelen = (HetiTopCog(None, state, helpers), SzemelyCog(None, state, helpers),
+                                  NapiCog(None, state, helpers), JelenCog(None, state, helpers))
+    tegnap = (end - dtmod.timedelta(days=1)).strftime("%Y-%m-%d")
+
+    def szemely_napi():
+        # a monolit !szemely_napi lekérdezései: személy keresése + napi összegek a rollupból
+        processing.get_store().for_person(name_norm=person)
+        days = state.ROLLUP.person_days(name_norm=person)
+        return [f"{day}: {m // 60} óra {m % 60} perc" for day, m in days.items()]
+
+    return {
+        "get_time_for_period": lambda: processing.get_time_for_period(het_kezdete, het_vege),
+        "build_weekly_report": lambda: heti.build_weekly_report(het_kezdete, het_vege),
+        "szemely": lambda: asyncio.run(szemely.szemely.callback(szemely, ctx, nev=person)),
+        "szemely_napi": szemely_napi,
+        "napi": lambda: asyncio.run(napi.napi.callback(napi, ctx, tegnap)),
+        "jelen": lambda: asyncio.run(jelen.jelen.callback(jelen, ctx)),
+    }
+
+
+@pytest.mark.parametrize("command", ["get_time_for_period", "build_weekly_report", "szemely", "szemely_napi", "napi", "jelen"])
+def test_command_scaling(scenario, command, report):
+    fn = _commands(scenario)[command]
+    result = _measure(fn)
+    scenario["ctx"].channel.sent.clear()
+    RESULTS[(command, scenario["size"])] = result
+
+    baseline = report.get("baseline", {}).get(f"{command}@{scenario['size']}")
+    if baseline:
+        tolerance = float(os.getenv("EMS_BENCH_TOLERANCE", "2.0"))
+        assert result["ms"] <= baseline["ms"] * tolerance, f"{command} @ {scenario['size']}: {result['ms']:.1f} ms (alap: {baseline['ms']:.1f} ms)"
+
+
+@pytest.fixture(scope="session")
+def report(request):
+    path = os.getenv("EMS_BENCH_BASELINE")
+    ctx = {"baseline": json.loads(open(path, encoding="utf-8").read()) if path and os.path.exists(path) else {}}
+    yield ctx
+    # a táblát a conftest pytest_terminal_summary-ja írja ki (a teardown kimenetét a capture elnyelné)
+    sizes = sorted({size for _, size in RESULTS})
+    names = list(dict.fromkeys(cmd for cmd, _ in RESULTS))
+    lines = [f"{'parancs':<22}" + "".join(f"{f'{s // 1000}k ms':>12}{'csúcs MB':>10}" for s in sizes)]
+    for cmd in names:
+        cells = []
+        for s in sizes:
+            r = RESULTS.get((cmd, s))
+            cells.append(f"{r['ms']:>12.2f}{r['peak_kb'] / 1024:>10.1f}" if r else f"{'-':>12}{'-':>10}")
+        lines.append(f"{cmd:<22}" + "".join(cells))
+    request.config.bench_table = lines
+    out = os.getenv("EMS_BENCH_OUT")
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump({f"{cmd}@{size}": r for (cmd, size), r in RESULTS.items()}, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+import discord
+
+from EMS_Duty_Moduls import processing, state
+from EMS_Duty_Moduls.checkpoint import IngestCheckpoint
+
+
+def test_advance_is_monotonic_and_persisted(tmp_path):
+    path = tmp_path / "duty_checkpoint.json"
+    cp = IngestCheckpoint(path)
+    assert cp.last_seen(42) is None
+    assert cp.advance(42, 1000) is True
+    assert cp.advance(42, 900) is False
+    # a látott jel csak commit után lesz tartós
+    assert cp.last_seen(42) is None
+    cp.save()
+    assert not path.exists()
+    assert cp.commit() is True
+    assert cp.last_seen(42) == 1000 and cp.pending() == {}
+    cp.save()
+    assert not cp.dirty
+    assert IngestCheckpoint(path).last_seen("42") == 1000
+
+
+def test_unreadable_file_starts_empty(tmp_path):
+    path = tmp_path / "duty_checkpoint.json"
+    path.write_text("{nem json", encoding="utf-8")
+    assert IngestCheckpoint(path).last_seen(42) is None
+
+
+def test_ingest_message_stores_record_and_advances_checkpoint(monkeypatch):
+    monkeypatch.setattr(state, "CHECKPOINT", IngestCheckpoint())
+    embed = SimpleNamespace(title="John Doe (JD) felvette a szolgálatot", description="Mentő - Orvos")
+    msg = SimpleNamespace(id=333, channel=SimpleNamespace(id=42), embeds=[embed], created_at=None)
+    assert processing.ingest_message(msg) is True
+    assert 333 in state.duty_log
+    assert state.CHECKPOINT.pending() == {42: 333}
+    state.CHECKPOINT.commit()
+
+    point = processing.resume_point(42)
+    assert isinstance(point, discord.Object) and point.id == 333
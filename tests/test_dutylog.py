@@ -0,0 +1,66 @@
+from EMS_Duty_Moduls.dutylog import DutyLog
+from EMS_Duty_Moduls.timeutil import parse_minutes
+
+
+def _rec(mid, ts, **extra):
+    rec = {"message_id": mid, "timestamp": ts}
+    rec.update(extra)
+    return rec
+
+
+def test_upsert_keeps_time_order_and_replaces_by_id():
+    log = DutyLog([_rec(2, "2025-11-14 12:00"), _rec(1, "2025-11-14 10:00")])
+    log.upsert(_rec(3, "2025-11-14 11:00"))
+    assert [r["message_id"] for r in log] == [1, 3, 2]
+    old = log.upsert(_rec(1, "2025-11-14 13:00", duration=5))
+    assert old["timestamp"] == "2025-11-14 10:00"
+    assert len(log) == 3
+    assert [r["message_id"] for r in log] == [3, 2, 1]
+    assert 1 in log and 4 not in log
+    assert log.get(1)["duration"] == 5
+    assert log[-1]["message_id"] == 1
+
+
+def test_records_without_message_id_are_kept_once():
+    legacy = {"timestamp": "2024-07-01 12:00", "name_norm": "bruno vex", "type": "login"}
+    log = DutyLog([legacy, dict(legacy)])
+    assert len(log) == 1
+
+
+def test_full_slice_assignment_and_clear():
+    log = DutyLog([_rec(1, "a")])
+    log[:] = [_rec(2, "b"), _rec(3, "c")]
+    assert [r["message_id"] for r in log] == [2, 3]
+    log.clear()
+    assert not log and len(log) == 0
+
+
+def test_range_uses_timestamp_and_end_time_indexes():
+    log = DutyLog([
+        _rec(1, "2025-11-13 23:59", end_time="2025-11-13 23:59"),
+        _rec(2, "2025-11-14 00:00"),
+        _rec(3, "2025-11-14 12:00", end_time="2025-11-14 12:00"),
+        _rec(4, "2025-11-15 00:00", end_time="2025-11-15 00:00"),
+        {"name": "régi, időpont nélkül"},
+    ])
+    day = parse_minutes("2025-11-14 00:00")
+    assert [r["message_id"] for r in log.range(day, day + 1440)] == [2, 3]
+    assert [r["message_id"] for r in log.range(day, day + 1440, include_end=True)] == [2, 3, 4]
+    assert [r["message_id"] for r in log.range(day, day + 1440, field="end_time")] == [3]
+    assert [r["message_id"] for r in log.range(None, day)] == [1]
+    log.upsert(_rec(3, "2025-11-16 08:00", end_time="2025-11-16 08:00"))
+    assert [r["message_id"] for r in log.range(day, None, field="end_time")] == [4, 3]
+
+
+def test_person_index_follows_upserts():
+    log = DutyLog([
+        _rec(1, "2025-11-14 10:00", name_norm="john doe", person_key="john doe|jd"),
+        _rec(2, "2025-11-14 08:00", name_norm="john doe", person_key="john doe|jd2"),
+        _rec(3, "2025-11-14 09:00", name_norm="jane roe", person_key="jane roe|jr"),
+    ])
+    assert [r["message_id"] for r in log.for_person(name_norm="john doe")] == [2, 1]
+    assert [r["message_id"] for r in log.for_person(person_key="john doe|jd2")] == [2]
+    log.upsert(_rec(2, "2025-11-14 08:00", name_norm="jane roe", person_key="jane roe|jr"))
+    assert [r["message_id"] for r in log.for_person(name_norm="john doe")] == [1]
+    assert [r["message_id"] for r in log.for_person(name_norm="jane roe")] == [2, 3]
+    assert log.for_person(person_key="john doe|jd2") == []
@@ -0,0 +1,62 @@
+import datetime as dt
+
+from EMS_Duty_Moduls import processing, state
+from EMS_Duty_Moduls.dutyparse import PARSER_VERSION, parse_duty_embed
+
+UTC = dt.timezone.utc
+
+
+def test_real_embed_samples():
+    rec = parse_duty_embed(
+        "**Dr. Hans Heinkel Hesserschmit (Barnus2009) leadta a szolgálatot**",
+        "Mentő - Orvos\nSzolgálatban töltött idő: 42 perc",
+        dt.datetime(2025, 10, 31, 16, 40, 3, tzinfo=UTC),
+        1433858069380468778,
+    )
+    assert rec == {
+        "message_id": 1433858069380468778,
+        "name": "Dr. Hans Heinkel Hesserschmit",
+        "name_norm": "dr. hans heinkel hesserschmit",
+        "fivem_name": "Barnus2009",
+        "person_key": "dr. hans heinkel hesserschmit|barnus2009",
+        "position": "Mentő - Orvos",
+        "duration": 42,
+        "start_time": "2025-10-31 16:58",
+        "end_time": "2025-10-31 17:40",
+        "timestamp": "2025-10-31 17:40",
+        "type": "leadta",
+    }
+    rec = parse_duty_embed("**A B (ab) felvette a szolgálatot**", "Mentő - Mentőtiszt", None, 1)
+    assert rec["type"] == "felvette" and rec["position"] == "Mentő - Mentőtiszt" and "duration" not in rec
+    rec = parse_duty_embed("**Kiss Péter (Peti (2)) leadta a szolgálatot**", "Mentő - Orvos\nSzolgálatban töltött idő: 5 perc", None, 2)
+    assert (rec["name"], rec["fivem_name"], rec["person_key"], rec["duration"]) == ("Kiss Péter", "Peti (2)", "kiss péter|peti (2)", 5)
+    rec = parse_duty_embed("**Nagy Anna ((Anna)) felvette a szolgálatot**", "Mentő - Mentőtiszt", None, 3)
+    assert rec["fivem_name"] == "(Anna)" and rec["type"] == "felvette"
+
+
+def test_non_duty_rejected():
+    assert parse_duty_embed("Napi jelentés", "Mentő - Orvos", None, 1) is None
+    assert parse_duty_embed("Név nélkül felvette a szolgálatot", "", None, 1) is None
+    assert parse_duty_embed(None, None, None, 1) is None
+
+
+def test_wall_clock_across_dst_change():
+    # 2025-10-26: 03:00 CEST → 02:00 CET; mindkét 02:30 helyi idő létezik
+    times = [parse_duty_embed("X (x) felvette a szolgálatot", "", dt.datetime(2025, 10, 26, h, 30, tzinfo=UTC), h)["timestamp"]
+             for h in (0, 1, 2)]
+    assert times == ["2025-10-26 02:30", "2025-10-26 02:30", "2025-10-26 03:30"]
+
+
+def test_modular_parser_localizes_discord_time():
+    msg = {"embed": {"title": "John Doe (JD) felvette a szolgálatot", "description": "Mentő - Orvos"},
+           "id": 333, "created_at": dt.datetime(2025, 7, 1, 8, 0, tzinfo=UTC)}
+    assert processing.parse_duty_message(msg)["start_time"] == "2025-07-01 10:00"
+
+
+def test_parser_version_mark(monkeypatch):
+    monkeypatch.setattr(state.CHECKPOINT, "parser_version", None)
+    processing.process_duty_message({"embed": {"title": "Jane Roe (JR) felvette a szolgálatot"}, "id": 334,
+                                     "created_at": dt.datetime(2025, 11, 14, 9, 0)})
+    assert processing.needs_reparse()
+    state.CHECKPOINT.set_parser_version(PARSER_VERSION)
+    assert not processing.needs_reparse()
@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import datetime as dt
+import logging
+
+from EMS_Duty_Moduls import helpers, state
+from EMS_Duty_Moduls.checkpoint import IngestCheckpoint
+from EMS_Duty_Moduls.commands.frissites import FrissitesCog
+from EMS_Duty_Moduls.fakediscord import FakeBot, FakeChannel, FakeContext, FakeMessage, synthetic_messages
+from EMS_Duty_Moduls.pacing import HistoryPacer, install_rate_limit_tap
+
+
+def test_history_follows_discord_ordering():
+    channel = FakeChannel([FakeMessage(i) for i in range(1, 251)])
+
+    async def ids(**kw):
+        return [m.id async for m in channel.history(**kw)]
+
+    assert asyncio.run(ids(limit=3)) == [250, 249, 248]
+    assert asyncio.run(ids(limit=None, after=FakeMessage(247))) == [248, 249, 250]
+    assert asyncio.run(ids(limit=2, before=FakeMessage(10), oldest_first=True)) == [1, 2]
+    assert asyncio.run(ids(limit=None)) == list(range(250, 0, -1))
+    assert channel.stats()["pages"] == 1 + 1 + 1 + 3  # 100 üzenetes oldalak
+
+
+def test_frissites_end_to_end_with_injected_429(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DUTY_LOG_CHANNEL_ID", "77")
+    monkeypatch.setenv("DUTY_REBUILD_WINDOWS", "4")
+    pacer = HistoryPacer(rate=1000, burst=1000, max_rate=1000)
+    monkeypatch.setattr(state, "PACER", pacer)
+    monkeypatch.setattr(state, "CHECKPOINT", IngestCheckpoint())
+    tap = install_rate_limit_tap(pacer)
+
+    corpus = synthetic_messages(1200, start=dt.datetime(2024, 3, 1, tzinfo=dt.timezone.utc), seed=7)
+    cards = sum(1 for m in corpus if "a szolgálatot" in m.embeds[0].title)
+    duty = FakeChannel(corpus[:1000], id=77, rate_limit_every=4, retry_after=0.01)
+    admin = FakeChannel(id=2)
+    cog = FrissitesCog(FakeBot(duty, admin), state, helpers)
+    try:
+        assert asyncio.run(cog.run_frissites_core(full_mode=True, ctx=FakeContext(admin)))
+        duty.extend(corpus[1000:])
+        served = duty.served
+        assert asyncio.run(cog.run_frissites_core(full_mode=False, ctx=FakeContext(admin)))
+    finally:
+        logging.getLogger("discord.http").removeHandler(tap)
+
+    assert duty.served - served == 200  # a normál frissítés csak a checkpoint utáni üzeneteket olvassa
+    assert all(m.id in state.duty_log for m in corpus if "a szolgálatot" in m.embeds[0].title)
+    assert state.CHECKPOINT.last_seen(77) == corpus[-1].id
+    assert duty.rate_limits > 0 and pacer.rate_limits == duty.rate_limits
+    assert "Új: " in admin.sent[-1].content and cards > 0
+
+
+def test_bench_ingest_runs_all_commands(tmp_path, monkeypatch):
+    from EMS_Duty_Moduls.scripts.bench_ingest import DUTY_CHANNEL_ID, run
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DUTY_LOG_CHANNEL_ID", str(DUTY_CHANNEL_ID))
+    monkeypatch.setattr(state, "PACER", HistoryPacer(rate=1000, burst=1000, max_rate=1000))
+    monkeypatch.setattr(state, "CHECKPOINT", IngestCheckpoint())
+    now = dt.datetime.now(dt.timezone.utc)
+    corpus = synthetic_messages(320, start=now - dt.timedelta(seconds=310 * 320), seed=2)
+    args = argparse.Namespace(latency=0, jitter=0.0, rate_limit_every=0, retry_after=0.01)
+
+    results = asyncio.run(run(args, corpus[:300], corpus[300:]))
+    assert [row[0] for row in results] == ["!frissites teljes", "!frissites normál", "!jelen frissit", "!betoppano_export"]
+    assert all(row[1] > 0 and row[2] > 0 for row in results)  # mindegyik olvasott a csatornából
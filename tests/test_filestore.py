@@ -0,0 +1,82 @@
+import asyncio
+import json
+import os
+
+from EMS_Duty_Moduls import helpers, state
+from EMS_Duty_Moduls.commands.diagnosztika import DiagnosztikaCog
+from EMS_Duty_Moduls.commands.pair_char import PairCharCog
+from EMS_Duty_Moduls.commands.teszt_jelen import TesztJelenCog
+from EMS_Duty_Moduls.fakediscord import FakeChannel, FakeContext
+from EMS_Duty_Moduls.filestore import JsonFileStore
+
+
+def test_read_is_cached_by_mtime_and_writes_are_atomic(tmp_path):
+    path = tmp_path / "map.json"
+    files = JsonFileStore(max_workers=1)
+
+    async def scenario():
+        assert await files.read(path) is None
+        assert await files.read(path, {}) == {}
+        await files.write(path, {"a": 1})
+        first = await files.read(path)
+        assert first == {"a": 1} and await files.read(path) is first  # gyorsítótárból
+
+        # külső módosítás: új mtime / méret → újraolvasás
+        path.write_text(json.dumps({"a": 1, "b": 2}), encoding="utf-8")
+        os.utime(path, ns=(1, 1))
+        assert await files.read(path) == {"a": 1, "b": 2}
+
+        results = await asyncio.gather(*(files.update(path, lambda m, i=i: m.setdefault(f"k{i}", i)) for i in range(20)))
+        assert results == list(range(20))
+        return await files.read(path)
+
+    data = asyncio.run(scenario())
+    files.close()
+    assert len(data) == 22 and json.loads(path.read_text(encoding="utf-8")) == data
+    assert not (tmp_path / "map.json.tmp").exists()
+    assert files.hits >= 1 and files.writes == 21
+
+
+def test_pair_char_and_diagnosztika_use_the_file_store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(state, "FILES", JsonFileStore())
+    (tmp_path / "discord_user_ids.json").write_text(json.dumps({"gery": "123"}), encoding="utf-8")
+    admin = FakeChannel(id=2)
+    ctx = FakeContext(admin)
+    pair = PairCharCog(None, state, helpers)
+    diag = DiagnosztikaCog(None, state, helpers)
+
+    async def scenario():
+        await pair.pair_char.callback(pair, ctx, "Dr. Water  White", "Gery")
+        await pair.pair_char.callback(pair, ctx, "John Stone", "Milan")
+        await diag.diagnosztika.callback(diag, ctx)
+
+    asyncio.run(scenario())
+    state.FILES.close()
+    assert json.loads((tmp_path / "char_to_discord_name.json").read_text(encoding="utf-8")) == {"dr. water white": "gery", "john stone": "milan"}
+    assert "+ Hozzáadva: dr. water white → gery" in admin.sent[0].content
+    report = admin.sent[-1].content
+    assert "betoppano_log.json: ❌ Nem található" in report
+    assert "Összerendelések OK: 1" in report and "ID-térképből: 1" in report
+
+
+def test_exports_are_not_cached_and_teszt_jelen_reads_through_the_store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TEST_MODE", "1")
+    monkeypatch.setattr(state, "FILES", JsonFileStore())
+    admin = FakeChannel(id=2)
+    ctx = FakeContext(admin)
+    cog = TesztJelenCog(None, state, helpers)
+
+    async def scenario():
+        await cog.teszt_jelen.callback(cog, ctx)
+        await state.FILES.write("hamis_duty_log.json", [{"name": "John Doe", "name_norm": "john doe", "type": "felvette",
+                                                         "position": "Mentő - Orvos", "timestamp": "2025-11-14 10:00"}], cache=False)
+        assert not state.FILES._cache
+        await cog.teszt_jelen.callback(cog, ctx)
+
+    asyncio.run(scenario())
+    state.FILES.close()
+    sent = [m.content for m in admin.sent]
+    assert "Teszt fájl nem található" in sent[0]
+    assert any("John Doe" in m for m in sent[1:])
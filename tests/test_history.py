@@ -0,0 +1,80 @@
+import asyncio
+import datetime as dt
+from types import SimpleNamespace
+
+from discord.utils import time_snowflake
+
+from EMS_Duty_Moduls.history import fetch_history_concurrent, snowflake_at, split_windows
+
+
+class FakeChannel:
+    """channel.history() stand-in: 100-message pages with a fixed per-page latency."""
+
+    def __init__(self, ids, latency=0.0):
+        self.id = 1
+        self.messages = [SimpleNamespace(id=i) for i in sorted(ids)]
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.yielded = 0
+
+    async def history(self, limit=None, after=None, before=None, oldest_first=None):
+        lo = after.id if after is not None else 0
+        hi = before.id if before is not None else float("inf")
+        rows = [m for m in self.messages if lo < m.id < hi]
+        if limit is not None:
+            rows = rows[:limit]
+        for start in range(0, len(rows), 100):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(self.latency)
+            self.in_flight -= 1
+            for msg in rows[start:start + 100]:
+                self.yielded += 1
+                yield msg
+
+
+def test_snowflake_at_matches_discord():
+    when = dt.datetime(2025, 11, 14, 10, 0, tzinfo=dt.timezone.utc)
+    assert snowflake_at(when) == time_snowflake(when)
+
+
+def test_windows_are_disjoint_and_cover_the_range():
+    spans = split_windows(100, 1000, 7)
+    covered = [i for after, before in spans for i in range(after + 1, before)]
+    assert covered == list(range(101, 1000))
+
+
+def test_concurrent_fetch_delivers_every_message_once_in_id_order():
+    ids = [2 ** 30 + i * 7919 for i in range(5000)]
+    channel = FakeChannel(ids, latency=0.005)
+    seen = []
+
+    async def handle(msg):
+        seen.append(msg.id)
+
+    count = asyncio.run(fetch_history_concurrent(channel, handle, before=ids[-1] + 1, windows=12, concurrency=4))
+    assert count == len(ids)
+    assert seen == sorted(ids)
+    assert 1 < channel.max_in_flight <= 4
+
+
+def test_slow_consumer_bounds_what_later_windows_buffer():
+    ids = [2 ** 30 + i * 7919 for i in range(6000)]
+    channel = FakeChannel(ids)
+    handled = []
+    buffered = []
+
+    async def handle(page):
+        await asyncio.sleep(0.002)  # lassú feldolgozó: a későbbi ablakok nem olvashatják végig a csatornát
+        handled.extend(m.id for m in page)
+        buffered.append(channel.yielded - len(handled))
+
+    count = asyncio.run(fetch_history_concurrent(channel, handle, before=ids[-1] + 1, windows=12, concurrency=4,
+                                                 per_page=True, prefetch_pages=1))
+    assert count == len(ids) and handled == sorted(ids)
+    assert max(buffered) <= 4 * (1 + 1) * 100 + 100
+
+
+def test_empty_channel():
+    assert asyncio.run(fetch_history_concurrent(FakeChannel([]), lambda msg: None)) == 0
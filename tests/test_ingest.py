@@ -0,0 +1,45 @@
+import asyncio
+import datetime as dt
+
+from EMS_Duty_Moduls import processing, state
+from EMS_Duty_Moduls.ingest import pages
+
+
+def _msg(mid, title, description="Mentő - Orvos"):
+    return {"id": mid, "embed": {"title": title, "description": description},
+            "created_at": dt.datetime(2025, 11, 14, 10, mid % 60)}
+
+
+def test_batch_stats_and_single_persist(monkeypatch):
+    saved = []
+    monkeypatch.setattr(processing, "persist_records", lambda recs: saved.append(list(recs)))
+    page = [
+        _msg(9001, "John Doe (JD) felvette a szolgálatot"),
+        _msg(9002, "John Doe (JD) leadta a szolgálatot", "Mentő - Orvos\nszolgálatban töltött idő: 30 perc"),
+        _msg(9003, "Hibás cím felvette a szolgálatot"),
+        _msg(9004, "Valami más üzenet"),
+    ]
+    stats = processing.process_duty_batch(page)
+    assert stats.as_dict() == {"new": 2, "replaced": 0, "skipped": 1, "unparseable": 1}
+    assert stats.last_id == 9004
+    assert len(saved) == 1 and [r["message_id"] for r in saved[0]] == [9001, 9002]
+    assert state.duty_log.get(9002).duration == 30
+
+    # ismételt oldal: az ismert üzeneteket nem dolgozza fel újra, nem is ment
+    again = processing.process_duty_batch(page[:2])
+    assert again.as_dict() == {"new": 0, "replaced": 0, "skipped": 2, "unparseable": 0}
+    assert len(saved) == 1
+
+    forced = processing.process_duty_batch(page[:2], reparse=True)
+    assert forced.replaced == 2 and len(saved) == 2
+
+
+def test_pages_splits_history_into_chunks():
+    async def history():
+        for i in range(250):
+            yield i
+
+    async def scenario():
+        return [len(p) async for p in pages(history())]
+
+    assert asyncio.run(scenario()) == [100, 100, 50]
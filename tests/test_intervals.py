@@ -0,0 +1,53 @@
+import random
+
+from EMS_Duty_Moduls.dutylog import DutyLog
+from EMS_Duty_Moduls.intervals import ShiftTotals
+from EMS_Duty_Moduls.timeutil import format_minutes, parse_minutes
+
+
+def _leadta(mid, start, minutes, name="John Doe", position="Mentő - Orvos"):
+    end = start + minutes
+    return {"message_id": mid, "name": name, "position": position, "start_time": format_minutes(start),
+            "end_time": format_minutes(end), "timestamp": format_minutes(end), "type": "leadta", "duration": minutes}
+
+
+def _brute(records, a, b):
+    out = {}
+    for r in records:
+        s, e = parse_minutes(r["start_time"]), parse_minutes(r["end_time"])
+        if e > a and s < b:
+            key = (r["name"], r["position"].replace("Mentő - ", ""))
+            out[key] = out.get(key, 0) + max(0, min(e, b) - max(s, a))
+    return out
+
+
+def test_boundary_crossing_shifts_are_clipped():
+    day = parse_minutes("2025-11-14 00:00")
+    log = DutyLog([_leadta(1, day - 60, 120), _leadta(2, day + 600, 60), _leadta(3, day + 1400, 100)])
+    totals = ShiftTotals()
+    totals.attach(log)
+    assert totals.totals(day, day + 1440) == {("John Doe", "Orvos"): 60 + 60 + 40}
+    assert totals.totals(day + 610, day + 620) == {("John Doe", "Orvos"): 10}
+    assert totals.totals(day + 700, day + 800) == {}
+    assert totals.totals() == {("John Doe", "Orvos"): 280}
+
+
+def test_incremental_updates_match_brute_force():
+    rng = random.Random(7)
+    log, totals = DutyLog(), ShiftTotals()
+    totals.attach(log)
+    records, t = {}, parse_minutes("2025-01-01 00:00")
+    for mid in range(1, 301):
+        t += rng.randint(30, 600)
+        name = rng.choice(["A", "B", "C"])
+        rec = _leadta(mid, t, rng.randint(0, 480), name=name)
+        records[mid] = rec
+        log.upsert(rec)
+    # késve érkező / módosított és törölt rekordok
+    records[5] = _leadta(5, parse_minutes("2024-12-31 20:00"), 90, name="A")
+    log.upsert(records[5])
+    log.remove(records.pop(17)["message_id"])
+    for _ in range(200):
+        a = rng.randint(parse_minutes("2024-12-31 00:00"), t)
+        b = a + rng.randint(1, 20000)
+        assert totals.totals(a, b) == _brute(records.values(), a, b)
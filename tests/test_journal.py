@@ -0,0 +1,51 @@
+import json
+from EMS_Duty_Moduls.journal import DutyJournal
+
+
+def _rec(mid, ts, **extra):
+    rec = {"message_id": mid, "name": "John Doe", "timestamp": ts}
+    rec.update(extra)
+    return rec
+
+
+def test_append_and_replay(tmp_path):
+    j = DutyJournal(tmp_path / "duty_log.json", fsync_every=2)
+    j.append(_rec(2, "2025-11-14 12:00"))
+    j.append(_rec(1, "2025-11-14 10:00"))
+    j.append(_rec(2, "2025-11-14 12:00", duration=30))
+    j.close()
+    loaded = DutyJournal(tmp_path / "duty_log.json").load()
+    assert [r["message_id"] for r in loaded] == [1, 2]
+    assert loaded[1]["duration"] == 30
+
+
+def test_torn_last_line_is_skipped_and_truncated(tmp_path):
+    j = DutyJournal(tmp_path / "duty_log.json")
+    j.append(_rec(1, "2025-11-14 10:00"))
+    j.close()
+    with open(j.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"message_id": 2, "timest')
+    j2 = DutyJournal(tmp_path / "duty_log.json")
+    assert [r["message_id"] for r in j2.load()] == [1]
+    j2.append(_rec(3, "2025-11-14 11:00"))
+    j2.close()
+    assert [r["message_id"] for r in DutyJournal(tmp_path / "duty_log.json").load()] == [1, 3]
+
+
+def test_compact_writes_snapshot_and_empties_journal(tmp_path):
+    j = DutyJournal(tmp_path / "duty_log.json", compact_every=2)
+    recs = [_rec(1, "2025-11-14 10:00"), _rec(2, "2025-11-14 09:00")]
+    j.append_many(recs)
+    assert j.needs_compaction()
+    j.compact(recs)
+    assert j.journal_path.read_text(encoding="utf-8") == ""
+    snap = json.loads(j.snapshot_path.read_text(encoding="utf-8"))
+    assert [r["message_id"] for r in snap] == [2, 1]
+    assert not j.needs_compaction()
+
+
+def test_damaged_snapshot_is_salvaged(tmp_path):
+    snap = tmp_path / "duty_log.json"
+    # missing comma between two objects, like the checked-in duty_log.json
+    snap.write_text('[\n  {"message_id": 1, "timestamp": "a"}\n  {"message_id": 2, "timestamp": "b"}\n]', encoding="utf-8")
+    assert [r["message_id"] for r in DutyJournal(snap).load()] == [1, 2]
@@ -0,0 +1,42 @@
+import asyncio
+import logging
+import time
+import traceback
+
+from EMS_Duty_Moduls.loopmon import LoopLagMonitor, hotspot_of
+
+
+def blocking_save():
+    time.sleep(0.4)  # szinkron I/O a loopon
+
+
+def test_watchdog_logs_loop_stack_with_running_command(caplog):
+    monitor = LoopLagMonitor(interval=0.02, threshold_ms=100, running=lambda: ["heti_top"])
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.1)
+        blocking_save()
+        await asyncio.sleep(0.1)
+        monitor.stop()
+
+    with caplog.at_level(logging.WARNING, logger="EMS_DUTY_CORE"):
+        asyncio.run(scenario())
+
+    dumps = [r.message for r in caplog.records if "Event loop blokkolva" in r.message]
+    assert len(dumps) == 1
+    assert "futó parancs: heti_top" in dumps[0] and "tests/test_loopmon.py" in dumps[0]
+    assert "blocking_save" in dumps[0].split("hely: ")[1].splitlines()[0]
+    assert any("Event loop késés" in r.message for r in caplog.records)
+    assert monitor.stalls == 1 and monitor.lag.max >= 300
+    assert sum(monitor.hotspots.values()) == 1
+
+
+def test_hotspot_prefers_innermost_repo_frame():
+    stack = traceback.StackSummary.from_list([
+        ("/usr/lib/python3/asyncio/events.py", 80, "_run", None),
+        (__file__, 10, "heti_top", None),
+        ("/usr/lib/python3/json/__init__.py", 179, "dump", None),
+    ])
+    assert hotspot_of(stack) == "tests/test_loopmon.py:10 heti_top"
+    assert hotspot_of(stack[:1]) == "events.py:80 _run"
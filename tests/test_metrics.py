@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import discord
+from discord.ext import commands
+from discord.ext.commands.view import StringView
+
+from EMS_Duty_Moduls.commands.parancs_stat import ParancsStatCog
+from EMS_Duty_Moduls.fakediscord import FakeChannel, FakeContext
+from EMS_Duty_Moduls.metrics import CommandMetrics, Histogram, install_command_metrics
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_histogram_percentiles_within_bucket_width():
+    h = Histogram()
+    for ms in range(1, 1001):
+        h.add(float(ms))
+    assert h.n == 1000 and h.max == 1000.0
+    assert 500 <= h.percentile(0.5) <= 500 * 1.25
+    assert 950 <= h.percentile(0.95) <= 1000
+    assert Histogram.from_json(h.to_json()).percentile(0.95) == h.percentile(0.95)
+
+
+def test_command_span_phases_sends_and_slow_log(tmp_path, caplog):
+    clock, wall = Clock(), Clock()
+    metrics = CommandMetrics(tmp_path / "m.json", slow_ms=500, save_interval=0, clock=clock, wall=wall)
+    channel = FakeChannel(id=2)
+    ctx = FakeContext(channel)
+
+    async def command():
+        with metrics.phase(ctx, "load"):
+            clock.now += 0.2
+            with metrics.phase(ctx, "compute"):  # beágyazott: a load-ból levonódik
+                clock.now += 0.1
+        clock.now += 0.05
+        await ctx.send("a")
+        await ctx.send("b")
+
+    metrics.begin(ctx, "napi")
+    asyncio.run(command())
+    with caplog.at_level(logging.WARNING, logger="EMS_DUTY_CORE"):
+        span = metrics.finish(ctx)
+    assert [m.content for m in channel.sent] == ["a", "b"]
+    assert span.calls == 2
+    assert round(span.phases["load"], 6) == 0.2 and round(span.phases["compute"], 6) == 0.1
+    assert "send" in span.phases
+    assert not any("Lassú parancs" in r.message for r in caplog.records)
+
+    metrics.begin(ctx, "napi", slow_ms=100)
+    clock.now += 0.3
+    with caplog.at_level(logging.WARNING, logger="EMS_DUTY_CORE"):
+        metrics.finish(ctx, failed=True)
+    assert any("Lassú parancs: !napi 300 ms" in r.message for r in caplog.records)
+
+    row = metrics.summary()[0]
+    assert (row["command"], row["runs"], row["errors"], row["calls"]) == ("napi", 2, 1, 2)
+    assert round(row["max"]) == 350 and row["phases"]["egyéb"]["p50"] <= 300
+
+    metrics.save()
+    reloaded = CommandMetrics(tmp_path / "m.json")
+    reloaded.load()
+    assert reloaded.summary()[0]["runs"] == 2
+
+
+def test_rolling_window_drops_old_slices_and_admin_table():
+    wall = Clock()
+    metrics = CommandMetrics(slice_seconds=60, window=2, wall=wall)
+    for minute, command in enumerate(["szemely", "jelen", "jelen"]):
+        wall.now = minute * 60
+        metrics.record(command, 0.01 * (minute + 1), {"load": 0.005})
+    assert [r["command"] for r in metrics.summary()] == ["jelen"]
+
+    cog = ParancsStatCog(None, SimpleNamespace(METRICS=metrics), None)
+    table = cog.render()
+    assert any(line.startswith("+ !jelen") for line in table)
+    assert cog.render("!szemely")[0].startswith("- [INFO] Nincs mérés")
+    assert any(line.strip().startswith("load") for line in cog.render("jelen"))
+
+
+class _Context(commands.Context):
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+def test_real_dispatch_measures_phases_before_first_await(tmp_path):
+    metrics = CommandMetrics(tmp_path / "m.json", save_interval=0)
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.default())
+    install_command_metrics(bot, metrics)
+    channel = FakeChannel(id=2)
+
+    @bot.command(name="napi")
+    async def napi(ctx):
+        with metrics.phase(ctx, "load"):  # az első await előtt
+            pass
+        await ctx.send("kész")
+
+    async def dispatch():
+        message = SimpleNamespace(content="!napi", channel=channel, author=SimpleNamespace(id=1, bot=False), guild=None, id=1, attachments=[],
+                                  _state=bot._connection)
+        view = StringView(message.content)
+        view.skip_string("!")
+        ctx = _Context(message=message, bot=bot, view=view, prefix="!")
+        ctx.invoked_with = view.get_word()
+        ctx.command = bot.get_command("napi")
+        await bot.invoke(ctx)
+        await metrics.save_soon()
+
+    asyncio.run(dispatch())
+    assert [m.content for m in channel.sent] == ["kész"]
+    row = metrics.summary()[0]
+    assert (row["command"], row["runs"], row["calls"], row["errors"]) == ("napi", 1, 1, 0)
+    assert {"load", "send"} <= set(row["phases"])
+
+    reloaded = CommandMetrics(tmp_path / "m.json")
+    reloaded.load()
+    assert reloaded.summary()[0]["runs"] == 1
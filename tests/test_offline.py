@@ -0,0 +1,87 @@
+import json
+
+from EMS_Duty_Moduls.checkpoint import IngestCheckpoint
+from EMS_Duty_Moduls.offline import rebuild_from_dumps
+
+TITLE_ON = "**Dr. Philadelphia De Blanca (X-ray2061) felvette a szolgálatot**"
+TITLE_OFF = "**Dr. Philadelphia De Blanca (X-ray2061) leadta a szolgálatot**"
+
+
+def _dumps(tmp_path):
+    json_dump = tmp_path / "sniff_duty_1.json"
+    json_dump.write_text(json.dumps([
+        {"id": 1434288911013904534, "timestamp": "2025-11-01 21:12:04.185000+00:00",
+         "embeds": [{"title": TITLE_OFF, "description": "Mentő - Rezidens\nSzolgálatban töltött idő: 60 perc"}]},
+        {"id": 1434287613669539900, "created_at": "2025-11-01T20:06:54.874000+00:00",
+         "embeds": [{"title": TITLE_ON, "description": "Mentő - Rezidens"}]},
+    ]), encoding="utf-8")
+    txt_dump = tmp_path / "sniff_duty_1.txt"
+    txt_dump.write_text(
+        "\n==============================\n"
+        "ID: 1434288911013904534\nTimestamp: 2025-11-01 21:12:04.185000+00:00\n"
+        "Author: NW duty#0000 (ID=1)\nContent: ''\n--- Embed #1 ---\n"
+        f"Title: {TITLE_OFF}\nDescription:\nMentő - Rezidens\nSzolgálatban töltött idő: 60 perc\n"
+        "\n==============================\n"
+        "ID: 1434288001013383259\nTimestamp: 2025-11-01 21:08:27.224000+00:00\n"
+        "--- Embed #1 ---\nTitle: **Dr. Philadelphia De Blanca (X-ray2061) fizetést kapott**\n"
+        "Description:\nJob: Mentő\nRang: Rezidens\n",
+        encoding="utf-8",
+    )
+    raw_log = tmp_path / "raw_sniff.log"
+    raw_log.write_text(
+        "\n==============================\n"
+        "Timestamp: 2025-11-02T08:00:00+00:00\nMessage ID: 1434500000000000000\n"
+        "Content: \nTitle: nem embed\nRaw object: <Message id=1434500000000000000>\n"
+        "Embeds: " + json.dumps([{"title": TITLE_ON, "description": "Mentő - Szakorvos"}], ensure_ascii=False) + "\n",
+        encoding="utf-8",
+    )
+    return [json_dump, txt_dump, raw_log]
+
+
+def test_rebuild_from_all_dump_formats(tmp_path):
+    records, stats = rebuild_from_dumps(_dumps(tmp_path), workers=1)
+    assert stats == {"files": 3, "parsed": 4, "skipped": 1, "duplicates": 1, "records": 3}
+    assert [r["message_id"] for r in records] == [1434287613669539900, 1434288911013904534, 1434500000000000000]
+    off = records[1]
+    assert off["duration"] == 60 and off["end_time"] == "2025-11-01 22:12" and off["position"] == "Mentő - Rezidens"
+    assert records[2]["position"] == "Mentő - Szakorvos"
+
+
+def test_parallel_matches_serial_and_keeps_existing(tmp_path):
+    paths = _dumps(tmp_path)
+    existing = [{"message_id": 1, "timestamp": "2025-10-01 10:00", "type": "felvette"}]
+    serial, _ = rebuild_from_dumps(paths, workers=1, existing=existing)
+    parallel, _ = rebuild_from_dumps(paths, workers=2, existing=existing)
+    assert serial == parallel and serial[0]["message_id"] == 1
+
+
+def test_checkpoint_rewind(tmp_path):
+    cp = IngestCheckpoint(tmp_path / "cp.json")
+    cp.advance(5, 900)
+    cp.commit()
+    assert cp.rewind(500) and cp.last_seen(5) == 500
+    assert not cp.rewind(700)
+
+
+def test_rebuild_script_merges_by_default_and_drops_derived_tables(tmp_path, monkeypatch):
+    from EMS_Duty_Moduls.journal import DutyJournal
+    from EMS_Duty_Moduls.scripts.rebuild_offline import main
+
+    monkeypatch.chdir(tmp_path)
+    paths = [str(p) for p in _dumps(tmp_path)]
+    old = {"message_id": 1, "timestamp": "2025-10-01 10:00", "type": "felvette"}
+    DutyJournal("duty_log.json").compact([old])
+    cp = IngestCheckpoint("duty_checkpoint.json")
+    cp.advance(5, 1434600000000000000)
+    cp.commit()
+    cp.save()
+    (tmp_path / "duty_rollup.json").write_text("{}", encoding="utf-8")
+
+    assert main(paths + ["--workers", "1"]) == 0
+    assert [r["message_id"] for r in DutyJournal("duty_log.json").load()][0] == 1
+    assert IngestCheckpoint("duty_checkpoint.json").last_seen(5) == 1434600000000000000
+    assert not (tmp_path / "duty_rollup.json").exists() and (tmp_path / "duty_log.json.bak").exists()
+
+    assert main(paths + ["--workers", "1", "--replace"]) == 0
+    assert 1 not in [r["message_id"] for r in DutyJournal("duty_log.json").load()]
+    assert IngestCheckpoint("duty_checkpoint.json").last_seen(5) == 1434287613669539900
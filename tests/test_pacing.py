@@ -0,0 +1,94 @@
+import asyncio
+import logging
+
+from EMS_Duty_Moduls.pacing import HistoryPacer, install_rate_limit_tap
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.slept.append(delay)
+        self.now += delay
+
+
+def _pacer(**kw):
+    clock = FakeClock()
+    return HistoryPacer(clock=clock, sleep=clock.sleep, **kw), clock
+
+
+def test_bucket_allows_burst_then_paces_at_rate():
+    pacer, clock = _pacer(rate=2.0, burst=2.0)
+
+    async def scenario():
+        for _ in range(4):
+            await pacer.acquire()
+
+    asyncio.run(scenario())
+    assert pacer.pages == 4
+    assert abs(clock.now - 1.0) < 1e-9  # 2 a burstből, további 2 → 0.5 s-onként
+
+
+def test_rate_adapts_to_latency_and_429():
+    pacer, clock = _pacer(rate=2.0, max_rate=3.0, min_rate=0.5)
+    pacer.observe(0.1)
+    pacer.observe(0.1)
+    pacer.observe(0.1)
+    assert pacer.rate == 3.0
+    pacer.observe(5.0)
+    assert abs(pacer.rate - 2.1) < 1e-9
+
+    pacer.rate_limited(3.0)
+    assert abs(pacer.rate - 1.05) < 1e-9
+
+    async def scenario():
+        await pacer.acquire()
+
+    asyncio.run(scenario())
+    assert clock.now >= 3.0  # a retry_after alatt nincs kérés
+
+
+def test_pace_takes_one_token_per_page():
+    pacer, _ = _pacer(rate=100.0, burst=100.0)
+
+    async def history():
+        for i in range(250):
+            yield i
+
+    async def scenario():
+        return [m async for m in pacer.pace(history())]
+
+    assert asyncio.run(scenario()) == list(range(250))
+    assert pacer.pages == 3
+
+
+def test_tap_feeds_discord_429_warnings():
+    pacer, _ = _pacer(rate=4.0)
+    tap = install_rate_limit_tap(pacer, "test.discord.http")
+    assert install_rate_limit_tap(pacer, "test.discord.http") is None
+    log = logging.getLogger("test.discord.http")
+    log.warning("We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.", "GET", "/x", 1.5)
+    log.removeHandler(tap)
+    assert pacer.rate_limits == 1 and pacer.rate == 2.0
+
+
+def test_sniff_duty_reads_through_the_shared_pacer(tmp_path, monkeypatch):
+    from EMS_Duty_Moduls import helpers, state
+    from EMS_Duty_Moduls.commands.sniff_duty import SniffDutyCog
+    from EMS_Duty_Moduls.fakediscord import FakeBot, FakeChannel, FakeContext, synthetic_messages
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DUTY_LOG_CHANNEL_ID", "77")
+    pacer = HistoryPacer(rate=1000, burst=1000, max_rate=1000)
+    monkeypatch.setattr(state, "PACER", pacer)
+    duty, admin = FakeChannel(synthetic_messages(250), id=77), FakeChannel(id=2)
+    cog = SniffDutyCog(FakeBot(duty, admin), state, helpers)
+
+    asyncio.run(cog.sniff_duty.callback(cog, FakeContext(admin), 250))
+    assert admin.sent[-1].content.startswith("✅ Sniff kész. 250 üzenet.")
+    assert pacer.pages == duty.page_requests == 3
@@ -0,0 +1,83 @@
+import asyncio
+from EMS_Duty_Moduls.checkpoint import IngestCheckpoint
+from EMS_Duty_Moduls.journal import DutyJournal
+from EMS_Duty_Moduls.persister import WriteBehindPersister
+
+
+def _rec(mid):
+    return {"message_id": mid, "timestamp": f"2025-11-14 10:{mid % 60:02d}"}
+
+
+def test_backfill_coalesces_into_few_writes(tmp_path):
+    journal = DutyJournal(tmp_path / "duty_log.json")
+    records = []
+
+    async def scenario():
+        p = WriteBehindPersister(journal, lambda: records, interval=60, batch_size=1000)
+        p.start()
+        for mid in range(2500):
+            rec = _rec(mid)
+            records.append(rec)
+            p.mark_dirty(rec)
+            if mid % 100 == 0:
+                await asyncio.sleep(0)
+        await p.close()
+        return p.flushes
+
+    flushes = asyncio.run(scenario())
+    assert flushes <= 4
+    assert len(DutyJournal(tmp_path / "duty_log.json").load()) == 2500
+
+
+def test_compaction_request_rewrites_snapshot(tmp_path):
+    journal = DutyJournal(tmp_path / "duty_log.json")
+    records = [_rec(1), _rec(2)]
+
+    async def scenario():
+        p = WriteBehindPersister(journal, lambda: records, interval=60)
+        p.start()
+        for rec in records:
+            p.mark_dirty(rec)
+        p.request_compaction()
+        await asyncio.sleep(0.05)
+        assert not p.pending
+        await p.close()
+
+    asyncio.run(scenario())
+    assert journal.snapshot_path.exists()
+    assert journal.journal_path.read_text(encoding="utf-8") == ""
+    assert len(DutyJournal(tmp_path / "duty_log.json").load()) == 2
+
+
+def test_checkpoint_advances_only_after_durable_write(tmp_path):
+    journal = DutyJournal(tmp_path / "duty_log.json")
+    checkpoint = IngestCheckpoint(tmp_path / "duty_checkpoint.json")
+    records = [_rec(1)]
+
+    class FailingSink:
+        fail = True
+
+        def upsert_many(self, batch):
+            if self.fail:
+                raise OSError("disk full")
+
+    sink = FailingSink()
+
+    async def scenario():
+        p = WriteBehindPersister(journal, lambda: records, interval=60, sinks=[sink], checkpoint=checkpoint)
+        p.start()
+        p.mark_dirty(records[0])
+        checkpoint.advance(42, 1001)
+        try:
+            await p.flush()
+        except OSError:
+            pass
+        assert checkpoint.last_seen(42) is None and p.pending
+        sink.fail = False
+        checkpoint.advance(42, 1002)  # a köteg elkérése után látott üzenet is kiíródik a következő körben
+        await p.flush()
+        assert checkpoint.last_seen(42) == 1002
+        await p.close()
+
+    asyncio.run(scenario())
+    assert IngestCheckpoint(tmp_path / "duty_checkpoint.json").last_seen(42) == 1002
@@ -0,0 +1,78 @@
+import asyncio
+import datetime as dt
+
+from EMS_Duty_Moduls.history import snowflake_at
+from EMS_Duty_Moduls.progress import ProgressReporter
+
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+        self.edits = []
+
+    async def edit(self, content):
+        self.edits.append(content)
+        self.content = content
+
+
+class FakeTarget:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, text):
+        msg = FakeMessage(text)
+        self.sent.append(msg)
+        return msg
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_one_message_edited_at_most_every_interval():
+    target, clock = FakeTarget(), FakeClock()
+    start = dt.datetime(2025, 11, 1, tzinfo=dt.timezone.utc)
+    end = dt.datetime(2025, 11, 11, tzinfo=dt.timezone.utc)
+    progress = ProgressReporter(target, "Teszt", start=start, end=end, interval=10, clock=clock)
+
+    async def scenario():
+        for i in range(1, 301):
+            clock.now = i * 0.1  # 10 üzenet / mp
+            await progress.update(i, snowflake_at(start + dt.timedelta(hours=i * 0.4)))
+        await progress.finish()
+
+    asyncio.run(scenario())
+    assert len(target.sent) == 1
+    status = target.sent[0]
+    assert len(status.edits) == 3  # 20 s, 30 s, záró
+    assert "200 üzenet" in status.edits[0]
+    assert "[OK]" in status.content and "300 üzenet" in status.content
+
+
+def test_eta_from_snowflakes():
+    clock = FakeClock()
+    start = dt.datetime(2025, 11, 1, tzinfo=dt.timezone.utc)
+    end = dt.datetime(2025, 11, 5, tzinfo=dt.timezone.utc)
+    progress = ProgressReporter(None, "Teszt", start=start, end=end, clock=clock)
+    progress.processed = 100
+    progress.last_id = snowflake_at(start + dt.timedelta(days=1))
+    clock.now = 60.0
+    assert abs(progress.fraction() - 0.25) < 1e-6
+    assert "25%" in progress.render() and "ETA 3p 00mp" in progress.render()
+
+
+def test_short_scan_posts_nothing():
+    target = FakeTarget()
+    progress = ProgressReporter(target, "Teszt", total=5, interval=10, clock=FakeClock())
+
+    async def scenario():
+        for i in range(5):
+            await progress.update(i + 1)
+        await progress.finish(only_if_shown=True)
+
+    asyncio.run(scenario())
+    assert target.sent == []
@@ -0,0 +1,45 @@
+import json
+
+from EMS_Duty_Moduls.records import DutyRecord, format_minutes, parse_minutes
+
+
+LEADTA = {
+    "message_id": 1438900000000000001,
+    "name": "Kiss Péter",
+    "name_norm": "kiss péter",
+    "fivem_name": "kpeti",
+    "position": "Mentő - Mentőtiszt",
+    "person_key": "kiss péter|kpeti",
+    "end_time": "2025-11-14 18:05",
+    "timestamp": "2025-11-14 18:05",
+    "type": "leadta",
+    "duration": 125,
+    "discord_id": "1349829505149309010",
+}
+
+
+def test_round_trip_is_lossless_including_key_order():
+    rec = DutyRecord.from_dict(LEADTA)
+    assert rec.to_dict() == LEADTA
+    assert list(rec.to_dict()) == list(LEADTA)
+    assert json.dumps(rec.to_dict(), ensure_ascii=False) == json.dumps(LEADTA, ensure_ascii=False)
+    legacy = {"timestamp": "2024-07-01 12:00", "name": "Bruno", "note": "kézi", "start_time": "tegnap"}
+    assert DutyRecord.from_dict(legacy).to_dict() == legacy
+
+
+def test_attribute_and_mapping_access():
+    rec = DutyRecord.from_dict(LEADTA)
+    assert rec.name == "Kiss Péter" and rec.duration == 125
+    assert rec.ts_min == rec.end_min == parse_minutes("2025-11-14 18:05")
+    assert rec.timestamp == rec["timestamp"] == "2025-11-14 18:05"
+    assert rec.start_min is None and "start_time" not in rec
+    assert rec.get("start_time", "x") == "x"
+    other = DutyRecord.from_dict(dict(LEADTA))
+    assert other.name_norm is rec.name_norm
+
+
+def test_minutes_conversion():
+    assert parse_minutes("1970-01-01 00:00") == 0
+    assert format_minutes(parse_minutes("2024-02-29 23:59")) == "2024-02-29 23:59"
+    assert parse_minutes("2025-11-14 7:05") is None
+    assert parse_minutes("2025-13-01 10:00") is None
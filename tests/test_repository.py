@@ -0,0 +1,97 @@
+import datetime as dtmod
+
+from EMS_Duty_Moduls.dutylog import DutyLog
+from EMS_Duty_Moduls.journal import DutyJournal
+from EMS_Duty_Moduls.repository import DutyRepository
+from EMS_Duty_Moduls.rollup import DutyRollup
+from EMS_Duty_Moduls.store import MemoryDutyStore
+
+
+def _leadta(mid, ts, duration, name="Kiss Péter"):
+    return {
+        "message_id": mid,
+        "name": name,
+        "name_norm": name.lower(),
+        "position": "Mentő - Mentőtiszt",
+        "end_time": ts,
+        "timestamp": ts,
+        "type": "leadta",
+        "duration": duration,
+    }
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _repo(tmp_path, pending=()):
+    journal = DutyJournal(tmp_path / "duty_log.json")
+    log = DutyLog()
+    store = MemoryDutyStore(lambda: log)
+    clock = Clock()
+    repo = DutyRepository(lambda: journal, lambda: log, lambda: store, pending=lambda: list(pending), check_interval=2, clock=clock)
+    return repo, journal, log, clock
+
+
+def test_external_append_is_read_incrementally_and_updates_views(tmp_path):
+    DutyJournal(tmp_path / "duty_log.json").compact([_leadta(1, "2025-11-14 10:00", 60)])
+    repo, journal, log, clock = _repo(tmp_path)
+    rollup = DutyRollup()
+    assert repo.load() == 1
+    rollup.attach(log)
+
+    other = DutyJournal(tmp_path / "duty_log.json")  # másik folyamat
+    other.append(_leadta(2, "2025-11-14 12:00", 30))
+    other.sync()
+
+    assert len(repo.for_person(name_norm="kiss péter")) == 1  # még a throttle-ablakon belül
+    clock.now = 2
+    assert [r["message_id"] for r in repo.for_person(name_norm="kiss péter")] == [1, 2]
+    assert rollup.person_days(name_norm="kiss péter") == {dtmod.date(2025, 11, 14): 90}
+    assert repo.reloads == 1 and repo.applied == 1
+    assert repo.refresh() == 0
+
+
+def test_rewrite_is_diffed_and_keeps_unwritten_records(tmp_path):
+    DutyJournal(tmp_path / "duty_log.json").compact([_leadta(i, f"2025-11-14 1{i}:00", 10) for i in (1, 2, 3)])
+    unwritten = [_leadta(4, "2025-11-14 15:00", 40)]
+    repo, journal, log, clock = _repo(tmp_path, pending=unwritten)
+    repo.load()
+    log.upsert(unwritten[0])
+
+    # offline újraépítés: az 1-es módosult, a 2-es kimaradt, az 5-ös új
+    DutyJournal(tmp_path / "duty_log.json").compact(
+        [_leadta(1, "2025-11-14 11:00", 99), _leadta(3, "2025-11-14 13:00", 10), _leadta(5, "2025-11-14 16:00", 5, name="Nagy Anna")]
+    )
+    assert repo.refresh() == 3
+    assert [r["message_id"] for r in log] == [1, 3, 4, 5]
+    assert log.get(1)["duration"] == 99
+    assert repo.count() == 4
+
+
+def test_own_writes_are_not_external_but_interleaved_foreign_lines_are(tmp_path):
+    repo, journal, log, clock = _repo(tmp_path)
+    repo.load()
+    other = DutyJournal(tmp_path / "duty_log.json")
+    for mid in (1, 2):
+        log.upsert(_leadta(mid, f"2025-11-14 1{mid}:00", 10))
+        journal.append(_leadta(mid, f"2025-11-14 1{mid}:00", 10))
+    journal.sync()
+    assert journal.external_change() is None
+
+    other.append(_leadta(7, "2025-11-14 17:00", 20))
+    other.sync()
+    log.upsert(_leadta(3, "2025-11-14 13:00", 10))
+    journal.append_many([_leadta(3, "2025-11-14 13:00", 10)])
+    journal.sync()
+
+    assert journal.external_change() == "append"
+    assert repo.refresh() == 1
+    assert [r["message_id"] for r in log] == [1, 2, 3, 7]
+    assert journal.external_change() is None
+    journal.close()
+    assert [r["message_id"] for r in DutyJournal(tmp_path / "duty_log.json").load()] == [1, 2, 3, 7]
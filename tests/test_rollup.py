@@ -0,0 +1,72 @@
+import json
+import datetime as dt
+
+from EMS_Duty_Moduls.dutylog import DutyLog
+from EMS_Duty_Moduls.rollup import DutyRollup
+from EMS_Duty_Moduls.timeutil import parse_minutes
+
+
+def _leadta(mid, end, minutes, name="john doe", fivem="jd", position="Mentő - Orvos"):
+    return {"message_id": mid, "name": name.title(), "name_norm": name, "fivem_name": fivem,
+            "position": position, "person_key": f"{name}|{fivem}", "end_time": end,
+            "timestamp": end, "type": "leadta", "duration": minutes}
+
+
+def _log_with_rollup():
+    log = DutyLog()
+    rollup = DutyRollup()
+    rollup.attach(log)
+    return log, rollup
+
+
+def test_incremental_updates_match_full_recompute():
+    log, rollup = _log_with_rollup()
+    log.extend([
+        _leadta(1, "2025-11-10 09:00", 60),
+        _leadta(2, "2025-11-10 18:00", 30, position="Mentő - Mentőtiszt"),
+        _leadta(3, "2025-11-11 01:00", 45, name="jane roe", fivem="jr"),
+        {"message_id": 4, "name_norm": "john doe", "type": "felvette", "timestamp": "2025-11-12 08:00"},
+    ])
+    log.upsert(_leadta(2, "2025-11-10 18:00", 90, position="Mentő - Mentőtiszt"))
+    log.remove(3)
+    assert rollup.verify(log) == []
+    assert rollup.person_days(name_norm="john doe") == {dt.date(2025, 11, 10): 150}
+    assert rollup.person_days(name_norm="jane roe") == {}
+    assert rollup.position_totals(0, 10 ** 6) == {"Mentő - Orvos": 60, "Mentő - Mentőtiszt": 90}
+
+
+def test_week_totals_and_persisted_table(tmp_path):
+    log, rollup = _log_with_rollup()
+    log.extend([
+        _leadta(1, "2025-11-09 23:59", 10),
+        _leadta(2, "2025-11-10 00:00", 20),
+        _leadta(3, "2025-11-16 12:00", 30, position="Mentő - Mentőtiszt"),
+        _leadta(4, "2025-11-17 00:00", 40),
+    ])
+    week = parse_minutes("2025-11-10 00:00") // 1440
+    assert rollup.totals_by_name(week, week + 7) == {"john doe": [50, "Mentő - Mentőtiszt"]}
+
+    path = tmp_path / "duty_rollup.json"
+    rollup.save(path)
+    reloaded = DutyRollup()
+    fresh = DutyLog(list(log))
+    reloaded.attach(fresh, path)
+    assert reloaded.totals_by_name(week, week + 7) == {"john doe": [50, "Mentő - Mentőtiszt"]}
+    assert reloaded.verify(fresh) == []
+    assert json.loads(path.read_text(encoding="utf-8"))["records"] == 4
+    fresh.upsert(_leadta(5, "2025-11-12 10:00", 5))
+    assert reloaded.totals_by_name(week, week + 7)["john doe"][0] == 55
+
+
+def test_attach_recomputes_even_when_saved_table_looks_current(tmp_path):
+    log, rollup = _log_with_rollup()
+    log.extend([_leadta(1, "2025-11-10 09:00", 60), _leadta(2, "2025-11-10 18:00", 30)])
+    path = tmp_path / "duty_rollup.json"
+    rollup.save(path)
+
+    # javított embed ugyanazzal a message_id-val: a rekordszám és az utolsó időpont nem változik
+    changed = DutyLog(list(log))
+    changed.upsert(_leadta(1, "2025-11-10 09:00", 90))
+    reloaded = DutyRollup()
+    reloaded.attach(changed, path)
+    assert reloaded.person_days(name_norm="john doe") == {dt.date(2025, 11, 10): 120}
@@ -0,0 +1,100 @@
+import datetime as dt
+import pytest
+from EMS_Duty_Moduls.dutylog import DutyLog
+from EMS_Duty_Moduls.store import MemoryDutyStore, SqliteDutyStore, open_store
+
+RECORDS = [
+    {"message_id": 1, "name": "John Doe", "name_norm": "john doe", "person_key": "john doe|jd",
+     "type": "felvette", "start_time": "2025-11-14 08:00", "timestamp": "2025-11-14 08:00"},
+    {"message_id": 2, "name": "John Doe", "name_norm": "john doe", "person_key": "john doe|jd",
+     "type": "leadta", "duration": 120, "start_time": "2025-11-14 08:00", "end_time": "2025-11-14 10:00",
+     "timestamp": "2025-11-14 10:00"},
+    {"message_id": 3, "name": "Jane Roe", "name_norm": "jane roe", "person_key": "jane roe|jr",
+     "type": "leadta", "duration": 30, "start_time": "2025-11-15 00:10", "end_time": "2025-11-15 00:40",
+     "timestamp": "2025-11-15 00:40"},
+]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    records = DutyLog(RECORDS)
+    s = open_store(request.param, lambda: records, tmp_path / "duty.sqlite3")
+    yield s
+    s.close()
+
+
+def test_between_and_for_person(store):
+    day = dt.datetime(2025, 11, 14)
+    assert [r["message_id"] for r in store.between(day, day + dt.timedelta(days=1))] == [1, 2]
+    assert [r["message_id"] for r in store.between(day, day + dt.timedelta(days=1), field="end_time")] == [2]
+    assert [r["message_id"] for r in store.between("2025-11-14 08:00", "2025-11-14 10:00", include_end=True)] == [1, 2]
+    assert [r["message_id"] for r in store.for_person(name_norm="john doe")] == [1, 2]
+    assert [r["message_id"] for r in store.for_person(person_key="jane roe|jr")] == [3]
+    assert store.latest_timestamp() == "2025-11-15 00:40"
+    assert store.count() == 3
+
+
+def test_sqlite_upsert_replaces_by_message_id(tmp_path):
+    s = SqliteDutyStore(tmp_path / "duty.sqlite3")
+    s.upsert_many(RECORDS)
+    s.upsert_many([dict(RECORDS[1], duration=90)])
+    assert s.count() == 3
+    assert s.for_person(name_norm="john doe")[1]["duration"] == 90
+    mode = s.conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode.lower() == "wal"
+    s.close()
+
+
+def test_sqlite_mirror_resyncs_when_journal_moved_on(tmp_path):
+    from EMS_Duty_Moduls.journal import DutyJournal
+
+    journal = DutyJournal(tmp_path / "duty_log.json")
+    journal.compact(RECORDS)
+    records = DutyLog(journal.load())
+    s = open_store("sqlite", lambda: records, tmp_path / "duty.sqlite3", stamp=journal.stamp)
+    s.close()
+
+    # javított rekord ugyanazzal a message_id-val; összeomlás a tükör írása előtt
+    journal.append(dict(RECORDS[1], duration=90))
+    journal.close()
+    journal = DutyJournal(tmp_path / "duty_log.json")
+    records = DutyLog(journal.load())
+    s = open_store("sqlite", lambda: records, tmp_path / "duty.sqlite3", stamp=journal.stamp)
+    assert s.count() == 3 and s.for_person(name_norm="john doe")[1]["duration"] == 90
+    assert s.synced_stamp() is not None
+    s.close()
+
+
+def test_commands_see_records_still_queued_for_the_sqlite_mirror(tmp_path, monkeypatch):
+    import asyncio
+    from EMS_Duty_Moduls import helpers, processing, state
+    from EMS_Duty_Moduls.commands.napi import NapiCog
+    from EMS_Duty_Moduls.commands.szemely import SzemelyCog
+    from EMS_Duty_Moduls.fakediscord import FakeChannel, FakeContext
+    from EMS_Duty_Moduls.persister import WriteBehindPersister
+
+    log = DutyLog()
+    sqlite = SqliteDutyStore(tmp_path / "duty.sqlite3")
+    monkeypatch.setattr(state, "duty_log", log)
+    monkeypatch.setattr(state, "STORE", sqlite)
+    monkeypatch.setattr(state, "REPO", None)
+    channel = FakeChannel(id=2)
+    ctx = FakeContext(channel)
+
+    async def scenario():
+        p = WriteBehindPersister(processing.JOURNAL, lambda: log, interval=60, sinks=[sqlite])
+        monkeypatch.setattr(state, "PERSISTER", p)
+        p.start()
+        for rec in RECORDS:
+            log.upsert(rec)
+            p.mark_dirty(rec)  # a tükörbe csak a flush-sal kerül
+        napi, szemely = NapiCog(None, state, helpers), SzemelyCog(None, state, helpers)
+        await napi.napi.callback(napi, ctx, "2025-11-14")
+        await szemely.szemely.callback(szemely, ctx, nev="Jane Roe")
+        await p.close()
+
+    asyncio.run(scenario())
+    sent = [m.content for m in channel.sent]
+    assert sent[0].startswith("**2025.11.14. szolgálat:**") and "John Doe" in sent[0]
+    assert any("30 perc" in line for line in sent)
+    sqlite.close()
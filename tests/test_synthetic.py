@@ -0,0 +1,47 @@
+import datetime as dt
+
+from EMS_Duty_Moduls.dutylog import DutyLog
+from EMS_Duty_Moduls.dutyparse import parse_duty_embed
+from EMS_Duty_Moduls.fakediscord import synthetic_messages
+from EMS_Duty_Moduls.synthetic import generate_duty_log
+
+
+def test_generate_duty_log_is_seeded_and_consistent():
+    end = dt.datetime(2024, 5, 1, 12, 0)
+    records = generate_duty_log(2000, people=20, seed=3, end=end)
+    assert records == generate_duty_log(2000, people=20, seed=3, end=end)
+    assert 1800 <= len(records) <= 2000
+    assert len({r["message_id"] for r in records}) == len(records)
+    assert [r["timestamp"] for r in records] == sorted(r["timestamp"] for r in records)
+    assert all(r["timestamp"] <= "2024-05-01 12:00" for r in records)
+
+    # személyenként felváltva felvette / leadta, a leadta a saját felvételére mutat
+    open_since = {}
+    for r in records:
+        if r["type"] == "felvette":
+            assert r["person_key"] not in open_since
+            open_since[r["person_key"]] = r["start_time"]
+        else:
+            assert open_since.pop(r["person_key"]) == r["start_time"]
+    assert open_since  # a napló végén van nyitott szolgálat (!jelen)
+
+    log = DutyLog()
+    log.replace_all(records)
+    assert len(log) == len(records)
+
+
+def test_synthetic_messages_render_the_generated_records():
+    start = dt.datetime(2024, 3, 1, tzinfo=dt.timezone.utc)
+    messages = synthetic_messages(500, start=start, people=10, seed=5)
+    parsed = []
+    for m in messages:
+        rec = parse_duty_embed(m.embeds[0].title, m.embeds[0].description, m.created_at, m.id)
+        if rec is not None:
+            parsed.append(rec)
+    assert 400 <= len(parsed) < 500  # a többi fizetés-kártya
+
+    records = {r["message_id"]: r for r in generate_duty_log(1010, people=10, seed=5, start=dt.datetime(2024, 3, 1, 1, 0))}
+    for rec in parsed:
+        expected = records[rec["message_id"]]
+        for field in ("name", "type", "position", "timestamp", "start_time", "end_time", "duration"):
+            assert rec.get(field) == expected.get(field), field
@@ -0,0 +1,22 @@
+import datetime as dt
+
+import pytz
+
+from EMS_Duty_Moduls.timeutil import date_of, day_bounds, format_minutes, minutes_of, parse_minutes, to_minutes, week_bounds
+
+
+def test_wall_clock_minutes_follow_local_time():
+    tz = pytz.timezone("Europe/Budapest")
+    aware = tz.localize(dt.datetime(2025, 3, 30, 3, 15))  # DST-váltás napja
+    assert minutes_of(aware) == parse_minutes("2025-03-30 03:15")
+    assert to_minutes(dt.datetime(2025, 3, 30, 3, 15, 59)) == to_minutes("2025-03-30 03:15")
+    assert date_of(parse_minutes("2025-03-30 23:59")) == dt.date(2025, 3, 30)
+
+
+def test_day_and_week_bounds():
+    m = parse_minutes("2025-11-14 18:05")  # péntek
+    start, end = day_bounds(m)
+    assert (format_minutes(start), format_minutes(end)) == ("2025-11-14 00:00", "2025-11-15 00:00")
+    start, end = week_bounds(m)
+    assert (format_minutes(start), format_minutes(end)) == ("2025-11-10 00:00", "2025-11-17 00:00")
+    assert week_bounds(start) == (start, end)